@@ -0,0 +1,1042 @@
+"""
+Benchmarks for open_bms.py. These run against the saved pages in fixtures/ and never touch the live site.
+
+Usage:
+    python bench_bms.py seatmap [--rounds N]
+    python bench_bms.py seatgrid [--rounds N]
+    python bench_bms.py precheck [--rounds N]
+    python bench_bms.py startup [--rounds N]
+    python bench_bms.py session [--rounds N]
+    python bench_bms.py seatstream [--rounds N]
+    python bench_bms.py showtimes [--rounds N]
+    python bench_bms.py theatres [--rounds N]
+    python bench_bms.py timeparse [--rounds N]
+    python bench_bms.py locators [--rounds N]
+    python bench_bms.py lean [--rounds N]
+    python bench_bms.py memory [--rounds N]
+    python bench_bms.py display [--rounds N]
+    python bench_bms.py orchestrator [--rounds N]
+    python bench_bms.py monitor
+    python bench_bms.py pipeline [--rounds N] [--scenario scenario.json] [--sleep-path]
+    python bench_bms.py checkout [--rounds N]
+    python bench_bms.py hold
+
+Each benchmark prints a small comparison table (WebDriver round trips and wall time).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+import bms_standin
+import bms_synthetic
+import open_bms
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_url(name: str) -> str:
+    """file:// URL of a saved fixture page."""
+    return "file://" + os.path.join(FIXTURES_DIR, name)
+
+
+BENCH_BROWSER_ARGUMENTS = ["--headless=new"]
+
+
+def bench_binary_path() -> str | None:
+    """CHROMIUM_BINARY_PATH if it exists on this machine, else None (auto-detect)."""
+    path = open_bms.CHROMIUM_BINARY_PATH
+    return path if path and os.path.exists(path) else None
+
+
+def bench_driver() -> tuple[uc.Chrome, str]:
+    """Starts a headless driver with a throwaway profile. Returns (driver, profile_dir)."""
+    profile_dir = tempfile.mkdtemp(prefix="bms_bench_")
+    driver = open_bms.setup_driver(profile_dir, bench_binary_path(), BENCH_BROWSER_ARGUMENTS)
+    if driver is None: raise RuntimeError("Could not start a browser for the benchmark.")
+    return driver, profile_dir
+
+
+def process_tree_cpu_seconds(root_pid: int) -> float:
+    """User+system CPU seconds of a process and all its descendants (Linux /proc)."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit(): continue
+        try:
+            with open(f"/proc/{entry}/stat") as f: fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append((int(entry), int(fields[11]) + int(fields[12])))
+    total, stack = 0, [root_pid]
+    try:
+        with open(f"/proc/{root_pid}/stat") as f: fields = f.read().rsplit(")", 1)[1].split()
+        total += int(fields[11]) + int(fields[12])
+    except OSError:
+        return 0.0
+    while stack:
+        for child_pid, child_ticks in children.get(stack.pop(), []):
+            total += child_ticks
+            stack.append(child_pid)
+    return total / ticks
+
+
+def print_table(title: str, rows: list[tuple]):
+    """Prints (label, round trips, median ms) rows."""
+    print(f"\n--- {title} ---")
+    print(f"{'Strategy':<28}{'Round trips':>12}{'Median':>12}")
+    for label, trips, median_ms in rows:
+        print(f"{label:<28}{trips:>12}{median_ms:>10.1f}ms")
+
+
+# --- Seat map ---
+
+def legacy_seat_probe(driver: uc.Chrome, attempts: int):
+    """The old per-seat loop from select_seats_and_pay: find, parent, id, re-find, scroll, click."""
+    links = driver.find_elements(*open_bms.AVAILABLE_SEAT_LOCATOR)
+    for link in links[:attempts]:
+        parent_div = link.find_element(By.XPATH, "./parent::div")
+        seat_id = parent_div.get_attribute("id")
+        current_seat_link = driver.find_element(By.XPATH, f"//div[@id='{seat_id}']/a")
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", current_seat_link)
+        driver.execute_script(f"fnSelectSeat('{seat_id}');")
+
+
+def snapshot_seat_probe(driver: uc.Chrome, attempts: int):
+    """The snapshot path: one call for the whole map, one call per seat click."""
+    seat_map = open_bms.snapshot_seat_map(driver)
+    for seat in [seat for seat in seat_map if seat.status == "available"][:attempts]:
+        open_bms.click_seat(driver, seat.id)
+
+
+def bench_seatmap(args: argparse.Namespace):
+    """Round trips and wall time to try MAX_SEAT_CLICK_ATTEMPTS seats on the saved seat layout."""
+    rounds = args.rounds
+    driver, profile_dir = bench_driver()
+    try:
+        counts = open_bms.instrument_webdriver_commands(driver)
+        rows = []
+        for label, probe in (("per-seat WebDriver calls", legacy_seat_probe), ("seat map snapshot", snapshot_seat_probe)):
+            timings, trips = [], 0
+            for _ in range(rounds):
+                driver.get(fixture_url("seat_layout.html"))
+                counts.clear()
+                start = time.perf_counter()
+                probe(driver, open_bms.MAX_SEAT_CLICK_ATTEMPTS)
+                timings.append((time.perf_counter() - start) * 1000)
+                trips = sum(counts.values())
+            rows.append((label, trips, statistics.median(timings)))
+        print_table(f"Seat map: {open_bms.MAX_SEAT_CLICK_ATTEMPTS} seat attempts, {rounds} rounds", rows)
+    finally:
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def bench_seatgrid(args: argparse.Namespace):
+    """SeatGrid build, block search and incremental updates on synthetic layouts of 1,000+ seats."""
+    rows = []
+    for n_rows, n_cols in ((40, 30), (60, 50), (100, 80)):
+        seat_map = bms_synthetic.synthetic_seat_map(n_rows, n_cols, sold_ratio=0.4)
+        build, search, update = [], [], []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            grid = open_bms.SeatGrid(seat_map)
+            build.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            blocks = grid.best_blocks(4)
+            search.append((time.perf_counter() - start) * 1000)
+            # Flip 200 seats to sold one at a time, as a change stream would
+            flips = [seat.id for seat in random.Random(2).sample(seat_map, 200)]
+            start = time.perf_counter()
+            for seat_id in flips: grid.update(seat_id, "sold")
+            update.append((time.perf_counter() - start) * 1000 / len(flips))
+        # The incrementally updated index must match a grid built from scratch
+        rebuilt = open_bms.SeatGrid([seat._replace(status="sold") if seat.id in set(flips) else seat for seat in seat_map])
+        assert rebuilt.runs == grid.runs and rebuilt.best_blocks(4) == grid.best_blocks(4), "incremental index drifted"
+        assert all(len(block.seat_ids) == 4 for block in blocks)
+        rows.append((f"{n_rows * n_cols} seats", len(blocks), statistics.median(build), statistics.median(search), statistics.median(update)))
+    print(f"\n--- SeatGrid on synthetic layouts (40% sold, blocks of 4, {args.rounds} rounds) ---")
+    print(f"{'Layout':<14}{'Blocks':>8}{'Build':>12}{'Search':>12}{'Update':>14}")
+    for label, n_blocks, build_ms, search_ms, update_ms in rows:
+        print(f"{label:<14}{n_blocks:>8}{build_ms:>10.2f}ms{search_ms:>10.2f}ms{update_ms * 1000:>11.1f}us")
+    print("Incremental index matches a full rebuild on every layout.")
+
+
+# --- Seat change stream ---
+
+def bench_seatstream(args: argparse.Namespace):
+    """Seat click to 'Pay is ready' detection: WebDriverWait polling vs. the MutationObserver stream, with seat churn."""
+    pay_delay_ms, churn = 150, 20
+    scenario = bms_standin.StandinScenario(seat_churn_per_second=churn, ui_delays_ms={"pay_button": pay_delay_ms})
+    server, base_url = bms_standin.start_standin(0, scenario)
+    driver, profile_dir = bench_driver()
+    try:
+        rows = []
+        for label, use_stream in (("WebDriverWait polling", False), ("MutationObserver stream", True)):
+            timings = []
+            for n in range(args.rounds):
+                driver.get(base_url.replace("/movies/", f"/seatlayout/bench-{n}?qty=2"))
+                if use_stream: open_bms.watch_seat_changes(driver)
+                grid = open_bms.SeatGrid(open_bms.snapshot_seat_map(driver))
+                block = grid.best_blocks(2)[0]
+                start = time.perf_counter()
+                open_bms.click_seat(driver, block.seat_ids[0])
+                if use_stream:
+                    outcome = open_bms.wait_for_pay_button(driver, grid, block)
+                else:
+                    outcome = "ready"
+                    open_bms.TracedWait(driver, open_bms.PAY_BUTTON_CHECK_TIMEOUT).until(EC.element_to_be_clickable(open_bms.PAY_BUTTON_LOCATOR))
+                if outcome == "ready": timings.append((time.perf_counter() - start) * 1000)
+            rows.append((label, len(timings), statistics.median(timings) if timings else float("nan")))
+        print(f"\n--- Seat click to Pay detected (button appears after {pay_delay_ms}ms; {churn} seats/s taken by others; {args.rounds} rounds) ---")
+        print(f"{'Strategy':<28}{'Ready':>8}{'Median':>12}")
+        for label, ready, median_ms in rows:
+            print(f"{label:<28}{ready:>8}{median_ms:>10.1f}ms")
+    finally:
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        server.shutdown()
+
+
+# --- Show times ---
+
+def legacy_showtime_probe(driver: uc.Chrome, theatre_name: str) -> list:
+    """The old select_theatre_and_time lookup: XPath for one name, ancestor block, then .text per showtime."""
+    name_element = driver.find_element(By.XPATH, f"//div[contains(@class, 'hvoTNx') and normalize-space(text())='{theatre_name}']")
+    block = name_element.find_element(By.XPATH, "./ancestor::div[contains(@class, 'sc-e8nk8f-3')][1]")
+    return [open_bms.parse_time_string(element.text.strip(), showtime_label=True) for element in block.find_elements(By.XPATH, ".//div[contains(@class, 'sc-1vhizuf-2')]")]
+
+
+def snapshot_showtime_probe(driver: uc.Chrome, theatre_name: str) -> list:
+    """The single-pass path: one script call for every theatre, ranked in Python."""
+    wanted = [(theatre_name, open_bms.dt_time(0, 0), open_bms.dt_time(23, 59))]
+    return open_bms.rank_showtimes(open_bms.snapshot_showtimes(driver), wanted)
+
+
+def bench_showtimes(args: argparse.Namespace):
+    """Round trips and wall time to read one theatre's showtimes from a 40-theatre list (target listed last)."""
+    times = ["09:30 AM", "12:15 PM", "03:00 PM", "06:20 PM", "09:05 PM", "11:40 PM"]
+    theatres = {f"Cinema {n:02d}: Mall Road, Sector {n}": times for n in range(40)}
+    scenario = bms_standin.StandinScenario(theatres=theatres)
+    server, base_url = bms_standin.start_standin(0, scenario)
+    page_url = base_url.replace("/movies/", f"/buytickets/ET00416952/mumbai/{scenario.dates()[0]}")
+    target = list(theatres)[-1]
+    driver, profile_dir = bench_driver()
+    try:
+        counts = open_bms.instrument_webdriver_commands(driver)
+        rows = []
+        for label, probe in (("XPath + .text per showtime", legacy_showtime_probe), ("theatre list snapshot", snapshot_showtime_probe)):
+            timings, trips = [], 0
+            for _ in range(args.rounds):
+                driver.get(page_url)
+                open_bms.TracedWait(driver, 10).until(lambda d: d.find_elements(*open_bms.THEATRE_NAME_LOCATOR))
+                counts.clear()
+                start = time.perf_counter()
+                found = probe(driver, target)
+                timings.append((time.perf_counter() - start) * 1000)
+                trips = sum(counts.values())
+                assert len(found) == len(times), f"{label}: expected {len(times)} showtimes, got {len(found)}"
+            rows.append((label, trips, statistics.median(timings)))
+        print_table(f"Show times: {len(theatres)} theatres x {len(times)} shows, {args.rounds} rounds", rows)
+    finally:
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        server.shutdown()
+
+
+# --- Locators after a frontend deploy ---
+
+REDEPLOYED_CLASSES = {"hvoTNx": "kQ3zRw", "sc-e8nk8f-3": "sc-q81mv-3", "sc-1vhizuf-2": "sc-7xkd2a-2"} # Rehashed styled-component classes
+
+
+def hardcoded_theatre_probe(driver: uc.Chrome) -> bool:
+    """The old path: one wait on the theatre name's hashed class, which no longer exists."""
+    try:
+        open_bms.wait_for(driver, open_bms.THEATRE_NAME_LOCATOR, "present", open_bms.THEATRE_TIMEOUT)
+    except TimeoutException:
+        return False
+    return bool(open_bms.snapshot_showtimes(driver))
+
+
+def registry_theatre_probe(driver: uc.Chrome) -> bool:
+    """The registry path: wait for the list, read it, click a showtime and wait for the quantity pop-up."""
+    open_bms.wait_for_element(driver, "theatre_list", "present", open_bms.THEATRE_TIMEOUT)
+    showtimes = open_bms.snapshot_showtimes(driver)
+    if not showtimes or not open_bms.click_showtime(driver, showtimes[-1]): return False
+    open_bms.wait_for_element(driver, "seat_quantity", "clickable", open_bms.DEFAULT_TIMEOUT, qty=2)
+    return True
+
+
+def bench_locators(args: argparse.Namespace):
+    """Theatre list to quantity pop-up after the site's hashed classes changed: hard-coded locator vs. registry, cold and warm cache."""
+    scenario = bms_standin.StandinScenario(class_renames=REDEPLOYED_CLASSES)
+    server, base_url = bms_standin.start_standin(0, scenario)
+    page_url = base_url.replace("/movies/", f"/buytickets/ET00416952/mumbai/{scenario.dates()[0]}")
+    cache_dir = tempfile.mkdtemp(prefix="bms_locators_")
+    cache_path = os.path.join(cache_dir, "locators.json")
+    driver, profile_dir = bench_driver()
+    original_registry = open_bms.LOCATORS
+    try:
+        counts = open_bms.instrument_webdriver_commands(driver)
+        rows, outcomes, fallbacks = [], [], {}
+        modes = (("hard-coded hvoTNx", hardcoded_theatre_probe, 1, False),
+                 ("registry, cold cache", registry_theatre_probe, args.rounds, True),
+                 ("registry, warm cache", registry_theatre_probe, args.rounds, False))
+        for label, probe, rounds, reset_cache in modes:
+            timings, trips, found = [], 0, True
+            for _ in range(rounds):
+                if reset_cache and os.path.exists(cache_path): os.remove(cache_path)
+                open_bms.LOCATORS = open_bms.LocatorRegistry(open_bms.LOCATOR_STRATEGIES, cache_path) # As a fresh run would load it
+                driver.get(page_url)
+                counts.clear()
+                with open_bms.collect_wait_stats() as stats:
+                    start = time.perf_counter()
+                    found = probe(driver) and found
+                    timings.append((time.perf_counter() - start) * 1000)
+                trips = sum(counts.values())
+                open_bms.LOCATORS.save()
+                fallbacks = stats.fallbacks or fallbacks
+            rows.append((f"{label}{'' if found else ' (timeout)'}", trips, statistics.median(timings)))
+            outcomes.append(found)
+        print_table(f"Theatre list -> quantity pop-up with renamed classes ({', '.join(REDEPLOYED_CLASSES)}), {args.rounds} rounds", rows)
+        print("Fallbacks used: " + ", ".join(f"{name} (strategy {index})" for name, index in fallbacks.items()))
+        with open(cache_path, encoding="utf-8") as f: print(f"Cached winners: {json.load(f)['preferred']}")
+        assert outcomes == [False, True, True], f"Expected only the hard-coded locator to time out, got {outcomes}"
+    finally:
+        open_bms.LOCATORS = original_registry
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        server.shutdown()
+
+
+# --- Theatre name matching ---
+
+def bench_theatres(args: argparse.Namespace):
+    """TheatreIndex build and lookup time on a corpus of a few thousand names, with match accuracy."""
+    rnd = random.Random(4)
+    for size in (500, 3000):
+        names = bms_synthetic.theatre_corpus(size)
+        start = time.perf_counter()
+        index = open_bms.TheatreIndex(names)
+        build_ms = (time.perf_counter() - start) * 1000
+        queries = [(name, bms_synthetic.mistype(name, rnd.randrange(bms_synthetic.MISTYPE_VARIANTS), rnd)) for name in rnd.sample(names, 400)]
+        # Drop variants that happen to be another listed name (e.g. a suffix-less sibling)
+        queries = [(name, query) for name, query in queries if index.lookup(query, 1)[0].score < 1.0 or index.resolve(query).name == name]
+        timings, correct, rejected, wrong = [], 0, 0, []
+        for _ in range(args.rounds):
+            for name, query in queries:
+                start = time.perf_counter()
+                match = index.resolve(query)
+                timings.append((time.perf_counter() - start) * 1000)
+        for name, query in queries:
+            match = index.resolve(query)
+            if match is None: rejected += 1
+            elif match.name == name: correct += 1
+            else: wrong.append((query, match.name))
+        timings.sort()
+        p95, p99 = timings[int(len(timings) * 0.95)], timings[int(len(timings) * 0.99)]
+        print(f"\n--- TheatreIndex: {size} names, {len(queries)} mistyped queries x {args.rounds} rounds ---")
+        print(f"Build {build_ms:.1f}ms; lookup median {statistics.median(timings) * 1000:.0f}us, p95 {p95 * 1000:.0f}us, p99 {p99 * 1000:.0f}us")
+        print(f"Resolved correctly {correct}, rejected as ambiguous/unknown {rejected}, wrong {len(wrong)}")
+        for query, got in wrong[:5]: print(f"  '{query}' -> '{got}'")
+        assert not wrong, f"{len(wrong)} queries resolved to the wrong theatre"
+        assert p95 < 1.0, f"lookup p95 {p95:.2f}ms is not sub-millisecond"
+        assert all(index.resolve(name).name == name for name in names[:200]), "exact names must always resolve to themselves"
+
+
+# --- Time parsing ---
+
+def legacy_parse_time_string(time_str: str):
+    """The strptime retry loop parse_time_string used before (error print removed)."""
+    time_str = time_str.strip().upper()
+    for fmt in ["%I:%M %p", "%H:%M", "%I:%M%p"]:
+        try:
+            if ('%I' in fmt) and (':' in time_str):
+                 parts = time_str.split(':')
+                 if len(parts[0]) == 1 and ('AM' in time_str or 'PM' in time_str):
+                      try: return datetime.strptime(f"0{time_str}", fmt).time()
+                      except ValueError: pass
+            return datetime.strptime(time_str, fmt).time()
+        except ValueError: continue
+    return None
+
+
+def time_inputs(count: int, seed: int = 5) -> list[str]:
+    """Showtime-like strings: the site's 'HH:MM AM' mostly, plus 24h, unpadded, no-space, lower-case and junk."""
+    rnd = random.Random(seed)
+    shows = [f"{h:02d}:{m:02d} {'AM' if h < 12 else 'PM'}" for h in range(8, 24) for m in (0, 15, 30, 45)]
+    shows = [f"{int(t[:2]) % 12 or 12:02d}{t[2:]}" for t in shows]
+    inputs = []
+    for _ in range(count):
+        t = rnd.choice(shows)
+        variant = rnd.random()
+        if variant < 0.1: t = t.lstrip("0")
+        elif variant < 0.15: t = t.replace(" ", "")
+        elif variant < 0.2: t = t.lower()
+        elif variant < 0.25: t = f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}"
+        elif variant < 0.28: t = rnd.choice(["", "Sold out", "25:00", "7 PM", "13:30 PM"])
+        inputs.append(t)
+    return inputs
+
+
+def bench_timeparse(args: argparse.Namespace):
+    """Old strptime loop vs. the compiled parse_time, with and without its LRU cache, over 100k showtime strings; results must agree."""
+    inputs = time_inputs(100_000)
+    for text in set(inputs):
+        old = legacy_parse_time_string(text)
+        assert old is None or old == open_bms.parse_time_string(text), f"'{text}': legacy {old}, new {open_bms.parse_time_string(text)}"
+    rows = []
+    uncached = open_bms.parse_time.__wrapped__ # The same parser without the lru_cache wrapper
+    for label, parse in (("strptime retry loop", legacy_parse_time_string),
+                         ("regex, no cache", lambda text: uncached(text).time),
+                         ("regex + LRU cache", open_bms.parse_time_string)):
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for text in inputs: parse(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        rows.append((label, statistics.median(timings)))
+    print(f"\n--- Parsing {len(inputs):,} showtime strings ({len(set(inputs))} distinct, {args.rounds} rounds) ---")
+    print(f"{'Parser':<24}{'Median':>12}{'Per call':>12}")
+    for label, median_ms in rows:
+        print(f"{label:<24}{median_ms:>10.1f}ms{median_ms * 1000 / len(inputs):>10.2f}us")
+    print("Every string the old parser accepted parses to the same time.")
+
+
+# --- HTTP pre-check ---
+
+PAGE_BYTES_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+var total = nav ? nav.transferSize : 0;
+performance.getEntriesByType('resource').forEach(function (r) { total += r.transferSize || 0; });
+return total;
+"""
+
+
+def bench_precheck(args: argparse.Namespace):
+    """Per-poll wall time, CPU and bytes: HTTP pre-check vs. browser refresh + button check, on the stand-in."""
+    # The canned pages must classify correctly before any timing means anything
+    expected = {"movie_page_open.html": True, "movie_page_upcoming.html": False, "blocked_403.html": None}
+    for name, want in expected.items():
+        got = open_bms.booking_open_from_html(bms_standin.load_fixture(name))
+        assert got is want, f"{name}: expected {want}, got {got}"
+    print("Fixture classification: open=True, upcoming=False, blocked=None (as expected).")
+
+    server, base_url = bms_standin.start_standin(0, bms_standin.StandinScenario(open_after=10 ** 9)) # Never opens
+    movie_url = f"{base_url}mumbai/ET00416952"
+    driver, profile_dir = bench_driver()
+    try:
+        driver.get(movie_url)
+        session = open_bms.create_precheck_session(driver)
+        polls = max(args.rounds, 10)
+
+        http_bytes = len(session.get(movie_url).content) # One pre-check downloads just the HTML
+        start, cpu_start = time.perf_counter(), time.process_time()
+        for _ in range(polls):
+            assert open_bms.precheck_booking_open(session, movie_url) is False
+        http_wall = (time.perf_counter() - start) / polls * 1000
+        http_cpu = (time.process_time() - cpu_start) / polls * 1000
+
+        start, cpu_start, browser_bytes = time.perf_counter(), process_tree_cpu_seconds(driver.browser_pid), 0
+        for _ in range(polls):
+            driver.refresh()
+            driver.find_elements(*open_bms.BOOK_BUTTON_LOCATOR)
+            browser_bytes += driver.execute_script(PAGE_BYTES_JS) or 0
+        browser_wall = (time.perf_counter() - start) / polls * 1000
+        browser_cpu = (process_tree_cpu_seconds(driver.browser_pid) - cpu_start) / polls * 1000
+
+        print(f"\n--- Availability check per poll ({polls} polls, stand-in server) ---")
+        print(f"{'Path':<26}{'Wall':>12}{'CPU':>12}{'Bytes':>12}")
+        print(f"{'HTTP pre-check':<26}{http_wall:>10.1f}ms{http_cpu:>10.1f}ms{http_bytes:>12}")
+        print(f"{'Browser refresh + XPath':<26}{browser_wall:>10.1f}ms{browser_cpu:>10.1f}ms{browser_bytes // polls:>12}")
+        print("(Local fixtures have no images/scripts; the live page's browser cost is far higher.)")
+    finally:
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        server.shutdown()
+
+
+# --- Driver start-up ---
+
+def bench_startup(args: argparse.Namespace):
+    """Time to first navigation from 'config ready': cold setup_driver vs. a WarmDriverPool launched earlier."""
+    server, base_url = bms_standin.start_standin(0)
+    movie_url = f"{base_url}mumbai/ET00416952"
+    cold, warm = [], []
+    try:
+        for _ in range(args.rounds):
+            profile_dir = tempfile.mkdtemp(prefix="bms_bench_")
+            start = time.perf_counter()
+            driver = open_bms.setup_driver(profile_dir, bench_binary_path(), BENCH_BROWSER_ARGUMENTS)
+            driver.get(movie_url)
+            cold.append(time.perf_counter() - start)
+            open_bms.close_driver(driver)
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+            profile_dir = tempfile.mkdtemp(prefix="bms_bench_")
+            pool = open_bms.WarmDriverPool(profile_dir, bench_binary_path(), preload_url=base_url, extra_arguments=BENCH_BROWSER_ARGUMENTS)
+            pool.prewarm()
+            time.sleep(15) # Stands in for the time spent answering the input prompts
+            start = time.perf_counter()
+            driver = pool.acquire()
+            driver.get(movie_url)
+            warm.append(time.perf_counter() - start)
+            open_bms.close_driver(driver)
+            pool.shutdown()
+            shutil.rmtree(profile_dir, ignore_errors=True)
+    finally:
+        server.shutdown()
+    print(f"\n--- Time to first navigation after config is ready ({args.rounds} rounds) ---")
+    print(f"{'Start':<10}{'Median':>10}{'Min':>10}{'Max':>10}")
+    for label, values in (("cold", cold), ("warm", warm)):
+        print(f"{label:<10}{statistics.median(values):>9.2f}s{min(values):>9.2f}s{max(values):>9.2f}s")
+
+
+# --- Lean browser mode ---
+
+def bench_lean(args: argparse.Namespace):
+    """Page load (first visit and refresh), bytes and browser RSS: full profile vs. lean mode, on a media-heavy stand-in."""
+    scenario = bms_standin.StandinScenario(open_after=10 ** 9, media_assets=24, asset_kb=200)
+    server, base_url = bms_standin.start_standin(0, scenario)
+    movie_url = f"{base_url}mumbai/ET00416952"
+    rows = []
+    try:
+        for label, lean in (("full", False), ("lean", True)):
+            profile_dir = tempfile.mkdtemp(prefix="bms_bench_")
+            driver = open_bms.setup_driver(profile_dir, bench_binary_path(), BENCH_BROWSER_ARGUMENTS, lean=lean)
+            if driver is None: raise RuntimeError("Could not start a browser for the benchmark.")
+            try:
+                start = time.perf_counter()
+                driver.get(movie_url)
+                first_ms = (time.perf_counter() - start) * 1000
+                first_bytes = driver.execute_script(PAGE_BYTES_JS) or 0
+                refreshes = []
+                for _ in range(max(args.rounds, 5)):
+                    start = time.perf_counter()
+                    driver.refresh()
+                    refreshes.append((time.perf_counter() - start) * 1000)
+                assert driver.find_elements(*open_bms.BOOK_BUTTON_LOCATOR) == [] # Page still classifies (never opens)
+                rows.append((label, first_ms, statistics.median(refreshes), first_bytes, open_bms.process_tree_rss_mb(driver.browser_pid)))
+            finally:
+                open_bms.close_driver(driver)
+                shutil.rmtree(profile_dir, ignore_errors=True)
+    finally:
+        server.shutdown()
+    print(f"\n--- Movie page load, {scenario.media_assets} posters + font + trailer at {scenario.asset_kb}KB each ---")
+    print(f"{'Profile':<10}{'First get':>12}{'Refresh':>12}{'Bytes':>12}{'RSS':>12}")
+    for label, first_ms, refresh_ms, page_bytes, rss_mb in rows:
+        print(f"{label:<10}{first_ms:>10.1f}ms{refresh_ms:>10.1f}ms{page_bytes:>12}{rss_mb:>10.0f}MB")
+    print("(Third-party tracker blocking isn't exercised offline; the stand-in serves everything from one host.)")
+
+
+# --- Browser memory over a long watch ---
+
+def bench_memory(args: argparse.Namespace):
+    """Browser RSS over many refreshes of a media-heavy movie page: one long-lived browser vs. BrowserSupervisor restarts."""
+    server, base_url = bms_standin.start_standin(0, bms_standin.StandinScenario(open_after=10 ** 9, media_assets=24, asset_kb=200))
+    movie_url = f"{base_url}mumbai/ET00416952"
+    refreshes = max(args.rounds * 20, 100)
+    original_page_loads = open_bms.BROWSER_RECYCLE_PAGE_LOADS
+    open_bms.BROWSER_RECYCLE_PAGE_LOADS = refreshes // 3 # A few restarts within the run
+    rows = []
+    try:
+        for label, recycle in (("long-lived", False), ("recycled", True)):
+            driver, profile_dir = bench_driver()
+            supervisor = open_bms.BrowserSupervisor(driver)
+            try:
+                driver.get(movie_url)
+                samples, restarts = [], []
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for i in range(1, refreshes + 1):
+                        supervisor.driver.refresh()
+                        supervisor.page_loaded()
+                        if recycle:
+                            recycles = supervisor.recycles
+                            assert supervisor.maintain(movie_url, idle_seconds=float("inf"))
+                            if supervisor.recycles > recycles: restarts.append(supervisor.relaunch_seconds)
+                        else:
+                            supervisor.sample()
+                        if i % (refreshes // 5) == 0: samples.append(supervisor.rss_mb or 0.0)
+                # Cookies live in the profile, so the restarted browser still sees the same page
+                assert supervisor.driver.find_elements(*open_bms.BOOK_BUTTON_LOCATOR) == []
+                rows.append((label, samples, supervisor.peak_rss_mb, restarts))
+            finally:
+                open_bms.close_driver(supervisor.driver)
+                shutil.rmtree(profile_dir, ignore_errors=True)
+    finally:
+        open_bms.BROWSER_RECYCLE_PAGE_LOADS = original_page_loads
+        server.shutdown()
+    step = refreshes // 5
+    print(f"\n--- Browser RSS (MB) over {refreshes} refreshes, restart every {refreshes // 3} page loads ---")
+    print(f"{'Browser':<12}" + "".join(f"{f'@{step * (i + 1)}':>8}" for i in range(5)) + f"{'Peak':>8}{'Restarts':>10}")
+    for label, samples, peak, restarts in rows:
+        restart_note = f"{len(restarts)} ({statistics.median(restarts):.1f}s)" if restarts else "0"
+        print(f"{label:<12}" + "".join(f"{value:>8.0f}" for value in samples) + f"{peak:>8.0f}{restart_note:>10}")
+    print("(A restart runs only in poll gaps longer than its last measured duration, so checks stay on schedule.)")
+
+
+# --- Display modes ---
+
+FINGERPRINT_JS = "return [navigator.userAgent, navigator.webdriver === true, screen.width + 'x' + screen.height, navigator.plugins.length];"
+
+
+def bench_display(args: argparse.Namespace):
+    """
+    Per browser instance in each display mode: launch time, page load (first visit and refresh), browser CPU
+    (loading, and idle on the page) and RSS, plus what the page sees (user agent, navigator.webdriver, screen).
+    'headed' needs a desktop session and 'xvfb' needs Xvfb; modes that can't run here are skipped.
+    """
+    server, base_url = bms_standin.start_standin(0, bms_standin.StandinScenario(open_after=10 ** 9, media_assets=24, asset_kb=200))
+    movie_url = f"{base_url}mumbai/ET00416952"
+    modes = [mode for mode in open_bms.DISPLAY_MODES if (mode != "headed" or os.environ.get("DISPLAY")) and (mode != "xvfb" or shutil.which("Xvfb"))]
+    skipped = [mode for mode in open_bms.DISPLAY_MODES if mode not in modes]
+    rows, fingerprints = [], {}
+    try:
+        for mode in modes:
+            samples = []
+            for _ in range(args.rounds):
+                profile_dir = tempfile.mkdtemp(prefix="bms_bench_")
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    driver = open_bms.setup_driver(profile_dir, bench_binary_path(), display_mode=mode)
+                if driver is None: raise RuntimeError(f"Could not start a browser in '{mode}' mode.")
+                launch_s = time.perf_counter() - start
+                display = driver.bms_display
+                pids = [driver.browser_pid] + ([display.process.pid] if display else []) # The virtual display is part of the instance's cost
+                try:
+                    cpu_start = sum(process_tree_cpu_seconds(pid) for pid in pids)
+                    start = time.perf_counter()
+                    driver.get(movie_url)
+                    first_ms = (time.perf_counter() - start) * 1000
+                    refreshes = []
+                    for _ in range(5):
+                        start = time.perf_counter()
+                        driver.refresh()
+                        refreshes.append((time.perf_counter() - start) * 1000)
+                    load_cpu_s = sum(process_tree_cpu_seconds(pid) for pid in pids) - cpu_start
+                    cpu_start = sum(process_tree_cpu_seconds(pid) for pid in pids)
+                    time.sleep(10) # Idle on the page, as a watcher does between checks
+                    idle_cpu_pct = (sum(process_tree_cpu_seconds(pid) for pid in pids) - cpu_start) / 10 * 100
+                    rss_mb = sum(open_bms.process_tree_rss_mb(pid) or 0 for pid in pids)
+                    fingerprints[mode] = driver.execute_script(FINGERPRINT_JS)
+                    samples.append((launch_s, first_ms, statistics.median(refreshes), load_cpu_s, idle_cpu_pct, rss_mb))
+                finally:
+                    with contextlib.redirect_stdout(io.StringIO()): open_bms.close_driver(driver)
+                    shutil.rmtree(profile_dir, ignore_errors=True)
+            rows.append((mode, *(statistics.median(column) for column in zip(*samples))))
+    finally:
+        server.shutdown()
+    print(f"\n--- Per instance by display mode, media-heavy movie page, {args.rounds} instances each (medians) ---")
+    print(f"{'Mode':<10}{'Launch':>9}{'First get':>12}{'Refresh':>11}{'Load CPU':>10}{'Idle CPU':>10}{'RSS':>9}")
+    for mode, launch_s, first_ms, refresh_ms, load_cpu_s, idle_cpu_pct, rss_mb in rows:
+        print(f"{mode:<10}{launch_s:>8.2f}s{first_ms:>10.1f}ms{refresh_ms:>9.1f}ms{load_cpu_s:>9.2f}s{idle_cpu_pct:>9.1f}%{rss_mb:>7.0f}MB")
+    print("\nWhat the page sees:")
+    for mode, (user_agent, webdriver, screen, plugins) in fingerprints.items():
+        print(f"  {mode:<10}webdriver={webdriver}, screen {screen}, {plugins} plugins, UA: {user_agent}")
+    if skipped: print(f"Skipped (not available here): {', '.join(skipped)}")
+    for mode, (user_agent, webdriver, _, _) in fingerprints.items():
+        assert "Headless" not in user_agent and not webdriver, f"'{mode}' mode gives the browser away: {user_agent}, webdriver={webdriver}"
+
+
+# --- Batch orchestration ---
+
+@contextlib.contextmanager
+def standin_batch_settings(base_url: str, work_dir: str):
+    """Points batch mode at the stand-in, with headless browsers and all profiles/checkpoints/traces under work_dir."""
+    names = ("BASE_URL", "PROFILE_FOLDER_NAME", "CHROMIUM_BINARY_PATH", "CHECKPOINT_FILE", "MEMORY_METRICS_FILE",
+             "TRACING_ENABLED", "BATCH_POST_PAYMENT_HOLD_SECONDS", "REFRESH_INTERVAL_SECONDS", "setup_driver")
+    saved = {name: getattr(open_bms, name) for name in names}
+    setup_driver = saved["setup_driver"]
+    open_bms.BASE_URL = base_url
+    open_bms.PROFILE_FOLDER_NAME = os.path.join(work_dir, "profile")
+    open_bms.CHROMIUM_BINARY_PATH = bench_binary_path()
+    open_bms.CHECKPOINT_FILE = os.path.join(work_dir, "checkpoint.json")
+    open_bms.MEMORY_METRICS_FILE, open_bms.TRACING_ENABLED = None, False
+    open_bms.BATCH_POST_PAYMENT_HOLD_SECONDS, open_bms.REFRESH_INTERVAL_SECONDS = 0, 3
+    open_bms.setup_driver = lambda profile, binary_path=None, extra_arguments=None, lean=None, session=None, display_mode=None: setup_driver(
+        profile, binary_path, BENCH_BROWSER_ARGUMENTS + (extra_arguments or []), lean, session, display_mode)
+    try: yield
+    finally:
+        for name, value in saved.items(): setattr(open_bms, name, value)
+
+
+def sample_process_tree(stop: threading.Event, samples: list, interval: float = 0.5):
+    """Appends (seconds, threads in this process, RSS MB of this process and its browsers) until stop is set."""
+    start = time.perf_counter()
+    while not stop.is_set():
+        samples.append((time.perf_counter() - start, threading.active_count(), open_bms.process_tree_rss_mb(os.getpid()) or 0.0))
+        stop.wait(interval)
+
+
+def bench_orchestrator(args: argparse.Namespace):
+    """N jobs waiting for booking to open, then booking: blocking lanes (a browser per job) vs. the asyncio orchestrator."""
+    jobs_count = max(args.rounds, 4)
+    open_after = 45 # Long enough for every lane's browser to be up and polling before booking opens
+    rows = []
+    for label, async_watch in (("lanes", False), ("asyncio", True)):
+        scenario = bms_standin.StandinScenario(open_after=open_after)
+        server, base_url = bms_standin.start_standin(0, scenario)
+        job = standin_job(scenario)
+        raw_jobs = [{"name": f"watch{i}", "location": job.location_slug, "movie_code": f"ET0041{i:04d}", "date": job.date_input_str,
+                     "theatre": job.theatre_name, "earliest": job.start_time_str, "latest": job.end_time_str, "seats": job.num_seats,
+                     "phone": job.phone_number, "upi_username": job.upi_username, "upi_handle": job.upi_handle} for i in range(jobs_count)]
+        work_dir = tempfile.mkdtemp(prefix="bms_bench_")
+        jobs_path, results_path = os.path.join(work_dir, "jobs.json"), os.path.join(work_dir, "results.jsonl")
+        with open(jobs_path, "w", encoding="utf-8") as f: json.dump({"jobs": raw_jobs}, f)
+        stop, samples = threading.Event(), []
+        sampler = threading.Thread(target=sample_process_tree, args=(stop, samples), daemon=True)
+        try:
+            with standin_batch_settings(base_url, work_dir), contextlib.redirect_stdout(io.StringIO()):
+                sampler.start()
+                start = time.perf_counter()
+                if async_watch: open_bms.run_job_file_async(jobs_path, browsers=2, results_path=results_path)
+                else: open_bms.run_job_file(jobs_path, concurrency=jobs_count, results_path=results_path)
+                total = time.perf_counter() - start
+        finally:
+            stop.set()
+            sampler.join()
+            server.shutdown()
+        with open(results_path, encoding="utf-8") as f: results = [json.loads(line) for line in f]
+        shutil.rmtree(work_dir, ignore_errors=True)
+        watching = [sample for sample in samples if 15 <= sample[0] < open_after - 2] or samples # Steady waiting, browsers up
+        rows.append((label, max(sample[1] for sample in watching), statistics.median(sample[2] for sample in watching),
+                     max(sample[2] for sample in samples), sum(result["status"] == "success" for result in results), total))
+    print(f"\n--- {jobs_count} jobs waiting {open_after}s for booking to open, then booking (stand-in) ---")
+    print(f"{'Orchestrator':<14}{'Threads':>9}{'RSS waiting':>13}{'Peak RSS':>10}{'Booked':>8}{'Total':>9}")
+    for label, threads, waiting_rss, peak_rss, booked, total in rows:
+        print(f"{label:<14}{threads:>9}{waiting_rss:>11.0f}MB{peak_rss:>8.0f}MB{f'{booked}/{jobs_count}':>8}{total:>8.1f}s")
+    print("(Lanes are capped by max_browser_workers; the asyncio run uses 2 browsers, opened only once booking opens.)")
+
+
+# --- Session snapshots ---
+
+def dir_size_mb(path: str | None) -> float:
+    """Size of every file under path, in MB (0 if it doesn't exist)."""
+    total = 0
+    for root, _, files in os.walk(path or ""):
+        for name in files:
+            with contextlib.suppress(OSError): total += os.path.getsize(os.path.join(root, name))
+    return total / (1024 * 1024)
+
+
+def open_past_challenge(driver: uc.Chrome, url: str, timeout: float = 30) -> float:
+    """Opens url and waits until it is no longer a challenge page. Returns the seconds until the real page showed."""
+    start = time.perf_counter()
+    driver.get(url)
+    open_bms.TracedWait(driver, timeout, poll_frequency=0.1).until(lambda d: open_bms.detect_block_page(d) is None)
+    return time.perf_counter() - start
+
+
+def bench_session(args: argparse.Namespace):
+    """Browser start to first movie page behind a challenge: persistent profile vs. throwaway profile with and without the session snapshot."""
+    scenario = bms_standin.StandinScenario(challenge_seconds=3)
+    server, base_url = bms_standin.start_standin(0, scenario)
+    movie_url = f"{base_url}mumbai/ET00416952"
+    work_dir = tempfile.mkdtemp(prefix="bms_bench_")
+    parallel = 3
+    rows = []
+    saved = {name: getattr(open_bms, name) for name in ("SESSION_SNAPSHOT_ENABLED", "SESSION_SNAPSHOT_FILE", "_session_snapshot", "_session_export_failed")}
+    try:
+        with standin_batch_settings(base_url, work_dir), contextlib.redirect_stdout(io.StringIO()):
+            open_bms.SESSION_SNAPSHOT_ENABLED = True
+            open_bms.SESSION_SNAPSHOT_FILE = os.path.join(work_dir, "session.json")
+            profile = open_bms.PROFILE_FOLDER_NAME
+
+            def run(label: str, session: bool, snapshot: bool, browsers: int = 1):
+                timings, sizes, challenges = [], [], scenario.challenges
+                for _ in range(args.rounds):
+                    open_bms._session_snapshot, open_bms._session_export_failed = None, not snapshot # Without: no export, no restore
+                    start = time.perf_counter()
+
+                    def start_and_open(_):
+                        driver = open_bms.setup_driver(profile, open_bms.CHROMIUM_BINARY_PATH, session=session)
+                        try:
+                            open_past_challenge(driver, movie_url)
+                            return dir_size_mb(getattr(driver, "user_data_dir", None) if session else profile)
+                        finally:
+                            open_bms.close_driver(driver)
+
+                    with ThreadPoolExecutor(max_workers=browsers) as pool: sizes += list(pool.map(start_and_open, range(browsers)))
+                    timings.append(time.perf_counter() - start)
+                rows.append((label, statistics.median(timings), max(timings), (scenario.challenges - challenges) / args.rounds, max(sizes)))
+
+            # Once with the persistent profile: clears the challenge, so the profile (and the snapshot taken from it) holds a clearance
+            driver = open_bms.setup_driver(profile, open_bms.CHROMIUM_BINARY_PATH, session=False)
+            open_past_challenge(driver, movie_url)
+            open_bms.close_driver(driver)
+            run("persistent profile", session=False, snapshot=False)
+            run("throwaway, no session", session=True, snapshot=False)
+            run("throwaway + snapshot", session=True, snapshot=True) # First round exports the snapshot from the profile
+            run(f"{parallel} x throwaway + snapshot", session=True, snapshot=True, browsers=parallel)
+    finally:
+        for name, value in saved.items(): setattr(open_bms, name, value)
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print(f"\n--- Browser start to movie page, {scenario.challenge_seconds}s challenge without clearance ({args.rounds} rounds) ---")
+    print(f"{'Start':<30}{'Median':>9}{'Max':>9}{'Challenges':>12}{'Profile':>10}")
+    for label, median_s, max_s, challenges, size_mb in rows:
+        print(f"{label:<30}{median_s:>8.2f}s{max_s:>8.2f}s{challenges:>12.1f}{size_mb:>8.1f}MB")
+    print("(The first snapshot round includes the one-off export from the persistent profile; see Max.)")
+    assert rows[2][3] == 0 and rows[3][3] == 0, "A restored session should never be challenged"
+
+
+# --- Release monitor ---
+
+def bench_monitor(args: argparse.Namespace):
+    """A 200-entry watchlist over a simulated 5-hour day against the stand-in: rate budget, dedupe, block pause, detection latency."""
+    cities, movies = [f"city{i:02d}" for i in range(30)], [f"ET0050{i:04d}" for i in range(6)]
+    opens_at = {movie: 3600 + i * 1800 for i, movie in enumerate(movies)} # Seconds into the day
+    block_window = (2 * 3600, 2 * 3600 + 90)
+    clock = bms_synthetic.SimulatedClock(datetime.now().replace(hour=8, minute=0, second=0, microsecond=0))
+    scenario = bms_standin.StandinScenario(open_after=None, movie_open_after=opens_at, block_between=block_window, clock=clock.monotonic)
+    server, base_url = bms_standin.start_standin(0, scenario)
+    entries = []
+    for m, movie in enumerate(movies):
+        # Half the releases have a known (slightly wrong) opening time, the rest are unknown
+        expected = clock.now() + timedelta(seconds=opens_at[movie] + random.uniform(-120, 120)) if m % 2 == 0 else None
+        entries += [open_bms.WatchEntry(city, movie, expected) for city in cities]
+    entries += random.Random(7).sample(entries, 20) # Second bookings for pages already watched
+    session = requests.Session()
+    handed, original_base_url = {}, open_bms.BASE_URL
+    open_bms.BASE_URL = base_url
+    try:
+        monitor = open_bms.ReleaseMonitor(entries, lambda url: open_bms.precheck_booking_open(session, url), clock)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            opened = monitor.run(lambda url, page_entries: handed.setdefault(url, []).extend(page_entries),
+                                 until=clock.now() + timedelta(hours=5))
+        wall = time.perf_counter() - start
+    finally:
+        open_bms.BASE_URL = original_base_url
+        server.shutdown()
+
+    hits = scenario.movie_page_hits
+    # Every page opened, was seen open only after it opened, and was handed over once with all its entries
+    assert len(opened) == len(monitor.pages) == len(cities) * len(movies), f"{len(opened)}/{len(monitor.pages)} pages opened"
+    latencies = []
+    for url, seen in opened.items():
+        movie = url.rstrip("/").rsplit("/", 1)[1]
+        latency = (seen - clock.start).total_seconds() - opens_at[movie]
+        assert latency >= 0, f"{url} reported open {-latency:.0f}s early"
+        latencies.append(latency)
+    assert sum(len(page_entries) for page_entries in handed.values()) == len(entries)
+    assert len({page for _, page in hits}) == len(monitor.pages) # Duplicate entries never cause extra pages
+    # No 60s window goes over the budget (plus the initial burst)
+    times, busiest, left = [t for t, _ in hits], 0, 0
+    for right, t in enumerate(times):
+        while times[left] <= t - 60: left += 1
+        busiest = max(busiest, right - left + 1)
+    assert busiest <= open_bms.MONITOR_REQUESTS_PER_MINUTE + open_bms.MONITOR_BURST, f"{busiest} checks in one minute"
+    # The first block page paused everything for the block backoff
+    blocked = [t for t in times if block_window[0] <= t < block_window[1]]
+    assert blocked, "no check landed in the block window"
+    after = [t for t in times if t > blocked[0]]
+    assert not after or after[0] - blocked[0] >= open_bms.BLOCK_BACKOFF_BASE_SECONDS * (1 - open_bms.POLL_JITTER_RATIO)
+
+    latencies.sort()
+    print(f"\n--- Release monitor: {len(entries)} entries, {len(monitor.pages)} pages, simulated {clock.offset / 3600:.1f}h in {wall:.1f}s ---")
+    print(f"Checks: {monitor.checks} (budget {open_bms.MONITOR_REQUESTS_PER_MINUTE}/min; busiest minute {busiest}), browsers while watching: 0")
+    print(f"Detection after opening: median {statistics.median(latencies):.0f}s, p95 {latencies[int(len(latencies) * 0.95)]:.0f}s, max {latencies[-1]:.0f}s")
+    print(f"Block window: {len(blocked)} check(s) hit it, then all checks paused {after[0] - blocked[0]:.0f}s." if after else "")
+
+
+# --- Full pipeline ---
+
+def standin_job(scenario: bms_standin.StandinScenario) -> open_bms.BookingJob:
+    """A booking for tomorrow at the scenario's first theatre, any show time."""
+    show_date = datetime.strptime(scenario.dates()[min(1, scenario.days - 1)], "%Y%m%d").strftime("%b %d").upper()
+    return open_bms.BookingJob(
+        name="standin", location_slug="mumbai", movie_code="ET00416952", date_input_str=show_date,
+        theatre_name=next(iter(scenario.theatres)), start_time_str="12:00 AM", end_time_str="11:59 PM",
+        num_seats=2, phone_number="9876543210", upi_username="bench.user", upi_handle="ybl")
+
+
+def bench_pipeline(args: argparse.Namespace):
+    """
+    End-to-end run_booking_job (movie page to 'MAKE PAYMENT') against the stand-in: total and per-stage medians,
+    with the fast element waits and again with waits polling at Selenium's default 0.5s.
+    """
+    scenario = bms_standin.StandinScenario.from_file(args.scenario) if args.scenario else bms_standin.StandinScenario()
+    scenario.open_after = None # Booking is open; release polling has its own benchmark
+    server, base_url = bms_standin.start_standin(0, scenario)
+    job = standin_job(scenario)
+    original_base_url, original_event_driven = open_bms.BASE_URL, open_bms.EVENT_DRIVEN_TRANSITIONS
+    original_polls = open_bms.FAST_WAIT_POLL_INTERVAL, open_bms.STAGE_READY_POLL_INTERVAL
+    open_bms.BASE_URL = base_url
+    driver, profile_dir = bench_driver()
+    # (label, event-driven, element/readiness wait poll interval): the second row polls at Selenium's default rate
+    modes = [("event-driven", True, original_polls), ("event-driven, 0.5s polls", True, (0.5, 0.5))]
+    if args.sleep_path: modes.append(("sleep-based", False, original_polls))
+    end_to_end = {} # label -> median end-to-end seconds
+    try:
+        for label, event_driven, polls in modes:
+            open_bms.EVENT_DRIVEN_TRANSITIONS = event_driven
+            open_bms.FAST_WAIT_POLL_INTERVAL, open_bms.STAGE_READY_POLL_INTERVAL = polls
+            totals, stages, failures, waits = [], {}, [], []
+            for _ in range(args.rounds):
+                stage_timings = []
+                with contextlib.redirect_stdout(io.StringIO()), open_bms.PipelineTracer(job.name).activate():
+                    result, driver = open_bms.run_booking_job(job, driver, stage_timings, profile_dir)
+                if result["status"] != "success":
+                    failures.append(f"{result['stage']}: {result['failure_reason']}")
+                    continue
+                totals.append(result["duration_s"])
+                waits.append(result["wait_overhead"])
+                for stage in result["stages"]:
+                    stages.setdefault(stage["stage"], []).append(stage["action_s"] + stage["ready_s"])
+            print(f"\n--- Full pipeline, {label} ({len(totals)}/{args.rounds} rounds reached 'MAKE PAYMENT') ---")
+            for failure in failures: print(f"  Failed at {failure}")
+            if not totals: continue
+            print(f"{'Stage':<24}{'Median':>10}")
+            for stage, values in stages.items():
+                print(f"{stage:<24}{statistics.median(values):>9.2f}s")
+            end_to_end[label] = statistics.median(totals)
+            print(f"{'end-to-end':<24}{end_to_end[label]:>9.2f}s  (min {min(totals):.2f}s, max {max(totals):.2f}s)")
+            print(f"Element waits per booking: {statistics.median(w['waits'] for w in waits):.0f} "
+                  f"({statistics.median(w['polled'] for w in waits):.0f} polled), {statistics.median(w['wait_s'] for w in waits):.2f}s waiting; "
+                  f"estimated saving vs. 0.5s polls {statistics.median(w['est_saved_s'] for w in waits):.2f}s")
+        if "event-driven" in end_to_end and "sleep-based" in end_to_end:
+            print(f"\nMeasured end-to-end (median): event-driven {end_to_end['event-driven']:.2f}s vs. sleep-based {end_to_end['sleep-based']:.2f}s "
+                  f"({end_to_end['sleep-based'] - end_to_end['event-driven']:.2f}s saved).")
+    finally:
+        open_bms.BASE_URL, open_bms.EVENT_DRIVEN_TRANSITIONS = original_base_url, original_event_driven
+        open_bms.FAST_WAIT_POLL_INTERVAL, open_bms.STAGE_READY_POLL_INTERVAL = original_polls
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        server.shutdown()
+
+
+CHECKOUT_SPANS = ("fast_checkout", "enter_contact_details", "select_phonepe_upi", "enter_upi_details_and_pay")
+
+
+def bench_checkout(args: argparse.Namespace):
+    """Seat hold to 'MAKE PAYMENT' on the stand-in: typed entry (sleep-based and event-driven) vs. fast checkout, and its typing fallback."""
+    scenario = bms_standin.StandinScenario(ui_delays_ms={"upi_options": 300, "upi_fields": 200})
+    server, base_url = bms_standin.start_standin(0, scenario)
+    job = standin_job(scenario)
+    original = open_bms.BASE_URL, open_bms.EVENT_DRIVEN_TRANSITIONS, open_bms.FAST_CHECKOUT_ENABLED
+    open_bms.BASE_URL = base_url
+    driver, profile_dir = bench_driver()
+    # (label, event-driven, fast checkout, payment page only accepts typed values)
+    modes = [("typed, sleep-based", False, False, False), ("typed, event-driven", True, False, False),
+             ("fast checkout", True, True, False), ("fast, typed-only page", True, True, True)]
+    try:
+        rows, outcomes, fallbacks = [], [], {}
+        for label, event_driven, fast, typed_only in modes:
+            open_bms.EVENT_DRIVEN_TRANSITIONS, open_bms.FAST_CHECKOUT_ENABLED = event_driven, fast
+            scenario.typed_input_only = typed_only
+            holds, commands, fell_back = [], [], 0
+            for _ in range(args.rounds):
+                tracer = open_bms.PipelineTracer(job.name)
+                with contextlib.redirect_stdout(io.StringIO()), tracer.activate():
+                    result, driver = open_bms.run_booking_job(job, driver, [], profile_dir)
+                if result["status"] != "success" or "hold_to_submit_s" not in result:
+                    print(f"  {label}: failed at {result['stage']}: {result['failure_reason']}")
+                    continue
+                holds.append(result["hold_to_submit_s"] * 1000)
+                commands.append(sum(span["commands"] for span in tracer.spans if span["name"] in CHECKOUT_SPANS))
+                fell_back += any(span["name"] == "enter_contact_details" for span in tracer.spans) and fast
+            outcomes.append(len(holds) == args.rounds)
+            if holds: rows.append((label, round(statistics.median(commands)), statistics.median(holds)))
+            if fast: fallbacks[label] = fell_back
+        print_table(f"Seat hold -> 'MAKE PAYMENT' on the stand-in (checkout commands, hold time used), {args.rounds} rounds", rows)
+        print("Fell back to typing: " + ", ".join(f"{label} {count}/{args.rounds}" for label, count in fallbacks.items()))
+        assert all(outcomes), f"Every mode should reach 'MAKE PAYMENT' in every round, got {outcomes}"
+    finally:
+        open_bms.BASE_URL, open_bms.EVENT_DRIVEN_TRANSITIONS, open_bms.FAST_CHECKOUT_ENABLED = original
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        server.shutdown()
+
+
+def bench_hold(args: argparse.Namespace):
+    """
+    Seat hold deadline on the stand-in: a hold that is long enough, and one that runs out while the summary's 'Proceed'
+    is still loading. Fixed stage timeouts vs. timeouts sized from the hold countdown (outcome and time to outcome).
+    """
+    # (label, scenario): the short hold expires before 'Proceed' shows, so no timeout setting can finish that booking
+    cases = [("60s hold", bms_standin.StandinScenario(hold_seconds=60)),
+             ("15s hold, slow summary", bms_standin.StandinScenario(hold_seconds=15, ui_delays_ms={"prepay": 30000}))]
+    original = (open_bms.BASE_URL, open_bms.SEAT_HOLD_DEADLINE_ENABLED, open_bms.SEAT_HOLD_SAFETY_SECONDS,
+                open_bms.MAX_STAGE_RECOVERIES, open_bms.CHECKPOINT_FILE)
+    work_dir = tempfile.mkdtemp(prefix="bms_hold_")
+    open_bms.CHECKPOINT_FILE = os.path.join(work_dir, "checkpoint.json")
+    open_bms.SEAT_HOLD_SAFETY_SECONDS = 2 # The stand-in's holds are short and local
+    open_bms.MAX_STAGE_RECOVERIES = 1 # Bounds the fixed-timeout run on the short hold
+    driver, profile_dir = bench_driver()
+    rows = []
+    try:
+        for case, scenario in cases:
+            server, base_url = bms_standin.start_standin(0, scenario)
+            open_bms.BASE_URL = base_url
+            job = standin_job(scenario)
+            try:
+                for deadline in (False, True):
+                    open_bms.SEAT_HOLD_DEADLINE_ENABLED = deadline
+                    with contextlib.redirect_stdout(io.StringIO()), open_bms.PipelineTracer(job.name).activate():
+                        open_bms.save_checkpoint(job.name, None) # Each run starts from the movie page
+                        result, driver = open_bms.run_booking_job(job, driver, [], profile_dir)
+                    outcome = "paid" if result["status"] == "success" else f"failed at {result['stage']}"
+                    rows.append((case, "hold deadline" if deadline else "fixed timeouts", outcome, result["duration_s"], result["reselects"]))
+            finally:
+                server.shutdown()
+        print("\n--- Seat hold: booking outcome and time to it ---")
+        print(f"{'Case':<26}{'Timeouts':<18}{'Outcome':<30}{'Time':>8}{'Reselects':>11}")
+        for case, mode, outcome, seconds, reselects in rows:
+            print(f"{case:<26}{mode:<18}{outcome:<30}{seconds:>7.1f}s{reselects:>11}")
+        short = {mode: seconds for case, mode, _, seconds, _ in rows if case == cases[1][0]}
+        assert all(outcome == "paid" for case, _, outcome, _, _ in rows if case == cases[0][0]), "The 60s hold should be paid in both modes"
+        assert short["hold deadline"] < short["fixed timeouts"], "The hold deadline should give up on the short hold sooner"
+    finally:
+        (open_bms.BASE_URL, open_bms.SEAT_HOLD_DEADLINE_ENABLED, open_bms.SEAT_HOLD_SAFETY_SECONDS,
+         open_bms.MAX_STAGE_RECOVERIES, open_bms.CHECKPOINT_FILE) = original
+        open_bms.close_driver(driver)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    "seatmap": bench_seatmap,
+    "seatgrid": bench_seatgrid,
+    "precheck": bench_precheck,
+    "startup": bench_startup,
+    "session": bench_session,
+    "seatstream": bench_seatstream,
+    "showtimes": bench_showtimes,
+    "theatres": bench_theatres,
+    "timeparse": bench_timeparse,
+    "locators": bench_locators,
+    "lean": bench_lean,
+    "memory": bench_memory,
+    "display": bench_display,
+    "orchestrator": bench_orchestrator,
+    "monitor": bench_monitor,
+    "pipeline": bench_pipeline,
+    "checkout": bench_checkout,
+    "hold": bench_hold,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for open_bms.py against saved fixtures.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--scenario", default=None, help="pipeline: JSON stand-in scenario (see bms_standin.py)")
+    parser.add_argument("--sleep-path", action="store_true", help="pipeline: also run with EVENT_DRIVEN_TRANSITIONS off")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
@@ -0,0 +1,335 @@
+"""
+Local stand-in for the BookMyShow pages used by open_bms.py, served from the saved pages in fixtures/.
+
+Every page in the booking flow is served: movie page, show times (date strip, theatre list, quantity
+pop-up), seat layout, T&C pop-up, booking summary and payment. A scenario scripts when the 'Book tickets'
+button appears (for all movies or per movie), 403 block windows, the theatres and show times, the seat inventory (size, sold ratio,
+seats taken by other buyers per second), server-side page delays, in-page UI delays, renamed CSS classes and a Cloudflare-style check, so the whole
+pipeline can be exercised and benchmarked without the live site.
+
+Usage:
+    python bms_standin.py --port 8765 --open-after 120 [--block-between 30 45] [--scenario scenario.json]
+    BMS_BASE_URL=http://127.0.0.1:8765/movies/ python open_bms.py
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from typing import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DEFAULT_THEATRES = {
+    "PVR: Phoenix Palladium, Lower Parel": ["09:30 AM", "01:15 PM", "04:40 PM", "07:45 PM", "10:50 PM"],
+    "INOX: R-City, Ghatkopar": ["10:05 AM", "02:00 PM", "06:30 PM", "09:55 PM"],
+    "Cinepolis: Viviana Mall, Thane": ["11:00 AM", "03:20 PM", "08:10 PM"],
+}
+SEAT_AREAS = [("RCL", "RECLINER", 450), ("PRM", "PRIME", 250)] # (table id, label, price); the first area gets the first 2 rows
+PAGE_NAMES = ("movie", "buytickets", "seatlayout", "summary", "payment") # Keys for StandinScenario.page_delays
+ASSET_TYPES = {".jpg": "image/jpeg", ".woff2": "font/woff2", ".mp4": "video/mp4"}
+CLEARANCE_COOKIE = "cf_clearance"
+CHALLENGE_PAGE = """<!DOCTYPE html><html><head><title>Just a moment...</title></head>
+<body><p>Checking your browser before accessing the site.</p>
+<script>setTimeout(function () { location.href = "/__clearance?return=" + encodeURIComponent(location.pathname + location.search); }, {delay_ms});</script>
+</body></html>"""
+# Seat hold countdown (the live summary/payment pages show one); the page expires when it reaches 00:00
+HOLD_TIMER = """<div id="timer" class="timer">Complete your booking in <span>--:--</span> mins</div>
+<script>
+  (function () {
+    var end = Date.now() + {left_ms};
+    function tick() {
+      var left = Math.max(0, Math.round((end - Date.now()) / 1000));
+      document.querySelector("#timer span").textContent = String(Math.floor(left / 60)).padStart(2, "0") + ":" + String(left % 60).padStart(2, "0");
+      if (left > 0) { setTimeout(tick, 250); return; }
+      document.body.innerHTML = '<h3 id="sessionExpired">Your session has expired. Please select your seats again.</h3>';
+    }
+    tick();
+  })();
+</script>"""
+UI_DELAY_NAMES = ("theatre_list", "qty_popup", "pay_button", "tc_popup", "prepay", "upi_options", "upi_fields") # Keys for ui_delays_ms
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def fill(template: str, **values: str) -> str:
+    """Replaces {key} placeholders. Plain str.replace, since fixtures contain JSON braces."""
+    for key, value in values.items():
+        template = template.replace("{" + key + "}", value)
+    return template
+
+
+def inject_settings(page: str, **settings) -> str:
+    """Adds a <script> setting window.bms<Name> values just before </head>, for the fixture scripts to read."""
+    lines = "".join(f"window.bms{name}={json.dumps(value)};" for name, value in settings.items())
+    return page.replace("</head>", f"<script>{lines}</script>\n</head>", 1)
+
+
+class StandinScenario:
+    """Scripted timeline and inventory for the stand-in: when booking opens, blocks, theatres, seats and delays."""
+
+    def __init__(self, open_after: float | None = None, block_between: tuple[float, float] | None = None,
+                 theatres: dict[str, list[str]] | None = None, days: int = 5, seat_rows: int = 14, seat_cols: int = 24,
+                 sold_ratio: float = 0.3, seed: int = 1, seat_churn_per_second: float = 0.0,
+                 page_delays: dict[str, float] | None = None, ui_delays_ms: dict[str, int] | None = None,
+                 media_assets: int = 0, asset_kb: int = 150, movie_open_after: dict[str, float] | None = None,
+                 class_renames: dict[str, str] | None = None, challenge_seconds: float | None = None, typed_input_only: bool = False,
+                 hold_seconds: float | None = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock # Seconds, monotonic; a simulated clock lets a monitor run through hours of timeline instantly
+        self.started = clock()
+        self.open_after = open_after # Seconds after start when 'Book tickets' appears; None = already open
+        self.movie_open_after = movie_open_after or {} # Movie code -> its own open_after (other movies use open_after)
+        self.block_between = block_between # (start, end) seconds after start when pages return 403
+        self.theatres = theatres or DEFAULT_THEATRES # Theatre name -> show times ('HH:MM AM'), same on every day
+        self.days = days # Dates in the date strip, starting today
+        self.seat_rows = min(seat_rows, 26) # Rows A..Z
+        self.seat_cols = seat_cols
+        self.sold_ratio = sold_ratio # Fraction of seats already sold when the layout loads
+        self.seed = seed # Same seed + show = same seat layout
+        self.seat_churn_per_second = seat_churn_per_second # Seats other buyers take per second while the layout is open
+        self.page_delays = page_delays or {} # Page name -> seconds the server waits before answering
+        self.ui_delays_ms = ui_delays_ms or {} # UI step -> milliseconds before the page reveals it
+        self.media_assets = media_assets # Poster images on the movie/show-times pages (plus a web font and a trailer if > 0)
+        self.asset_kb = asset_kb # Size of each image/font/video served from /assets/
+        self.class_renames = class_renames or {} # CSS class -> new name in every page, like a frontend deploy rehashing styled-components
+        self.challenge_seconds = challenge_seconds # Without a clearance cookie every page is a 'Just a moment...' check this long; None = off
+        self.typed_input_only = typed_input_only # The payment page rejects values that weren't typed (no real key presses), like a masked input
+        self.hold_seconds = hold_seconds # Seat hold from the first summary page load; summary/payment show a countdown and expire. None = no hold
+        self.hold_started: float | None = None # Clock time of the current hold; reopening the seat layout releases it
+        self.requests = 0
+        self.challenges = 0 # Challenge pages served
+        self.movie_page_hits: list[tuple[float, str]] = [] # (seconds after start, "location/movie_code") per movie page request
+
+    @classmethod
+    def from_file(cls, path: str) -> "StandinScenario":
+        """Loads a scenario from a JSON file whose keys are the constructor's arguments."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("block_between"): data["block_between"] = tuple(data["block_between"])
+        unknown = set(data.get("page_delays", {})) - set(PAGE_NAMES) | set(data.get("ui_delays_ms", {})) - set(UI_DELAY_NAMES)
+        if unknown: raise ValueError(f"Unknown delay names in {path}: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def booking_open(self, movie_code: str | None = None) -> bool:
+        open_after = self.movie_open_after.get(movie_code, self.open_after)
+        return open_after is None or self.elapsed() >= open_after
+
+    def blocked(self) -> bool:
+        return bool(self.block_between) and self.block_between[0] <= self.elapsed() < self.block_between[1]
+
+    def dates(self) -> list[str]:
+        """Date ids (YYYYMMDD) shown in the date strip."""
+        today = date.today()
+        return [(today + timedelta(days=offset)).strftime("%Y%m%d") for offset in range(self.days)]
+
+    def ui_delay(self, name: str) -> int:
+        return int(self.ui_delays_ms.get(name, 0))
+
+    def hold_left_ms(self) -> int | None:
+        if self.hold_seconds is None or self.hold_started is None: return None
+        return max(0, int((self.hold_seconds - (self.clock() - self.hold_started)) * 1000))
+
+
+# --- Page builders ---
+
+def inject_media(page: str, scenario: StandinScenario) -> str:
+    """Adds the live pages' weight: poster images, a web font and an autoplaying trailer, served from /assets/."""
+    if not scenario.media_assets: return page
+    posters = "".join(f'<img src="/assets/poster-{i}.jpg" width="120" height="180" alt="">' for i in range(scenario.media_assets))
+    media = (f'<style>@font-face {{ font-family: BmsSans; src: url(/assets/font.woff2); }} body {{ font-family: BmsSans, sans-serif; }}</style>'
+             f'<div class="posters">{posters}</div><video src="/assets/trailer.mp4" autoplay muted></video>')
+    return page.replace("</body>", media + "\n</body>", 1)
+
+
+def build_showtimes_page(scenario: StandinScenario, movie_code: str, location: str, date_id: str) -> str:
+    """Show-times page for one date: date strip, theatre list (revealed after a UI delay) and quantity pop-up."""
+    strip = "".join(
+        f'<div id="{day}" class="date-item{" selected" if day == date_id else ""}" '
+        f"onclick=\"location.href='/buytickets/{movie_code}/{location}/{day}'\">{day[6:]}</div>"
+        for day in scenario.dates())
+    rnd = random.Random(f"{scenario.seed}:{date_id}")
+    blocks = []
+    for index, (name, showtimes) in enumerate(scenario.theatres.items()):
+        times = "".join(
+            f'<div class="sc-1vhizuf-2{" filling-fast" if rnd.random() < 0.3 else ""}" '
+            f"onclick=\"bmsShowQty('{index}-{date_id}-{show_index}')\">{html.escape(showtime)}</div>"
+            for show_index, showtime in enumerate(showtimes))
+        blocks.append(f'<div class="sc-e8nk8f-3"><div class="sc-e8nk8f-4"><div class="sc-7o7nez-0 hvoTNx">{html.escape(name)}</div></div>'
+                      f'<div class="sc-1skzbbo-0">{times}</div></div>')
+    page = fill(load_fixture("buytickets.html"), location=location, movie_code=movie_code,
+                date_strip=strip, theatre_list="\n".join(blocks))
+    return inject_settings(page, TheatreListDelayMs=scenario.ui_delay("theatre_list"), QtyPopupDelayMs=scenario.ui_delay("qty_popup"))
+
+
+def build_seat_rows(scenario: StandinScenario, session_id: str) -> str:
+    """Seat inventory for one show in the live page's markup; sold seats are seeded by scenario seed + show."""
+    rnd = random.Random(f"{scenario.seed}:{session_id}")
+    parts = []
+    for area_index, (table_id, label, price) in enumerate(SEAT_AREAS):
+        rows = range(0, min(2, scenario.seat_rows)) if area_index == 0 else range(2, scenario.seat_rows)
+        if not rows: continue
+        parts.append(f'<div class="setHead">{label} Rs. {price:.2f}</div>\n<table id="{table_id}" class="setmain">')
+        for r in rows:
+            row = chr(ord("A") + r)
+            cells = [f'<td><div class="seatR Setrow1">{row}</div></td>']
+            for c in range(1, scenario.seat_cols + 1):
+                if (c - 1) % 12 == 6: cells.append('<td><div class="seatI"></div></td>') # Aisle
+                status = "_blocked" if rnd.random() < scenario.sold_ratio else "_available"
+                cells.append(f'<td><div class="seatI" id="{row}_{c}"><a class="{status}" href="javascript:;" '
+                             f"onclick=\"fnSelectSeat('{row}_{c}')\">{c}</a></div></td>")
+            parts.append("<tr>" + "".join(cells) + "</tr>")
+        parts.append("</table>")
+    return "\n".join(parts)
+
+
+def build_seat_layout_page(scenario: StandinScenario, session_id: str, quantity: int) -> str:
+    page = re.sub(r'(<div id="layout">\n).*?(\n</div>\n<div id="btmcntbook")',
+                  lambda m: m.group(1) + build_seat_rows(scenario, session_id) + m.group(2),
+                  load_fixture("seat_layout.html"), count=1, flags=re.DOTALL)
+    return inject_settings(page, Qty=quantity, SummaryUrl=f"/summary/{session_id}", PayDelayMs=scenario.ui_delay("pay_button"),
+                           PopupDelayMs=scenario.ui_delay("tc_popup"), ChurnPerSecond=scenario.seat_churn_per_second)
+
+
+def inject_hold_timer(page: str, scenario: StandinScenario) -> str:
+    left_ms = scenario.hold_left_ms()
+    if left_ms is None: return page
+    return page.replace("</body>", fill(HOLD_TIMER, left_ms=str(left_ms)) + "\n</body>", 1)
+
+
+def build_summary_page(scenario: StandinScenario, seat_ids: list[str]) -> str:
+    prices = {chr(ord("A") + r): SEAT_AREAS[0 if r < 2 else 1][2] for r in range(scenario.seat_rows)}
+    amount = sum(prices.get(seat_id.split("_")[0], 0) for seat_id in seat_ids)
+    page = fill(load_fixture("summary.html"), seats=html.escape(", ".join(seat_ids) or "-"), amount=f"{amount:.2f}")
+    return inject_hold_timer(inject_settings(page, PrePayDelayMs=scenario.ui_delay("prepay")), scenario)
+
+
+def build_payment_page(scenario: StandinScenario) -> str:
+    page = inject_settings(load_fixture("payment.html"), UpiOptionsDelayMs=scenario.ui_delay("upi_options"),
+                           UpiFieldsDelayMs=scenario.ui_delay("upi_fields"), TypedInputOnly=scenario.typed_input_only)
+    return inject_hold_timer(page, scenario)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    scenario: StandinScenario = StandinScenario()
+
+    def log_message(self, format, *args):
+        pass # Keep the console for the bot's own output
+
+    def send_html(self, body: str, status: int = 200):
+        for old, new in self.scenario.class_renames.items(): body = body.replace(old, new)
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_asset(self, name: str):
+        """Filler bytes of the asset's type (cacheable, like the live CDN's)."""
+        data = bytes(self.scenario.asset_kb * 1024)
+        self.send_response(200)
+        self.send_header("Content-Type", ASSET_TYPES[os.path.splitext(name)[1]])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "max-age=3600")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def cleared(self) -> bool:
+        return any(part.strip().startswith(CLEARANCE_COOKIE + "=") for part in self.headers.get("Cookie", "").split(";"))
+
+    def send_clearance(self, return_path: str):
+        """Ends a challenge like Cloudflare does: an HttpOnly clearance cookie, then back to the page."""
+        self.send_response(302)
+        self.send_header("Set-Cookie", f"{CLEARANCE_COOKIE}=standin-{random.getrandbits(64):x}; Path=/; Max-Age=3600; HttpOnly; SameSite=Lax")
+        self.send_header("Location", return_path if return_path.startswith("/") else "/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def delay(self, page: str):
+        seconds = self.scenario.page_delays.get(page, 0)
+        if seconds: time.sleep(seconds)
+
+    def do_GET(self):
+        self.scenario.requests += 1
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        if len(parts) == 3 and parts[0] == "movies": # Counted even when blocked: a block page still costs a request
+            self.scenario.movie_page_hits.append((self.scenario.elapsed(), f"{parts[1]}/{parts[2]}"))
+        if self.scenario.blocked():
+            return self.send_html(load_fixture("blocked_403.html"), status=403)
+        if parts == ["__clearance"]:
+            return self.send_clearance(query.get("return", ["/"])[0])
+        if self.scenario.challenge_seconds is not None and not self.cleared() and parts[:1] != ["assets"]:
+            self.scenario.challenges += 1
+            return self.send_html(fill(CHALLENGE_PAGE, delay_ms=str(int(self.scenario.challenge_seconds * 1000))), status=403)
+        if len(parts) == 3 and parts[0] == "movies":
+            self.delay("movie")
+            fixture = "movie_page_open.html" if self.scenario.booking_open(parts[2]) else "movie_page_upcoming.html"
+            return self.send_html(inject_media(fill(load_fixture(fixture), location=parts[1], movie_code=parts[2]), self.scenario))
+        if len(parts) in (3, 4) and parts[0] == "buytickets" and self.scenario.booking_open(parts[1]):
+            dates = self.scenario.dates()
+            date_id = parts[3] if len(parts) == 4 else dates[0]
+            if date_id in dates:
+                self.delay("buytickets")
+                return self.send_html(inject_media(build_showtimes_page(self.scenario, parts[1], parts[2], date_id), self.scenario))
+        if len(parts) == 2 and parts[0] == "seatlayout":
+            self.delay("seatlayout")
+            self.scenario.hold_started = None # Back on the seat layout: the held seats are released
+            quantity = int(query.get("qty", ["2"])[0])
+            return self.send_html(build_seat_layout_page(self.scenario, parts[1], quantity))
+        if len(parts) == 2 and parts[0] == "summary":
+            self.delay("summary")
+            if self.scenario.hold_started is None: self.scenario.hold_started = self.scenario.clock()
+            seat_ids = [seat_id for seat_id in query.get("seats", [""])[0].split(",") if seat_id]
+            return self.send_html(build_summary_page(self.scenario, seat_ids))
+        if parts == ["payment"]:
+            self.delay("payment")
+            return self.send_html(build_payment_page(self.scenario))
+        if len(parts) == 2 and parts[0] == "assets" and os.path.splitext(parts[1])[1] in ASSET_TYPES:
+            return self.send_asset(parts[1])
+        if parts == ["payment", "done"]:
+            return self.send_html(load_fixture("payment_done.html"))
+        self.send_html("<!DOCTYPE html><html><head><title>Page Not Found</title></head><body>Oops</body></html>", status=404)
+
+
+def start_standin(port: int = 0, scenario: StandinScenario | None = None) -> tuple[ThreadingHTTPServer, str]:
+    """Starts the stand-in in a daemon thread. Returns (server, base URL to use as BMS_BASE_URL)."""
+    handler = type("ScenarioHandler", (StandinHandler,), {"scenario": scenario or StandinScenario()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="bms-standin").start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/movies/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the BookMyShow pages used by open_bms.py.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", default=None, help="JSON scenario file (keys: StandinScenario arguments)")
+    parser.add_argument("--open-after", type=float, default=None, help="Seconds until the 'Book tickets' button appears")
+    parser.add_argument("--block-between", type=float, nargs=2, default=None, metavar=("START", "END"),
+                        help="Window (seconds after start) during which every page returns 403")
+    args = parser.parse_args()
+    scenario = StandinScenario.from_file(args.scenario) if args.scenario else StandinScenario()
+    if args.open_after is not None: scenario.open_after = args.open_after
+    if args.block_between: scenario.block_between = tuple(args.block_between)
+    server, base_url = start_standin(args.port, scenario)
+    print(f"Stand-in serving at {base_url} (set BMS_BASE_URL to this). Ctrl+C to stop.")
+    print(f"Show dates: {', '.join(scenario.dates())}. Theatres: {'; '.join(scenario.theatres)}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
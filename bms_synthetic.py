@@ -0,0 +1,80 @@
+"""
+Synthetic inputs for the browser-free parts of open_bms.py: seat maps, theatre listings and a simulated clock.
+
+bench_bms.py and tests/ both build on these, so a benchmark and the test that checks the same code see the same data.
+"""
+import random
+import re
+from datetime import datetime, timedelta
+
+import open_bms
+
+# --- Seat maps ---
+
+def synthetic_seat_map(rows: int, cols: int, sold_ratio: float, seed: int = 1) -> list[open_bms.Seat]:
+    """A rows x cols layout with an aisle after every 10th seat and random sold seats."""
+    rnd = random.Random(seed)
+    seats = []
+    for r in range(rows):
+        row = f"R{r:02d}"
+        for c in range(1, cols + 1):
+            status = "sold" if rnd.random() < sold_ratio else "available"
+            seats.append(open_bms.Seat(f"{row}_{c}", row, str(c), status, "AREA", c + (c - 1) // 10))
+    return seats
+
+
+# --- Theatre names ---
+
+THEATRE_CHAINS = ["PVR", "INOX", "Cinepolis", "Carnival", "Miraj Cinemas", "MovieMax", "Rajhans Cinemas", "Mukta A2 Cinemas",
+                  "Asian Cinemas", "Gold Cinema", "SPI Palazzo", "Wave Cinemas", "City Pride", "E-Square", "Sathyam"]
+THEATRE_VENUES = ["Phoenix Palladium", "Phoenix Marketcity", "R-City Mall", "Viviana Mall", "Infiniti Mall", "Oberoi Mall",
+                  "Nexus Mall", "Forum Mall", "Orion Mall", "Inorbit Mall", "Select Citywalk", "Ambience Mall", "DLF Promenade",
+                  "Lulu Mall", "Elante Mall", "Seasons Mall", "Amanora Mall", "VR Mall", "Pacific Mall", "Central Square"]
+THEATRE_AREAS = ["Lower Parel", "Kurla", "Ghatkopar", "Thane", "Andheri", "Malad", "Whitefield", "Koramangala", "Saket",
+                 "Vasant Kunj", "Gurugram", "Kochi", "Chandigarh", "Hadapsar", "Kothrud", "Anna Nagar", "Velachery",
+                 "Banjara Hills", "Kukatpally", "Salt Lake", "Rajarhat", "Navrangpura", "Vastrapur", "Gomti Nagar"]
+MISTYPE_VARIANTS = 5
+
+
+def theatre_corpus(size: int, seed: int = 3) -> list[str]:
+    """Real-looking 'Chain: Venue, Area' names (some with audi/format suffixes), unique."""
+    rnd = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        name = f"{rnd.choice(THEATRE_CHAINS)}: {rnd.choice(THEATRE_VENUES)}, {rnd.choice(THEATRE_AREAS)}"
+        if rnd.random() < 0.15: name += rnd.choice([" (4K Dolby Atmos)", " IMAX", " Insignia", " - Gold Class"])
+        names.add(name)
+    return sorted(names)
+
+
+def mistype(name: str, variant: int, rnd: random.Random) -> str:
+    """How a user might type a listed name: casing, dropped punctuation or area, a typo, an extra suffix."""
+    if variant == 0: return name.upper()
+    if variant == 1: return re.sub(r"[:,()-]", " ", name).lower()
+    if variant == 2: return name.split(",")[0] + ", " + name.split(", ")[1].split(" ")[0] # Area shortened to its first word
+    if variant == 3: # One letter dropped from a longer word (a short word missing a letter can spell another name's word)
+        words = name.split(" ")
+        i = rnd.choice([i for i, word in enumerate(words) if sum(c.isalpha() for c in word) >= 4])
+        j = rnd.randrange(1, len(words[i].rstrip(",:)")))
+        words[i] = words[i][:j] + words[i][j + 1:]
+        return " ".join(words)
+    return name + ", Screen 3"
+
+
+# --- Time ---
+
+class SimulatedClock:
+    """MonitorClock (and stand-in clock) whose sleep() just moves time forward, so hours of watching run in seconds."""
+
+    def __init__(self, start: datetime):
+        self.start = start
+        self.offset = 0.0
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.offset)
+
+    def sleep(self, seconds: float):
+        self.offset += max(0.0, seconds)
+
+    def monotonic(self) -> float:
+        return self.offset
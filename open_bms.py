@@ -1,16 +1,41 @@
 import time
 import re
 import os
+import sys
+import json
+import random
+import shutil
+import select
+import subprocess
+import argparse
+import threading
+import tomllib
+import functools
+import contextlib
+import difflib
+import heapq
+import math
+import asyncio
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 import datetime
 from datetime import datetime, time as dt_time # Use alias for time
+from typing import Callable, NamedTuple
+import requests
+from requests.adapters import HTTPAdapter
 import undetected_chromedriver as uc
+try:
+    import yaml # Optional: only needed for YAML job files
+except ImportError:
+    yaml = None
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, ElementClickInterceptedException
 
 # --- Constants ---
-BASE_URL = "https://in.bookmyshow.com/movies/"
+BASE_URL = os.environ.get("BMS_BASE_URL", "https://in.bookmyshow.com/movies/") # Override to point at bms_standin.py
 DEFAULT_TIMEOUT = 15  # Default wait time for elements
 DATE_SELECTION_TIMEOUT = 10 # Wait time specifically for date element
 THEATRE_TIMEOUT = 10 # Wait time for theatre/showtime elements
@@ -21,64 +46,1907 @@ SEAT_QTY_TIMEOUT = 15 # Increase slightly if needed
 SEAT_SELECTION_TIMEOUT = 25 # Timeout for the overall seat selection process
 PAY_BUTTON_CHECK_TIMEOUT = 3 # Short timeout for checking if pay button appears after a click
 MAX_SEAT_CLICK_ATTEMPTS = 50 # Max number of different seats to try clicking
+MAX_SINGLE_SEAT_ATTEMPTS = 5 # Of those, max single seats tried once no contiguous block is left
+SEAT_CHANGE_STREAM_ENABLED = True # Watch seat/pay-button changes with an in-page MutationObserver instead of polling the pay button
+SEAT_PREFERRED_ROWS = [] # Row labels to prefer, e.g. ["H", "J"]. Empty = prefer rows about a third of the way from the back
+SEAT_ROW_WEIGHT = 1.0 # Weight of the row preference when scoring seat blocks
+SEAT_CENTRE_WEIGHT = 1.0 # Weight of the distance from the screen centre when scoring seat blocks
 ACCEPT_TC_TIMEOUT = 15      # Timeout for the T&C Accept button
 SUMMARY_PROCEED_TIMEOUT = 40 # Timeout for the Summary Proceed button
 CONTACT_DETAILS_TIMEOUT = 20 # Timeout for contact details section
 PAYMENT_OPTION_TIMEOUT = 25  # Timeout for payment options to load/be clickable
 UPI_PAYMENT_TIMEOUT = 30 # Timeout for entering UPI details and clicking final pay
+FAST_CHECKOUT_ENABLED = True # Fill the payment page (mobile, PhonePe, UPI ID) in one in-page script; typing is only the fallback
+FAST_CHECKOUT_CONFIRM_TIMEOUT = 3 # Seconds after 'MAKE PAYMENT' to watch for a UPI validation error before counting it as submitted
+SEAT_HOLD_DEADLINE_ENABLED = True # Once seats are held, size the later stages' timeouts from the hold time left instead of the fixed ones above
+SEAT_HOLD_ASSUMED_SECONDS = 420 # Hold length assumed until a page shows its countdown
+SEAT_HOLD_SAFETY_SECONDS = 20 # Part of the hold left unused (clock skew, the payment request itself)
+# Least time (seconds) each stage needs while the seats are held; the run stops (or holds new seats) once the hold can't cover what's left
+SEAT_HOLD_MIN_STAGE_SECONDS = {"terms_and_conditions": 2, "summary": 3, "contact_details": 2, "payment_option": 2, "upi_payment": 3}
+MAX_SEAT_RESELECTS = 1 # Times the seats may be given up and selected again when the hold runs short (0 = stop instead)
 REFRESH_INTERVAL_SECONDS = 300 # e.g., 300 seconds = 5 minutes
 BOOK_BUTTON_CHECK_TIMEOUT = 10 # Shorter timeout specifically for checking if book button exists
-
+FAST_POLL_BUTTON_TIMEOUT = 2 # Book button check timeout when polling close to the expected release
+# Release polling windows: (seconds until expected release >= threshold, poll interval in seconds), checked in order
+RELEASE_POLL_WINDOWS = [(6 * 3600, 300), (3600, 120), (15 * 60, 30), (3 * 60, 8), (0, 4)]
+RELEASE_OVERDUE_POLL_SECONDS = 6 # Poll interval once the expected release time has passed...
+RELEASE_OVERDUE_WINDOW_SECONDS = 30 * 60 # ...for this long, then fall back to REFRESH_INTERVAL_SECONDS
+POLL_JITTER_RATIO = 0.15 # +/- random fraction added to every poll interval
+BLOCK_BACKOFF_BASE_SECONDS = 60 # First wait after a Cloudflare/403 page; doubles on each consecutive block
+BLOCK_BACKOFF_MAX_SECONDS = 30 * 60 # Upper bound for the block backoff
+MAX_CONSECUTIVE_BLOCKS = 5 # Stop monitoring after this many block pages in a row
+HTTP_PRECHECK_ENABLED = True # Check the raw movie page over HTTP and only refresh the browser when booking looks open
+HTTP_PRECHECK_TIMEOUT = 8 # Timeout (seconds) for one HTTP pre-check request
+EVENT_DRIVEN_TRANSITIONS = True # Wait for the next stage's DOM signal instead of fixed pauses (False = old sleep-based path)
+STAGE_READY_POLL_INTERVAL = 0.1 # How often (seconds) to check for the next stage's readiness signal
+FAST_WAIT_POLL_INTERVAL = 0.05 # How often (seconds) element waits re-check their condition (Selenium's default is 0.5)
+SHOWTIME_CACHE_SECONDS = 120 # Reuse a date's theatre list snapshot for this long (e.g. when a later stage is retried)
+# Theatre names you type -> the name (or most of it) BookMyShow lists, e.g. {"pvr lower parel": "PVR: Phoenix Palladium, Lower Parel"}
+THEATRE_ALIASES = {}
+THEATRE_MATCH_MIN_SCORE = 0.6 # Lowest fuzzy score (0-1) accepted when the theatre name doesn't match exactly
+THEATRE_MATCH_MARGIN = 0.05 # A fuzzy match must beat the runner-up by this much, else it's ambiguous and rejected
+# Latency budget (seconds) for the next stage to become ready after each stage completes
+STAGE_LATENCY_BUDGETS = {
+    "book_tickets": 10, "show_date": 8, "theatre_and_time": 10, "seat_quantity": 15, "seats_and_pay": 10,
+    "terms_and_conditions": 15, "summary": 15, "contact_details": 15, "payment_option": 15,
+}
+# Fixed pauses used by the sleep-based path after each stage (also used for the comparison report)
+LEGACY_STAGE_PAUSES = {
+    "book_tickets": 4, "show_date": 3, "theatre_and_time": 5, "seat_quantity": 5, "seats_and_pay": 4,
+    "terms_and_conditions": 5, "summary": 6, "contact_details": 4, "payment_option": 4, "upi_payment": 5,
+}
+
+
+LEAN_BROWSER_MODE = False # Block images, fonts, video and trackers, and use a smaller window (for slow or constrained hosts)
+LEAN_WINDOW_SIZE = (1280, 800) # Window size in lean mode
+LEAN_DISK_CACHE_MB = 64 # Disk cache size in lean mode (kept on, so scripts/CSS are reused across refreshes)
+# URL patterns (CDP Network.setBlockedURLs wildcards) blocked in lean mode: media by extension, then third-party trackers/ads
+LEAN_BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.mp4*", "*.webm*", "*.m3u8*", "*.ts",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*clevertap*", "*branch.io*", "*moengage*",
+    "*youtube.com/embed*", "*ytimg.com*", "*criteo*", "*taboola*", "*amazon-adsystem.com*",
+]
+DISPLAY_MODE = os.environ.get("BMS_DISPLAY_MODE", "headed") # 'headed' (needs a desktop), 'headless' (Chrome's new headless mode) or 'xvfb' (own virtual display per browser)
+HEADLESS_WINDOW_SIZE = (1920, 1080) # Window (and virtual screen) size in 'headless' and 'xvfb' modes
+XVFB_START_TIMEOUT = 10 # Seconds to wait for a virtual display to come up in 'xvfb' mode
+SESSION_SNAPSHOT_ENABLED = False # Opt-in: start each browser on a fresh throwaway profile with the saved session (cookies, site storage) restored into it
+SESSION_SNAPSHOT_FILE = "bms_session.json" # The saved session (next to the script). It holds login cookies: keep it private
+SESSION_MAX_AGE_HOURS = 12 # Re-export the session from the persistent profile once the snapshot is this old
+SESSION_LOGIN_TIMEOUT = 300 # Seconds to wait for a challenge (or login) to be completed in the persistent profile's window
+SESSION_REQUIRED_COOKIES = ("cf_clearance",) # Snapshot is stale once one of these has expired (Cloudflare clearance)
+SESSION_SKIPPED_COOKIES = re.compile(r"^(_ga|_gid|_gcl|_fbp|_hj|AMP_|mp_|_clck|_clsk)") # Analytics cookies left out of the snapshot
+SESSION_STORAGE_KEYS = re.compile(r"city|region|user|auth|token|session|login|bms", re.IGNORECASE) # localStorage keys kept in the snapshot
+BROWSER_RECYCLE_ENABLED = True # While waiting for booking to open, restart the browser (same profile and cookies) when it grows too big
+BROWSER_RECYCLE_RSS_MB = 1500 # Restart once the browser's processes use this much memory (MB, Linux only)...
+BROWSER_RECYCLE_PAGE_LOADS = 500 # ...or after this many page loads
+BROWSER_RECYCLE_LAUNCH_ESTIMATE = 15 # Seconds a restart is assumed to take until one has been measured; restarts only run in gaps this long
+MEMORY_METRICS_FILE = None # e.g. "bms_memory.jsonl": log browser memory while waiting, one JSON sample per check (next to the script); None = off
+MEMORY_METRICS_MAX_MB = 10 # Past this size the memory log is moved to '<file>.1' (replacing the previous one) and started afresh
+WARM_START_ENABLED = True # Launch the browser in the background while the booking details are being entered
+WARM_DRIVER_ACQUIRE_TIMEOUT = 120 # Max seconds to wait for the background browser launch to finish
+TRACING_ENABLED = False # Record per-stage spans (time, WebDriver commands, wait vs action time, retries), print them and export them to TRACE_OUTPUT_DIR
+TRACE_OUTPUT_DIR = "bms_traces" # Folder (next to the script) for exported traces
+TRACE_EXPORT_FORMATS = ("chrome", "jsonl") # 'chrome' = trace-event JSON for chrome://tracing / Perfetto, 'jsonl' = one span per line
+CHECKPOINT_RESUME_ENABLED = True # On a failed stage, detect the page on screen and retry from there with the same browser
+CHECKPOINT_FILE = "bms_checkpoint.json" # Stage reached, URLs and seats per job (next to the script), so a restart can resume too
+CHECKPOINT_MAX_AGE_SECONDS = 15 * 60 # Older checkpoints are ignored on start-up
+MAX_STAGE_RECOVERIES = 3 # Resume attempts per booking before giving up
+RESUME_DETECT_TIMEOUT = 8 # Seconds to wait for a reloaded checkpoint URL to show a recognisable stage
+LOCATOR_CACHE_FILE = None # e.g. "bms_locators.json": remember which locator strategy last worked per element, and match counts, across runs (next to the script); None = this run only
+DEFAULT_RESULTS_FILE = "bms_results.jsonl" # Where the batch runner writes one JSON result per job
+BATCH_POST_PAYMENT_HOLD_SECONDS = 45 # Batch mode: keep a browser on the payment page this long before closing it
+ASYNC_HTTP_THREADS = 4 # Async batch mode: threads shared by all watchers for HTTP pre-checks
+ASYNC_WATCH_TIMEOUT_SECONDS = 48 * 3600 # Async batch mode: stop watching a job for its booking to open after this long
+ASYNC_BOOKING_TIMEOUT_SECONDS = 15 * 60 # Async batch mode: max time one booking may hold a browser once booking opens
+MONITOR_REQUESTS_PER_MINUTE = 30 # Monitor mode: movie page checks per minute across the whole watchlist (one budget for the site)
+MONITOR_BURST = 5 # Monitor mode: checks that may go out back to back after the budget has been idle
+MAX_BROWSER_WORKERS = 4 # Upper bound on concurrent Chromium instances when racing several targets
+BROWSER_WORKER_RAM_MB = 700 # Approximate RAM one Chromium worker needs (used to cap the pool)
+BROWSER_WORKER_CPUS = 1 # CPU cores to budget per Chromium worker (used to cap the pool)
+
+# --- Locators ---
+BOOK_BUTTON_LOCATOR = (By.XPATH, "//button[.//span[contains(text(), 'Book tickets')]]")
+INTERESTED_BUTTON_LOCATOR = (By.XPATH, "//button[.//span[contains(text(), 'interested')]]") # Shown instead while booking is upcoming
+THEATRE_NAME_LOCATOR = (By.XPATH, "//div[contains(@class, 'hvoTNx')]")
+AVAILABLE_SEAT_LOCATOR = (By.XPATH, "//div[contains(@class, 'seatI')]/a[contains(@class, '_available')]")
+PAY_BUTTON_LOCATOR = (By.ID, "btmcntbook")
+ACCEPT_TC_LOCATOR = (By.ID, "btnPopupAccept")
+SUMMARY_PROCEED_LOCATOR = (By.ID, "prePay") # The div with onclick='fnPrePay()'
+MOBILE_INPUT_LOCATOR = (By.ID, "txtMobile")
+PHONEPE_LABEL_LOCATOR = (By.XPATH, "//label[contains(@onclick, \"pay.fnSetUPI\") and contains(@onclick, \"'PHONEPE'\")]")
+UPI_USERNAME_LOCATOR = (By.ID, "txtUPIId")
+
+# --- Locator Registry ---
+# Ranked strategies per logical element, most trusted first. All of an element's strategies are tried in the
+# same in-page check, the primary always first. A fallback that matched while the primary didn't is tried next
+# from then on, ahead of the other fallbacks (remembered across runs in LOCATOR_CACHE_FILE, if set).
+# {placeholders} are filled from the wait's keyword arguments. Hashed styled-component classes (hvoTNx, sc-...)
+# change with frontend deploys, so every element that relies on one also has a text or structure fallback.
+SHOWTIME_TEXT_XPATH = ("//*[not(*)][string-length(normalize-space()) <= 8][contains(normalize-space(), ':')]"
+                       "[contains(normalize-space(), ' AM') or contains(normalize-space(), ' PM')]") # A leaf reading e.g. '07:45 PM'
+UPPERCASE_TEXT_XPATH = "translate(normalize-space(), 'abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')" # For case-insensitive text tests
+LOCATOR_STRATEGIES = {
+    "book_button": [BOOK_BUTTON_LOCATOR,
+                    (By.XPATH, "//button[contains(normalize-space(), 'Book tickets')]"),
+                    (By.XPATH, "//a[contains(@href, '/buytickets/') and contains(normalize-space(), 'Book')]")],
+    "interested_button": [INTERESTED_BUTTON_LOCATOR,
+                          (By.XPATH, f"//button[contains({UPPERCASE_TEXT_XPATH}, 'INTERESTED')]")],
+    "show_date": [(By.ID, "{date_id}"), (By.CSS_SELECTOR, "[data-date='{date_id}'], [data-id='{date_id}']")],
+    # Anything that shows the theatre list has rendered: a theatre name, or failing that a showtime
+    "theatre_list": [THEATRE_NAME_LOCATOR,
+                     (By.CSS_SELECTOR, "div[class*='sc-1vhizuf-2']"),
+                     (By.XPATH, SHOWTIME_TEXT_XPATH)],
+    # (theatre block, theatre name within it, showtime within it) CSS selectors for SHOWTIME_LISTING_JS;
+    # None finds them by their text instead (showtimes read like '07:45 PM', the name is the block's first other text)
+    "showtime_listing": [("div[class*='sc-e8nk8f-3']", "div[class*='hvoTNx']", "div[class*='sc-1vhizuf-2']"),
+                         (None, None, None)],
+    "seat_quantity": [(By.ID, "pop_{qty}"), (By.XPATH, "//ul[.//li[@id]]/li[normalize-space()='{qty}']")],
+    "select_seats_button": [(By.ID, "proceed-Qty"), (By.XPATH, "//*[self::div or self::button][normalize-space()='Select Seats']")],
+    "available_seat": [AVAILABLE_SEAT_LOCATOR, (By.CSS_SELECTOR, "a._available")],
+    "pay_button": [PAY_BUTTON_LOCATOR, (By.XPATH, "//a[starts-with(normalize-space(), 'Pay Rs')]")],
+    "accept_terms": [ACCEPT_TC_LOCATOR, (By.XPATH, "//*[self::div or self::a or self::button][normalize-space()='Accept']")],
+    "summary_proceed": [SUMMARY_PROCEED_LOCATOR, (By.XPATH, "//*[contains(@onclick, 'fnPrePay')]")],
+    "mobile_input": [MOBILE_INPUT_LOCATOR, (By.CSS_SELECTOR, "input[type='tel']")],
+    "contact_continue": [(By.XPATH, "//div[@id='dContinueContactSec']/a[contains(@onclick, 'pay.fnValUserDetails')]"),
+                         (By.XPATH, "//a[contains(@onclick, 'fnValUserDetails')]")],
+    "phonepe_option": [PHONEPE_LABEL_LOCATOR, (By.XPATH, "//label[contains(normalize-space(), 'PhonePe')]")],
+    "upi_username": [UPI_USERNAME_LOCATOR, (By.CSS_SELECTOR, "input[placeholder*='UPI' i]")],
+    "upi_handle": [(By.ID, "dUPIVPADrop"), (By.CSS_SELECTOR, "input[list], input[placeholder*='@']")],
+    "make_payment": [(By.XPATH, "//button[contains(@onclick, \"pay.fnPayUPI('UPI')\") and contains(normalize-space(), 'MAKE PAYMENT')]"),
+                     (By.XPATH, "//button[@data-role='PayNowButton']"),
+                     (By.XPATH, f"//button[contains({UPPERCASE_TEXT_XPATH}, 'MAKE PAYMENT')]")],
+    "contact_error": [(By.ID, "errMobile"), (By.CSS_SELECTOR, "#contactSec .err, #contactSec [class*='error' i]")], # Shown when the number is rejected
+    "upi_error": [(By.ID, "errUPI"), (By.CSS_SELECTOR, "#upiFields .err, #upiFields [class*='error' i]")], # Shown when the UPI ID is rejected
+    "hold_timer": [(By.ID, "timer"), (By.CSS_SELECTOR, "[class*='timer' i], [class*='countdown' i]"), # Seat hold countdown ('07:42')
+                   (By.XPATH, "//*[not(*)][contains(normalize-space(), ':')][contains(translate(normalize-space(), 'MINS', 'mins'), 'min')]")],
+}
+
+# --- HTTP Pre-check Signals (raw movie page HTML / embedded JSON) ---
+BOOKING_OPEN_PATTERNS = [
+    re.compile(r'"bookingStatus"\s*:\s*"OPEN"'),
+    re.compile(r'"cta"\s*:\s*\{[^{}]*"text"\s*:\s*"Book tickets"'),
+    re.compile(r"<button[^>]*>(?:(?!</button>).)*?<span[^>]*>\s*Book tickets\s*</span>", re.DOTALL),
+]
+BOOKING_CLOSED_PATTERNS = [
+    re.compile(r'"isUpcoming"\s*:\s*true'),
+    re.compile(r'"bookingStatus"\s*:\s*"COMING_SOON"'),
+    re.compile(r"<span[^>]*>\s*I(?:'|&#x27;|&#39;|’)m interested\s*</span>"),
+]
+BLOCK_PAGE_PATTERN = re.compile(r"<title>[^<]*(?:just a moment|403 forbidden|attention required|cloudflare)", re.IGNORECASE)
+
+# --- Booking Stages ---
+BOOKING_STAGES = ("navigate", "book_tickets", "show_date", "theatre_and_time", "seat_quantity", "seats_and_pay",
+                  "terms_and_conditions", "summary", "contact_details", "payment_option", "upi_payment")
+# Which stage's inputs are on screen, furthest first (arguments: seat quantity, date ID, "theatre_list" [[kind, value], ...]).
+# null = not recognised.
+STAGE_DETECT_JS = """
+function shown(selector) {
+    var el = document.querySelector(selector);
+    if (!el) return false;
+    var style = getComputedStyle(el);
+    return style.display !== "none" && style.visibility !== "hidden" && el.getClientRects().length > 0;
+}
+if (shown("#txtUPIId")) return "upi_payment";
+if (shown("label[onclick*='pay.fnSetUPI'][onclick*=\\"'PHONEPE'\\"]")) return "payment_option";
+if (shown("#txtMobile")) return "contact_details";
+if (shown("#prePay") || shown("#btnseatdisab")) return "summary";
+if (shown("#btnPopupAccept")) return "terms_and_conditions";
+if (document.querySelector("div[class*='seatI'] > a")) return "seats_and_pay";
+if (shown("#pop_" + arguments[0])) return "seat_quantity";
+if (location.href.indexOf(arguments[1]) !== -1 && arguments[2].some(function (spec) {
+    if (spec[0] === "id") return document.getElementById(spec[1]);
+    if (spec[0] === "css") return document.querySelector(spec[1]);
+    return document.evaluate(spec[1], document, null, 9, null).singleNodeValue;
+})) return "theatre_and_time";
+if (document.getElementById(arguments[1])) return "show_date";
+var button = document.evaluate("//button[.//span[contains(text(), 'Book tickets')]]", document, null, 9, null).singleNodeValue;
+return button ? "book_tickets" : null;
+"""
+
+# --- Seat Map ---
+# Reads every seat on the layout page in one round trip: [id, row, col, status, price/area class]
+SEAT_MAP_SNAPSHOT_JS = """
+var seats = [];
+document.querySelectorAll("div[class*='seatI']").forEach(function (div) {
+    var link = div.querySelector(":scope > a");
+    if (!div.id || !link || div.id.indexOf("_") === -1) return;
+    var cls = " " + (link.getAttribute("class") || "") + " ";
+    var status = "sold";
+    if (cls.indexOf("_available") !== -1) status = "available";
+    else if (cls.indexOf("_selected") !== -1) status = "selected";
+    else if (cls.indexOf("_blocked") !== -1) status = "blocked";
+    var sep = div.id.indexOf("_");
+    var area = div.closest("table");
+    var cell = div.closest("td");
+    seats.push([div.id, div.id.slice(0, sep), div.id.slice(sep + 1), status, area && area.id ? area.id : "",
+                cell ? cell.cellIndex : -1]);
+});
+return seats;
+"""
+# Scrolls to a seat and selects it through the site's own handler in a single round trip
+SEAT_CLICK_JS = """
+var div = document.getElementById(arguments[0]);
+if (!div) return false;
+div.scrollIntoView({block: 'center'});
+fnSelectSeat(arguments[0]);
+return true;
+"""
+
+# Deselects every selected seat (the site's fnClearSel, else a click on each). Returns how many were selected.
+SEAT_CLEAR_JS = """
+var selected = document.querySelectorAll("div[class*='seatI'] > a._selected");
+if (!selected.length) return 0;
+if (typeof fnClearSel === "function") fnClearSel();
+else selected.forEach(function (link) { link.click(); });
+return selected.length;
+"""
+
+# Installs a MutationObserver on the seat layout page that queues seat status and pay-button changes as
+# [kind, seat id, status] ('seat', 'A_12', 'sold') / ('pay', '', 'ready'|'hidden'). Idempotent; returns the pay state.
+SEAT_WATCH_JS = """
+var payId = arguments[0];
+function seatStatus(link) {
+    var cls = " " + (link.getAttribute("class") || "") + " ";
+    if (cls.indexOf("_available") !== -1) return "available";
+    if (cls.indexOf("_selected") !== -1) return "selected";
+    if (cls.indexOf("_blocked") !== -1) return "blocked";
+    return "sold";
+}
+function payState() {
+    var button = document.getElementById(payId);
+    if (!button || button.disabled) return "hidden";
+    var style = getComputedStyle(button);
+    return style.display !== "none" && style.visibility !== "hidden" && button.getClientRects().length ? "ready" : "hidden";
+}
+if (!window.__bmsSeatWatch) {
+    window.__bmsSeatEvents = [];
+    var lastPay = payState();
+    var notify = function () {
+        var waiter = window.__bmsSeatWaiter;
+        if (waiter && window.__bmsSeatEvents.length) { window.__bmsSeatWaiter = null; waiter(); }
+    };
+    window.__bmsSeatWatch = new MutationObserver(function (mutations) {
+        var queue = window.__bmsSeatEvents;
+        mutations.forEach(function (m) {
+            var nodes = m.type === "childList" ? Array.prototype.slice.call(m.addedNodes) : [m.target];
+            nodes.forEach(function (node) {
+                if (node.nodeType !== 1) return;
+                var links = node.matches("div[class*='seatI'] > a") ? [node] : node.querySelectorAll("div[class*='seatI'] > a");
+                Array.prototype.forEach.call(links, function (link) {
+                    if (link.parentNode.id) queue.push(["seat", link.parentNode.id, seatStatus(link)]);
+                });
+            });
+        });
+        var pay = payState();
+        if (pay !== lastPay) { lastPay = pay; queue.push(["pay", "", pay]); }
+        notify();
+    });
+    window.__bmsSeatWatch.observe(document.body, {subtree: true, childList: true, attributes: true, attributeFilter: ["class", "style", "disabled"]});
+}
+return payState();
+"""
+# Async: hands back the queued changes as soon as there are any, or [] after arguments[0] ms; null if the observer is gone
+SEAT_EVENTS_WAIT_JS = """
+var done = arguments[arguments.length - 1];
+if (!window.__bmsSeatWatch) { done(null); return; }
+var drain = function () { var batch = window.__bmsSeatEvents; window.__bmsSeatEvents = []; done(batch); };
+if (window.__bmsSeatEvents.length) { drain(); return; }
+var timer = setTimeout(function () { window.__bmsSeatWaiter = null; drain(); }, arguments[0]);
+window.__bmsSeatWaiter = function () { clearTimeout(timer); drain(); };
+"""
+
+class Seat(NamedTuple):
+    """One seat from the seat layout snapshot."""
+    id: str # e.g. 'A_12' (the argument to fnSelectSeat)
+    row: str
+    col: str
+    status: str # 'available', 'selected', 'blocked' or 'sold'
+    price_class: str # ID of the area/price table the seat belongs to
+    pos: int = -1 # Physical column (table cell index, so aisles count as gaps); -1 if unknown
+
+# --- Show Times ---
+# Theatre blocks for one "showtime_listing" strategy (see LOCATOR_STRATEGIES): [[theatre name, [showtime elements]], ...].
+# The name is the element's own text (like normalize-space(text()) in the old XPath), not that of child badges.
+SHOWTIME_BLOCKS_JS = """
+var TIME_TEXT = /^\\d{1,2}[:.]\\d{2}\\s*[AP]\\.?M\\.?$/i;
+function directText(el) {
+    var text = "";
+    el.childNodes.forEach(function (node) { if (node.nodeType === 3) text += node.textContent; });
+    return text;
+}
+function ownText(el) { var text = directText(el); return text.trim() ? text : el.textContent; }
+function texts(root) { // Elements with text of their own, in page order
+    return Array.prototype.filter.call(root.querySelectorAll("*"), function (el) { return directText(el).trim(); });
+}
+function isTime(el) { return TIME_TEXT.test(directText(el).trim()); }
+function theatreBlocks(strategy) {
+    if (strategy[0]) {
+        return Array.prototype.map.call(document.querySelectorAll(strategy[0]), function (block) {
+            var nameDiv = block.querySelector(strategy[1]);
+            return [nameDiv ? ownText(nameDiv) : "", Array.prototype.slice.call(block.querySelectorAll(strategy[2]))];
+        });
+    }
+    // By text: a showtime's block is its nearest ancestor that also holds other text (the theatre name), not counting
+    // labels inside showtimes
+    var blocks = [], elements = [], showtimes = texts(document.body).filter(isTime);
+    function label(el) { return isTime(el) || showtimes.some(function (div) { return div.contains(el); }); }
+    showtimes.forEach(function (div) {
+        var block = div.parentElement, name = null;
+        while (block && block !== document.body) {
+            name = texts(block).filter(function (el) { return !label(el); })[0];
+            if (name) break;
+            block = block.parentElement;
+        }
+        if (!name) return;
+        var index = elements.indexOf(block);
+        if (index === -1) { elements.push(block); blocks.push([directText(name), []]); index = blocks.length - 1; }
+        blocks[index][1].push(div);
+    });
+    return blocks;
+}
+"""
+# Reads the whole theatre list in one round trip (argument: the ranked "showtime_listing" strategies). Returns
+# [index of the strategy that found showtimes, [[theatre name, [[showtime text, class], ...]], ...]] in page order, or null.
+SHOWTIME_LISTING_JS = SHOWTIME_BLOCKS_JS + """
+window.scrollBy(0, 500);
+var strategies = arguments[0];
+for (var i = 0; i < strategies.length; i++) {
+    var blocks = theatreBlocks(strategies[i]);
+    if (!blocks.some(function (block) { return block[1].length; })) continue;
+    return [i, blocks.map(function (block) {
+        var times = block[1].map(function (div) { return [div.textContent.trim(), div.getAttribute("class") || ""]; });
+        return [block[0].replace(/\\s+/g, " ").trim(), times];
+    })];
+}
+return null;
+"""
+# Clicks showtime (theatre block index, showtime index) if it still shows the expected text (argument 3: the listing strategy)
+SHOWTIME_CLICK_JS = SHOWTIME_BLOCKS_JS + """
+var block = theatreBlocks(arguments[3])[arguments[0]];
+var div = block && block[1][arguments[1]];
+if (!div || div.textContent.trim() !== arguments[2]) return false;
+div.scrollIntoView({block: 'center'});
+div.click();
+return true;
+"""
+SOLD_OUT_CLASS_PATTERN = re.compile(r"sold|disabled|unavailable", re.IGNORECASE)
+FILLING_FAST_CLASS_PATTERN = re.compile(r"fast|filling|almost", re.IGNORECASE)
+
+class Showtime(NamedTuple):
+    """One showtime from the theatre list snapshot."""
+    theatre_name: str
+    theatre_pos: int # Index of the theatre block on the page
+    show_pos: int # Index of the showtime within its theatre block
+    text: str # As displayed, e.g. '07:45 PM'
+    time: dt_time | None # Parsed text; None if it could not be parsed
+    availability: str # 'available', 'filling_fast' or 'sold_out' (from the element's class)
 
 # --- Configuration ---
 CHROMIUM_BINARY_PATH = "/usr/bin/chromium-browser" #<-- ADJUST THIS IF NEEDED or set to None
 
 # --- Helper Functions ---
 
-def parse_time_string(time_str: str) -> dt_time | None:
-    """Parses a time string (HH:MM AM/PM or HH:MM) into a datetime.time object."""
-    time_str = time_str.strip().upper()
-    formats_to_try = ["%I:%M %p", "%H:%M", "%I:%M%p"]
-    for fmt in formats_to_try:
+# A typed time, whole string: 'HH:MM' (24h) or 'H:MM AM/PM' ('HH:MMPM', '07:45\u202fPM' and lower case too).
+# Anything else is rejected, so a mistyped 'PM' can't turn into a time 12 hours off.
+TIME_PATTERN = re.compile(r"\s*(\d{1,2}):(\d{2})\s*(?:([AaPp])[Mm])?\s*")
+# A showtime label as the site shows it: also '7.45 p.m.', and followed by known screen formats ('07:45 PM IMAX')
+SHOWTIME_FORMAT_LABELS = ("IMAX", "4DX", "MX4D", "SCREENX", "ICE", "3D", "2D", "DOLBY ATMOS", "DOLBY CINEMA", "ONYX", "PXL", "P[XL]", "INSIGNIA", "GOLD")
+SHOWTIME_LABEL_PATTERN = re.compile(r"\s*(\d{1,2})\s*[:.]\s*(\d{2})\s*(?:([AaPp])\.?\s*[Mm]\.?)?(?:\s+(?:"
+                                    + "|".join(re.escape(label) for label in SHOWTIME_FORMAT_LABELS) + r"))*\s*", re.IGNORECASE)
+
+class ParsedTime(NamedTuple):
+    """Result of parse_time: the time, or None and the reason it could not be parsed."""
+    time: dt_time | None
+    error: str | None = None
+
+@functools.lru_cache(maxsize=4096)
+def parse_time(time_str: str, showtime_label: bool = False) -> ParsedTime:
+    """
+    Parses 'HH:MM' (24h) or 'H:MM AM/PM' with a single precompiled regex; the whole string must be a time.
+    showtime_label: the text of a showtime on the page, which may also use '.' and end in screen formats
+    (SHOWTIME_FORMAT_LABELS). Results are cached per string.
+    """
+    match = (SHOWTIME_LABEL_PATTERN if showtime_label else TIME_PATTERN).fullmatch(time_str)
+    if not match: return ParsedTime(None, f"'{time_str.strip()}' is not a time. Use 'HH:MM' or 'HH:MM AM/PM'.")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if minute > 59: return ParsedTime(None, f"'{time_str.strip()}': minutes must be 00-59.")
+    if meridiem:
+        if not 1 <= hour <= 12: return ParsedTime(None, f"'{time_str.strip()}': hour must be 1-12 with AM/PM.")
+        hour = hour % 12 + (12 if meridiem in "Pp" else 0)
+    elif hour > 23:
+        return ParsedTime(None, f"'{time_str.strip()}': hour must be 0-23.")
+    return ParsedTime(dt_time(hour, minute))
+
+def parse_time_string(time_str: str, showtime_label: bool = False) -> dt_time | None:
+    """Parses a time string (HH:MM AM/PM or HH:MM) into a datetime.time object. None if invalid (see parse_time for why)."""
+    return parse_time(time_str, showtime_label).time
+
+def resolve_date_id(date_input_str: str) -> str:
+    """
+    Converts a 'MMM DD' date input into the BookMyShow date element ID (YYYYMMDD).
+    Raises ValueError/KeyError/IndexError if the input is malformed.
+    """
+    parts = date_input_str.split()
+    month_abbr, day_str = parts[0], parts[1]
+    month_map = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
+    month_num = month_map[month_abbr]
+    day_num = int(day_str)
+    day_num_padded = f"{day_num:02d}"
+    current_year = datetime.now().year
+    current_month = datetime.now().month
+    if int(month_num) < current_month: current_year += 1
+    return f"{current_year}{month_num}{day_num_padded}"
+
+# --- Tracing ---
+
+_trace_state = threading.local() # .tracer and .span for the current thread
+
+class PipelineTracer:
+    """
+    Records one span per stage call: start/end, WebDriver commands issued, time spent waiting
+    (WebDriverWait/settle pauses) versus acting, and retries. Thread-safe, so race workers can share it.
+    """
+
+    def __init__(self, run_name: str):
+        self.run_name = run_name
+        self.origin = time.perf_counter()
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the current thread's tracer for the duration of the block."""
+        previous = getattr(_trace_state, "tracer", None)
+        _trace_state.tracer = self
+        try: yield self
+        finally: _trace_state.tracer = previous
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        parent = getattr(_trace_state, "span", None)
+        span = {"name": name, "start_s": time.perf_counter() - self.origin, "end_s": None, "commands": 0,
+                "wait_s": 0.0, "retries": 0, "thread": threading.current_thread().name, "result": None}
+        _trace_state.span = span
+        try: yield span
+        finally:
+            span["end_s"] = time.perf_counter() - self.origin
+            _trace_state.span = parent
+            if parent is not None: # Roll child counts up so parent totals stay complete
+                parent["commands"] += span["commands"]; parent["wait_s"] += span["wait_s"]
+            with self._lock: self.spans.append(span)
+
+    def export(self, output_dir: str = TRACE_OUTPUT_DIR, formats: tuple = TRACE_EXPORT_FORMATS) -> list[str]:
+        """Writes the spans in the requested formats. Returns the written file paths."""
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        folder = os.path.join(script_dir, output_dir)
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{re.sub(r'[^A-Za-z0-9_.-]', '_', self.run_name)}")
+        spans = sorted(self.spans, key=lambda span: span["start_s"])
+        written = []
+        if "jsonl" in formats:
+            with open(f"{stem}.jsonl", "w", encoding="utf-8") as f:
+                for span in spans: f.write(json.dumps({"run": self.run_name, **span}, default=str) + "\n")
+            written.append(f"{stem}.jsonl")
+        if "chrome" in formats:
+            threads = {name: i + 1 for i, name in enumerate(dict.fromkeys(span["thread"] for span in spans))}
+            events = [{"name": span["name"], "cat": "stage", "ph": "X", "pid": 1, "tid": threads[span["thread"]],
+                       "ts": round(span["start_s"] * 1e6), "dur": round((span["end_s"] - span["start_s"]) * 1e6),
+                       "args": {"commands": span["commands"], "wait_ms": round(span["wait_s"] * 1000, 1), "retries": span["retries"], "result": str(span["result"])}}
+                      for span in spans]
+            events += [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}} for name, tid in threads.items()]
+            with open(f"{stem}.trace.json", "w", encoding="utf-8") as f: json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+            written.append(f"{stem}.trace.json")
+        return written
+
+    def print_summary(self):
+        """Per-stage totals: calls, wall time, wait vs action time, WebDriver commands and retries."""
+        if not self.spans: return
+        totals = {}
+        for span in sorted(self.spans, key=lambda span: span["start_s"]):
+            row = totals.setdefault(span["name"], [0, 0.0, 0.0, 0, 0])
+            row[0] += 1; row[1] += span["end_s"] - span["start_s"]; row[2] += span["wait_s"]; row[3] += span["commands"]; row[4] += span["retries"]
+        print(f"\n--- Trace Summary ({self.run_name}) ---")
+        print(f"{'Stage':<30}{'Calls':>6}{'Total':>10}{'Wait':>10}{'Action':>10}{'Cmds':>7}{'Retries':>8}")
+        for name, (calls, total, wait, commands, retries) in totals.items():
+            print(f"{name:<30}{calls:>6}{total:>9.2f}s{wait:>9.2f}s{total - wait:>9.2f}s{commands:>7}{retries:>8}")
+
+def current_tracer() -> PipelineTracer | None:
+    return getattr(_trace_state, "tracer", None)
+
+def record_wait(seconds: float):
+    """Books waiting time to the current span (if tracing)."""
+    span = getattr(_trace_state, "span", None)
+    if span is not None: span["wait_s"] += seconds
+
+def record_retry():
+    """Counts a retry in the current span (if tracing)."""
+    span = getattr(_trace_state, "span", None)
+    if span is not None: span["retries"] += 1
+
+def traced_stage(func):
+    """Wraps a stage function (first argument: driver) in a span of the current tracer, if any."""
+    @functools.wraps(func)
+    def wrapper(driver, *args, **kwargs):
+        tracer = current_tracer()
+        if tracer is None: return func(driver, *args, **kwargs)
+        instrument_webdriver_commands(driver)
+        with tracer.span(func.__name__) as span:
+            span["result"] = func(driver, *args, **kwargs)
+            return span["result"]
+    return wrapper
+
+class TracedWait(WebDriverWait):
+    """WebDriverWait that books the time spent in until()/until_not() as wait time of the current span."""
+
+    def until(self, method, message: str = ""):
+        start = time.perf_counter()
+        try: return super().until(method, message)
+        finally: record_wait(time.perf_counter() - start)
+
+    def until_not(self, method, message: str = ""):
+        start = time.perf_counter()
+        try: return super().until_not(method, message)
+        finally: record_wait(time.perf_counter() - start)
+
+def _settle(seconds: float):
+    """Fixed UI-settle pause. Only used on the sleep-based path; event-driven waits replace it."""
+    if not EVENT_DRIVEN_TRANSITIONS:
+        time.sleep(seconds)
+        record_wait(seconds)
+
+# --- Fast Waits ---
+# First element matching any of the locators (arguments: [[kind, value], ...], state, require page load).
+# Returns [locator index, element] or null. kind is 'id', 'xpath' or 'css'.
+FAST_WAIT_JS = """
+var locators = arguments[0], state = arguments[1];
+if (arguments[2] && document.readyState !== "complete") return null;
+function find(kind, value) {
+    if (kind === "id") { var el = document.getElementById(value); return el ? [el] : []; }
+    if (kind === "css") return Array.prototype.slice.call(document.querySelectorAll(value));
+    var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), found = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) found.push(snapshot.snapshotItem(i));
+    return found;
+}
+function visible(el) {
+    var style = getComputedStyle(el), rect = el.getBoundingClientRect();
+    return style.visibility !== "hidden" && style.display !== "none" && parseFloat(style.opacity) > 0 && rect.width > 0 && rect.height > 0;
+}
+function clickable(el) {
+    if (el.disabled || el.getAttribute("aria-disabled") === "true" || !visible(el)) return false;
+    var rect = el.getBoundingClientRect(), x = rect.left + rect.width / 2, y = rect.top + rect.height / 2;
+    if (x < 0 || y < 0 || x >= innerWidth || y >= innerHeight) return true; // Off screen: clicks scroll it into view first
+    var hit = document.elementFromPoint(x, y);
+    return !hit || hit === el || el.contains(hit); // Not covered by a pop-up or overlay
+}
+for (var i = 0; i < locators.length; i++) {
+    var found = find(locators[i][0], locators[i][1]);
+    for (var j = 0; j < found.length; j++) {
+        if (state === "present" || (state === "visible" ? visible(found[j]) : clickable(found[j]))) return [i, found[j]];
+    }
+}
+return null;
+"""
+SELENIUM_DEFAULT_POLL_INTERVAL = 0.5 # WebDriverWait's poll interval, for the saved-time estimate
+
+class WaitMatch(NamedTuple):
+    index: int # Position of the matching locator in the list given to wait_for
+    element: WebElement
+
+class WaitStats:
+    """Fast-wait totals for one booking, and an estimate of the poll-granularity time saved over Selenium's default polling."""
+
+    def __init__(self):
+        self.waits = 0
+        self.polled = 0 # Waits whose condition wasn't already true on the first check
+        self.wait_s = 0.0
+        self.fallbacks = {} # Logical element -> registered strategy (1 = primary) that matched, when not the primary
+
+    def record(self, seconds: float, checks: int):
+        self.waits += 1
+        self.wait_s += seconds
+        if checks > 1: self.polled += 1
+
+    def estimated_saving(self) -> float:
+        """Modelled, not measured: a polled wait notices its element on average half a poll interval late, so this is that difference over every polled wait."""
+        return self.polled * max(0.0, SELENIUM_DEFAULT_POLL_INTERVAL - FAST_WAIT_POLL_INTERVAL) / 2
+
+    def summary(self) -> dict:
+        summary = {"waits": self.waits, "polled": self.polled, "wait_s": round(self.wait_s, 3), "est_saved_s": round(self.estimated_saving(), 3)}
+        if self.fallbacks: summary["locator_fallbacks"] = dict(self.fallbacks)
+        return summary
+
+@contextlib.contextmanager
+def collect_wait_stats():
+    """Collects this thread's fast-wait statistics for the duration of the block."""
+    previous = getattr(_trace_state, "wait_stats", None)
+    stats = _trace_state.wait_stats = WaitStats()
+    try: yield stats
+    finally: _trace_state.wait_stats = previous
+
+def _js_locator(locator: tuple) -> list[str]:
+    """Selenium locator -> [kind, value] for FAST_WAIT_JS."""
+    by, value = locator
+    if by == By.ID: return ["id", value]
+    if by == By.XPATH: return ["xpath", value]
+    if by == By.CSS_SELECTOR: return ["css", value]
+    if by == By.NAME: return ["css", f'[name="{value}"]']
+    if by == By.CLASS_NAME: return ["css", f".{value}"]
+    if by == By.TAG_NAME: return ["css", value]
+    raise ValueError(f"Locator strategy '{by}' isn't supported by wait_for.")
+
+def wait_for(driver: uc.Chrome, locators: tuple | list[tuple], state: str = "clickable", timeout: float = DEFAULT_TIMEOUT,
+             loaded: bool = False, poll: float | None = None) -> WaitMatch:
+    """
+    Waits until any of the locators has an element in the given state, checking everything in one script call per poll.
+
+    Args:
+        driver: The initialized WebDriver instance.
+        locators: One locator, or a list of them in order of preference (the first one that matches wins).
+        state: 'present', 'visible' (rendered and not hidden) or 'clickable' (visible, enabled and not covered by another element).
+        timeout: Maximum time to wait.
+        loaded: Also require document.readyState to be 'complete'.
+        poll: Seconds between checks (default FAST_WAIT_POLL_INTERVAL).
+
+    Returns:
+        WaitMatch(index of the locator that matched, element).
+
+    Raises:
+        TimeoutException if nothing matched in time (like WebDriverWait.until).
+    """
+    specs = [_js_locator(locator) for locator in ([locators] if isinstance(locators, tuple) else locators)]
+    checks = 0
+
+    def _match(d):
+        nonlocal checks
+        checks += 1
+        return d.execute_script(FAST_WAIT_JS, specs, state, loaded) or False
+
+    start = time.perf_counter()
+    try:
+        index, element = TracedWait(driver, timeout, poll_frequency=poll or FAST_WAIT_POLL_INTERVAL).until(_match)
+    finally:
+        stats = getattr(_trace_state, "wait_stats", None)
+        if stats is not None: stats.record(time.perf_counter() - start, checks)
+    return WaitMatch(index, element)
+
+class LocatorRegistry:
+    """
+    Ranked strategies per logical element (LOCATOR_STRATEGIES). The primary is always tried first, so a broad
+    fallback can't outrank it; a fallback that matched while the primary didn't is promoted to be tried next,
+    and demoted again once the primary matches or a wait over the element times out.
+
+    The promoted fallback for each element is kept in `path`, so one that took over after a site deploy keeps
+    its place on the next run too. Matches are counted per strategy there as well, for the fallback report.
+    """
+
+    def __init__(self, strategies: dict[str, list], path: str | None):
+        self.strategies = strategies
+        self.path = path
+        self.preferred = {} # Logical element -> index of the promoted fallback (0 or missing = none)
+        self.matches = {} # Logical element -> strategy key -> times it matched (kept across runs)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    @staticmethod
+    def key(strategy) -> str:
+        """A strategy as stored on disk: indices would point at the wrong strategy once the table changes."""
+        return json.dumps(list(strategy))
+
+    def _load(self):
+        if self._loaded: return
+        self._loaded = True
+        if not self.path: return
         try:
-            if ('%I' in fmt) and (':' in time_str):
-                 parts = time_str.split(':')
-                 if len(parts[0]) == 1 and ('AM' in time_str or 'PM' in time_str):
-                      time_str_padded = f"0{time_str}"
-                      try: return datetime.strptime(time_str_padded, fmt).time()
-                      except ValueError: pass
-            return datetime.strptime(time_str, fmt).time()
-        except ValueError: continue
-    print(f"Error: Could not parse time string '{time_str}'. Use 'HH:MM' or 'HH:MM AM/PM'.")
-    return None
+            with open(self.path, encoding="utf-8") as f: saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, strategies in self.strategies.items():
+            keys = [self.key(strategy) for strategy in strategies]
+            if saved.get("preferred", {}).get(name) in keys: self.preferred[name] = keys.index(saved["preferred"][name])
+            counts = saved.get("matches", {}).get(name)
+            if isinstance(counts, dict): self.matches[name] = {k: v for k, v in counts.items() if k in keys}
+
+    def ranked(self, name: str, **params) -> list[tuple[int, object]]:
+        """
+        (strategy index, strategy) for `name`: the primary, then the promoted fallback, then the other fallbacks.
+        {placeholders} are filled from `params`.
+        """
+        with self._lock:
+            self._load()
+            promoted = self.preferred.get(name, 0)
+        strategies = self.strategies[name]
+        order = [0] + ([promoted] if promoted else []) + [index for index in range(1, len(strategies)) if index != promoted]
+        return [(index, tuple(part.format(**params) if params and isinstance(part, str) else part for part in strategies[index]))
+                for index in order]
+
+    def locators(self, name: str, **params) -> list:
+        """The strategies for `name` in the order they should be tried."""
+        return [strategy for _, strategy in self.ranked(name, **params)]
+
+    def winner(self, name: str, **params):
+        """The strategy that matched last: the promoted fallback if there is one, else the primary."""
+        with self._lock:
+            self._load()
+            index = self.preferred.get(name, 0)
+        return dict(self.ranked(name, **params))[index]
+
+    def record(self, name: str, index: int):
+        """
+        Counts a match by strategy `index`. The primary is checked first, so a fallback only matches when the
+        primary didn't: it is promoted. A primary match demotes the promoted fallback. Changes are saved right away.
+        """
+        key = self.key(self.strategies[name][index])
+        with self._lock:
+            self._load()
+            counts = self.matches.setdefault(name, {})
+            counts[key] = counts.get(key, 0) + 1
+            self._dirty = True
+            promoted = self.preferred.get(name, 0)
+            if promoted == index: return
+            if index: self.preferred[name] = index
+            else: del self.preferred[name]
+        if index: print(f"  Locator '{name}': primary didn't match, strategy {index + 1} of {len(self.strategies[name])} did; trying it next after the primary from now on.")
+        else: print(f"  Locator '{name}': primary matches again; strategy {promoted + 1} is no longer preferred.")
+        self.save()
+
+    def miss(self, name: str):
+        """Nothing matched `name` (a wait timed out): its promoted fallback failed as well, so it is demoted."""
+        with self._lock:
+            self._load()
+            promoted = self.preferred.pop(name, 0)
+            if not promoted: return
+            self._dirty = True
+        print(f"  Locator '{name}': no strategy matched; strategy {promoted + 1} is no longer preferred.")
+        self.save()
+
+    def save(self):
+        """Writes the winners and match counts to `path` (if anything changed since the last save)."""
+        with self._lock:
+            if not self.path or not self._dirty: return
+            self._dirty = False
+            data = {"preferred": {name: self.key(self.strategies[name][index]) for name, index in self.preferred.items()},
+                    "matches": self.matches}
+            try:
+                with open(self.path, "w", encoding="utf-8") as f: json.dump(data, f, indent=2)
+            except OSError as e:
+                print(f"Could not save locator cache: {e}")
+
+    def fallback_report(self) -> dict[str, dict[str, int]]:
+        """Match counts of every strategy that isn't its element's primary, per element (only elements that used one)."""
+        with self._lock:
+            self._load()
+            primary = {name: self.key(strategies[0]) for name, strategies in self.strategies.items()}
+            return {name: {key: count for key, count in counts.items() if key != primary[name]}
+                    for name, counts in self.matches.items() if any(key != primary[name] for key in counts)}
+
+LOCATORS = LocatorRegistry(LOCATOR_STRATEGIES, os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCATOR_CACHE_FILE) if LOCATOR_CACHE_FILE else None)
+
+def wait_for_element(driver: uc.Chrome, names: str | tuple[str, ...], state: str = "clickable", timeout: float = DEFAULT_TIMEOUT,
+                     loaded: bool = False, **params) -> WaitMatch:
+    """
+    wait_for over every registered strategy of one or more logical elements, so a stale locator costs nothing
+    while another strategy still matches. The match (or a timeout) is recorded in LOCATORS, see LocatorRegistry.record.
+
+    Args:
+        driver: The initialized WebDriver instance.
+        names: Logical element name(s) from LOCATOR_STRATEGIES, in order of preference.
+        state, timeout, loaded: As for wait_for.
+        **params: Values for the strategies' {placeholders}.
+
+    Returns:
+        WaitMatch(index into `names` of the element that matched, element).
+
+    Raises:
+        TimeoutException if no strategy matched in time.
+    """
+    names = (names,) if isinstance(names, str) else names
+    candidates = [(name, index, locator) for name in names for index, locator in LOCATORS.ranked(name, **params)]
+    try:
+        match = wait_for(driver, [locator for _, _, locator in candidates], state, timeout, loaded)
+    except TimeoutException:
+        for name in names: LOCATORS.miss(name)
+        raise
+    name, index, _ = candidates[match.index]
+    LOCATORS.record(name, index)
+    stats = getattr(_trace_state, "wait_stats", None)
+    if stats is not None and index: stats.fallbacks[name] = index + 1
+    return WaitMatch(names.index(name), match.element)
+
+def wait_for_stage_ready(driver: uc.Chrome, stage: str, ready_locator: tuple | list[tuple] | None, previous_url: str | None = None,
+                         budget: float | None = None) -> float:
+    """
+    Waits until the page is ready for the stage after `stage`, then returns immediately.
+
+    Readiness means the document has finished loading and either the next stage's
+    element (`ready_locator`) is present or, when no locator is given, the URL has
+    changed from `previous_url`. On the sleep-based path this is the old fixed pause.
+
+    Args:
+        driver: The initialized WebDriver instance.
+        stage: Name of the stage that just completed (key into STAGE_LATENCY_BUDGETS).
+        ready_locator: Locator (or list of locators, any of which will do) of an element that signals the next stage is ready.
+        previous_url: URL before the stage ran, used as a URL-change signal.
+        budget: Maximum wait (default: the stage's STAGE_LATENCY_BUDGETS entry).
+
+    Returns:
+        Seconds spent waiting for readiness.
+    """
+    start = time.perf_counter()
+    if not EVENT_DRIVEN_TRANSITIONS:
+        time.sleep(LEGACY_STAGE_PAUSES.get(stage, 0))
+        return time.perf_counter() - start
+
+    if budget is None: budget = STAGE_LATENCY_BUDGETS.get(stage, DEFAULT_TIMEOUT)
+
+    def _url_changed(d):
+        return d.execute_script("return document.readyState;") == "complete" and previous_url is not None and d.current_url != previous_url
+
+    try:
+        if ready_locator is not None: wait_for(driver, ready_locator, "present", budget, loaded=True, poll=STAGE_READY_POLL_INTERVAL)
+        else: TracedWait(driver, budget, poll_frequency=STAGE_READY_POLL_INTERVAL).until(_url_changed)
+    except TimeoutException:
+        print(f"  Warning: '{stage}' exceeded its {budget}s readiness budget. Continuing; the next stage has its own timeout.")
+    elapsed = time.perf_counter() - start
+    print(f"  Next stage ready after '{stage}' in {elapsed:.2f}s.")
+    return elapsed
+
+def finish_stage(driver: uc.Chrome, stage: str, stage_start: float, stage_timings: list, ready_locator: tuple | list[tuple] | None = None,
+                 previous_url: str | None = None, budget: float | None = None):
+    """Records the action time of `stage` and waits for the next stage to become ready."""
+    action_seconds = time.perf_counter() - stage_start
+    tracer = current_tracer()
+    with tracer.span(f"ready_after_{stage}") if tracer else contextlib.nullcontext():
+        ready_seconds = wait_for_stage_ready(driver, stage, ready_locator, previous_url, budget)
+    stage_timings.append((stage, action_seconds, ready_seconds))
+
+def print_stage_latency_report(stage_timings: list):
+    """Prints per-stage timings and compares them with the fixed-pause (sleep-based) path."""
+    if not stage_timings: return
+    mode = "event-driven" if EVENT_DRIVEN_TRANSITIONS else "sleep-based"
+    print(f"\n--- Stage Latency Report ({mode}) ---")
+    print(f"{'Stage':<22}{'Action':>9}{'Ready':>9}{'Budget':>9}{'Fixed':>9}")
+    total_action = total_ready = total_fixed = 0.0
+    for stage, action_seconds, ready_seconds in stage_timings:
+        budget = STAGE_LATENCY_BUDGETS.get(stage, 0)
+        fixed = LEGACY_STAGE_PAUSES.get(stage, 0)
+        flag = " *over budget*" if EVENT_DRIVEN_TRANSITIONS and ready_seconds > budget else ""
+        print(f"{stage:<22}{action_seconds:>8.2f}s{ready_seconds:>8.2f}s{budget:>8}s{fixed:>8}s{flag}")
+        total_action += action_seconds; total_ready += ready_seconds; total_fixed += fixed
+    print(f"End-to-end ({mode}): {total_action + total_ready:.2f}s")
+    if EVENT_DRIVEN_TRANSITIONS:
+        # Not measured: this run's actions plus the fixed pauses between stages. The pauses inside stages (_settle) are
+        # left out, so the real sleep-based path is slower still. `bench_bms.py pipeline --sleep-path` measures both.
+        print(f"Sleep-based path, ESTIMATED (this run's actions + fixed pauses between stages, in-stage pauses not counted): "
+              f"{total_action + total_fixed:.2f}s. Run 'python bench_bms.py pipeline --sleep-path' to measure both paths.")
+
+def instrument_webdriver_commands(driver: uc.Chrome) -> dict:
+    """
+    Wraps driver.execute so every WebDriver command (one HTTP round trip) is counted.
+    Returns the live counter dict, keyed by command name. Calling it again returns the same dict.
+    """
+    if hasattr(driver, "_bms_command_counts"): return driver._bms_command_counts
+    counts = {}
+    original_execute = driver.execute
+    def counting_execute(driver_command, params=None):
+        counts[driver_command] = counts.get(driver_command, 0) + 1
+        span = getattr(_trace_state, "span", None)
+        if span is not None: span["commands"] += 1
+        return original_execute(driver_command, params)
+    driver.execute = counting_execute
+    driver._bms_command_counts = counts
+    return counts
+
+def snapshot_seat_map(driver: uc.Chrome) -> list[Seat]:
+    """Extracts every seat on the seat layout page with a single execute_script call."""
+    return [Seat(*raw) for raw in (driver.execute_script(SEAT_MAP_SNAPSHOT_JS) or [])]
+
+def click_seat(driver: uc.Chrome, seat_id: str) -> bool:
+    """Scrolls to and selects a seat via fnSelectSeat in one round trip. False if the seat is gone."""
+    return bool(driver.execute_script(SEAT_CLICK_JS, seat_id))
+
+def clear_seat_selection(driver: uc.Chrome) -> int:
+    """Deselects whatever an earlier click left selected, in one round trip. Returns the number of seats deselected."""
+    return int(driver.execute_script(SEAT_CLEAR_JS) or 0)
+
+@contextlib.contextmanager
+def script_timeout(driver: uc.Chrome, seconds: float):
+    """Sets the driver's script timeout (execute_async_script waits) for the block, then puts the previous one back."""
+    previous = driver.timeouts.script
+    driver.set_script_timeout(seconds)
+    try: yield
+    finally:
+        with contextlib.suppress(Exception): driver.set_script_timeout(previous) # A dead session has nothing to restore
+
+def watch_seat_changes(driver: uc.Chrome) -> str | None:
+    """
+    Starts the in-page seat/pay-button change stream. Returns the pay button state ('ready'/'hidden'), None if it failed.
+    wait_for_seat_changes waits in the page, so hold a script_timeout longer than its max_wait while using the stream.
+    """
+    try:
+        return driver.execute_script(SEAT_WATCH_JS, PAY_BUTTON_LOCATOR[1])
+    except Exception as e:
+        print(f"  Could not start the seat change stream ({e}); falling back to polling.")
+        return None
+
+def wait_for_seat_changes(driver: uc.Chrome, max_wait: float) -> list[tuple[str, str, str]] | None:
+    """
+    Waits in the page (no polling) for the next batch of seat/pay-button changes, for at most max_wait seconds
+    (less than the driver's script timeout; see watch_seat_changes).
+
+    Returns:
+        The batch as (kind, seat id, status) tuples ([] if nothing changed), or None if the stream is gone.
+    """
+    start = time.perf_counter()
+    try:
+        batch = driver.execute_async_script(SEAT_EVENTS_WAIT_JS, int(max_wait * 1000))
+    except Exception:
+        batch = None
+    record_wait(time.perf_counter() - start)
+    return None if batch is None else [tuple(event) for event in batch]
+
+def wait_for_pay_button(driver: uc.Chrome, grid: "SeatGrid", block: "SeatBlock", timeout: float = PAY_BUTTON_CHECK_TIMEOUT) -> str | None:
+    """
+    After clicking a block's anchor seat, follows the change stream until the pay button is ready.
+    Seat changes (ours and other buyers') are applied to the grid as each batch arrives.
+
+    Returns:
+        'ready', 'taken' (a seat of the block just went to someone else), 'timeout', or None if the stream is gone.
+    """
+    deadline = time.perf_counter() + timeout
+    while (remaining := deadline - time.perf_counter()) > 0:
+        batch = wait_for_seat_changes(driver, remaining)
+        if batch is None: return None
+        pay_state, taken = None, False
+        for kind, seat_id, status in batch:
+            if kind == "pay":
+                pay_state = status
+                continue
+            grid.update(seat_id, status)
+            if seat_id in block.seat_ids and status in ("blocked", "sold"): taken = True
+        if pay_state == "ready": return "ready"
+        if taken: return "taken"
+    # No change seen: the button may already have been showing
+    return "ready" if watch_seat_changes(driver) == "ready" else "timeout"
+
+class SeatBlock(NamedTuple):
+    """A run of contiguous available seats; seat_ids[0] is the anchor seat to click."""
+    score: float # Lower is better
+    row: str
+    seat_ids: tuple[str, ...]
+
+class SeatGrid:
+    """
+    The seat layout as a 2D grid, with an index of contiguous available runs per row.
+
+    Rows keep their on-page order (first row = furthest from the screen). Columns use the
+    physical cell position so aisles break runs. Status changes only re-index the affected row.
+    """
+
+    def __init__(self, seats: list[Seat], preferred_rows: list[str] | None = None):
+        self.preferred_rows = set(preferred_rows or [])
+        self.rows: dict[str, dict[int, list]] = {} # row -> {pos: [seat_id, status]}
+        self.seat_index: dict[str, tuple[str, int]] = {} # seat_id -> (row, pos)
+        self.runs: dict[str, list[list[int]]] = {} # row -> runs of contiguous available positions
+        for seat in seats:
+            pos = seat.pos if seat.pos >= 0 else (int(seat.col) if seat.col.isdigit() else None)
+            if pos is None: continue
+            self.rows.setdefault(seat.row, {})[pos] = [seat.id, seat.status]
+            self.seat_index[seat.id] = (seat.row, pos)
+        self.row_order = {row: i for i, row in enumerate(self.rows)}
+        all_positions = [pos for cols in self.rows.values() for pos in cols]
+        self.centre = (min(all_positions) + max(all_positions)) / 2 if all_positions else 0
+        self.half_width = max((max(all_positions) - min(all_positions)) / 2, 1) if all_positions else 1
+        self.ideal_row = (len(self.rows) - 1) / 3 # A third of the way from the back
+        for row in self.rows: self._index_row(row)
+
+    def _index_row(self, row: str):
+        """Rebuilds the contiguous available runs for one row."""
+        cols = self.rows[row]
+        runs, current = [], []
+        for pos in sorted(cols):
+            if cols[pos][1] != "available" or (current and pos != current[-1] + 1):
+                if current: runs.append(current)
+                current = []
+            if cols[pos][1] == "available": current.append(pos)
+        if current: runs.append(current)
+        self.runs[row] = runs
+
+    def update(self, seat_id: str, status: str) -> bool:
+        """Sets one seat's status, re-indexing only its row. Returns True if anything changed."""
+        location = self.seat_index.get(seat_id)
+        if location is None: return False
+        row, pos = location
+        if self.rows[row][pos][1] == status: return False
+        self.rows[row][pos][1] = status
+        self._index_row(row)
+        return True
+
+    def apply_snapshot(self, seats: list[Seat]) -> int:
+        """Applies a fresh snapshot, re-indexing only rows whose seats changed. Returns the change count."""
+        changed_rows = set()
+        for seat in seats:
+            location = self.seat_index.get(seat.id)
+            if location is None: continue
+            row, pos = location
+            if self.rows[row][pos][1] != seat.status:
+                self.rows[row][pos][1] = seat.status
+                changed_rows.add(row)
+        for row in changed_rows: self._index_row(row)
+        return len(changed_rows)
+
+    def available_count(self) -> int:
+        return sum(len(run) for runs in self.runs.values() for run in runs)
+
+    def _row_penalty(self, row: str) -> float:
+        if self.preferred_rows: return 0.0 if row in self.preferred_rows else 1.0
+        return abs(self.row_order[row] - self.ideal_row) / max(len(self.rows), 1)
+
+    def best_blocks(self, num_seats: int, limit: int | None = None) -> list[SeatBlock]:
+        """
+        Every contiguous run of at least `num_seats` available seats, best first.
+
+        Within a long run the window closest to the centre is used. Score is the weighted sum
+        of the window's distance from the screen centre and the row's distance from the preferred rows.
+        """
+        blocks = []
+        for row, runs in self.runs.items():
+            row_penalty = self._row_penalty(row)
+            for run in runs:
+                if len(run) < num_seats: continue
+                # Window start that puts the block's middle closest to the centre
+                ideal_start = round(self.centre - (num_seats - 1) / 2)
+                start_index = min(max(ideal_start - run[0], 0), len(run) - num_seats)
+                window = run[start_index:start_index + num_seats]
+                centre_offset = abs((window[0] + window[-1]) / 2 - self.centre) / self.half_width
+                score = SEAT_CENTRE_WEIGHT * centre_offset + SEAT_ROW_WEIGHT * row_penalty
+                blocks.append(SeatBlock(score, row, tuple(self.rows[row][pos][0] for pos in window)))
+        blocks.sort()
+        return blocks[:limit] if limit else blocks
+
+_showtime_cache = {} # (show-times page path, date ID) -> (monotonic time read, list[Showtime])
+_showtime_cache_lock = threading.Lock()
+
+def showtime_availability(class_name: str) -> str:
+    """Maps a showtime element's class attribute to 'available', 'filling_fast' or 'sold_out'."""
+    if SOLD_OUT_CLASS_PATTERN.search(class_name): return "sold_out"
+    if FILLING_FAST_CLASS_PATTERN.search(class_name): return "filling_fast"
+    return "available"
+
+def snapshot_showtimes(driver: uc.Chrome) -> list[Showtime]:
+    """
+    Extracts every theatre and showtime on the page with a single execute_script call; times are parsed once per distinct text.
+    All "showtime_listing" strategies are tried in that call, and the one that found showtimes is promoted for clicking.
+    """
+    ranked = LOCATORS.ranked("showtime_listing")
+    found = driver.execute_script(SHOWTIME_LISTING_JS, [strategy for _, strategy in ranked])
+    if not found:
+        LOCATORS.miss("showtime_listing")
+        return []
+    position, listing = found
+    LOCATORS.record("showtime_listing", ranked[position][0])
+    texts = {text for _, times in listing for text, _ in times if text}
+    parsed = {text: parse_time_string(text, showtime_label=True) for text in texts}
+    return [Showtime(name, theatre_pos, show_pos, text, parsed.get(text), showtime_availability(class_name))
+            for theatre_pos, (name, times) in enumerate(listing)
+            for show_pos, (text, class_name) in enumerate(times)]
+
+def cached_showtimes(driver: uc.Chrome, date_id: str | None = None, refresh: bool = False) -> list[Showtime]:
+    """
+    The theatre list for a date, reusing a snapshot of the same page younger than SHOWTIME_CACHE_SECONDS.
+    Without a date_id the page is always read (nothing is cached).
+    """
+    now = time.monotonic()
+    key = (urlsplit(driver.current_url).path, date_id) if date_id else None
+    if key and not refresh:
+        with _showtime_cache_lock:
+            cached = _showtime_cache.get(key)
+        if cached and now - cached[0] < SHOWTIME_CACHE_SECONDS and cached[1]:
+            return cached[1]
+    showtimes = snapshot_showtimes(driver)
+    if key:
+        with _showtime_cache_lock: _showtime_cache[key] = (now, showtimes)
+    return showtimes
+
+def rank_showtimes(showtimes: list[Showtime], wanted: list[tuple[str, dt_time, dt_time]]) -> list[Showtime]:
+    """
+    Matches showtimes against (theatre name, earliest, latest) choices, most preferred first.
+    Sold-out shows are skipped; within a choice the earliest show comes first, as before.
+
+    Returns:
+        Every matching showtime, best first (choice order, then time).
+    """
+    ranked = []
+    for preference, (theatre_name, start_time, end_time) in enumerate(wanted):
+        for show in showtimes:
+            if show.theatre_name != theatre_name or show.time is None or show.availability == "sold_out": continue
+            if start_time <= show.time <= end_time:
+                ranked.append(((preference, show.time, show.theatre_pos, show.show_pos), show))
+    ranked.sort(key=lambda item: item[0])
+    return [show for _, show in ranked]
+
+# --- Theatre Name Matching ---
+
+THEATRE_NAME_STOPWORDS = {"the", "and", "at", "of", "in"}
+
+def normalize_theatre_name(name: str) -> str:
+    """Lower-case, '&' -> 'and', punctuation -> spaces, whitespace collapsed."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.lower().replace("&", " and ")).split())
+
+def theatre_tokens(name: str) -> frozenset[str]:
+    return frozenset(token for token in normalize_theatre_name(name).split() if token not in THEATRE_NAME_STOPWORDS)
+
+class TheatreMatch(NamedTuple):
+    score: float # 1.0 = exact (after normalising), else weighted token overlap
+    name: str # As listed on the page
+    coverage: float = 1.0 # Share of the typed name (by token weight) that the listed name contains
+    partial: bool = False # The listed name has words that weren't typed (the query matched only part of it)
+
+class TheatreIndex:
+    """
+    Index of listed theatre names for forgiving lookups: exact after normalising (case, punctuation, '&'),
+    then user aliases, then token overlap weighted by rarity, so extra suffixes (', Phoenix Mall'),
+    audi info or small typos don't break the match.
+    """
+
+    def __init__(self, names: list[str], aliases: dict[str, str] | None = None):
+        self.names = list(dict.fromkeys(names)) # De-duplicated, page order kept for tie-breaks
+        self.exact = {}
+        self.tokens = []
+        self.postings = {} # token -> list of name indexes
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(normalize_theatre_name(name), i)
+            tokens = theatre_tokens(name)
+            self.tokens.append(tokens)
+            for token in tokens: self.postings.setdefault(token, []).append(i)
+        self.idf = {token: math.log(1 + len(self.names) / len(ids)) for token, ids in self.postings.items()}
+        self.weights = [sum(self.idf[token] for token in tokens) for tokens in self.tokens]
+        self.by_shape = {} # (first letter, length) -> vocabulary, for typo correction
+        for token in self.postings: self.by_shape.setdefault((token[0], len(token)), []).append(token)
+        self.aliases = {normalize_theatre_name(alias): target for alias, target in (aliases or {}).items()}
+
+    def _query_tokens(self, query: str) -> tuple[dict[str, float], int]:
+        """
+        Query tokens mapped to indexed tokens, with a confidence (1.0 exact, less for a typo correction),
+        and the number of query tokens that matched nothing.
+        """
+        mapped, unmatched = {}, 0
+        for token in theatre_tokens(query):
+            if token in self.postings:
+                mapped[token] = 1.0
+                continue
+            # A typo keeps the first letter and changes the length by at most one
+            similar = [word for size in (len(token) - 1, len(token), len(token) + 1) for word in self.by_shape.get((token[0], size), ())]
+            close = difflib.get_close_matches(token, similar, n=1, cutoff=0.8)
+            if close: mapped[close[0]] = max(mapped.get(close[0], 0), 0.9)
+            else: unmatched += 1
+        return mapped, unmatched
+
+    def lookup(self, query: str, limit: int = 3) -> list[TheatreMatch]:
+        """Best matches for a theatre name, highest score first (only names that could reach THEATRE_MATCH_MIN_SCORE)."""
+        normalized = normalize_theatre_name(query)
+        if normalized in self.aliases:
+            query = self.aliases[normalized]
+            normalized = normalize_theatre_name(query)
+        if normalized in self.exact:
+            return [TheatreMatch(1.0, self.names[self.exact[normalized]])]
+        query_tokens, unmatched = self._query_tokens(query)
+        # Words matching nothing count as if they were the rarest token
+        query_weight = sum(self.idf[token] for token in query_tokens) + unmatched * math.log(1 + len(self.names))
+        if not query_tokens or not query_weight: return []
+        # Common tokens ('mall', 'cinemas') are only checked on candidates found through rarer ones: a name that
+        # shares nothing but them can't reach THEATRE_MATCH_MIN_SCORE, so their long postings are never walked
+        by_weight = sorted(query_tokens.items(), key=lambda item: self.idf[item[0]] * item[1])
+        skipped, skipped_weight = 0, 0.0
+        while skipped < len(by_weight) - 1:
+            weight = self.idf[by_weight[skipped][0]] * by_weight[skipped][1]
+            if 0.75 * (skipped_weight + weight) / query_weight + 0.25 >= THEATRE_MATCH_MIN_SCORE: break
+            skipped, skipped_weight = skipped + 1, skipped_weight + weight
+        shared = {} # name index -> weight of the query tokens it contains
+        for token, confidence in by_weight[skipped:]:
+            weight = self.idf[token] * confidence
+            for i in self.postings[token]: shared[i] = shared.get(i, 0.0) + weight
+        for token, confidence in by_weight[:skipped]:
+            weight = self.idf[token] * confidence
+            for i in shared:
+                if token in self.tokens[i]: shared[i] += weight
+        # Mostly "does the listing contain what I typed", a little "is the listing mostly what I typed"
+        scored = heapq.nsmallest(limit, ((-(0.75 * w / query_weight + 0.25 * w / self.weights[i]), i) for i, w in shared.items()))
+        return [TheatreMatch(round(-score, 3), self.names[i], round(shared[i] / query_weight, 3), not self.tokens[i] <= query_tokens.keys())
+                for score, i in scored]
+
+    def resolve(self, query: str) -> TheatreMatch | None:
+        """
+        The listed theatre meant by query, or None if nothing scores THEATRE_MATCH_MIN_SCORE or the best match is ambiguous:
+        another name scores within THEATRE_MATCH_MARGIN, or the best one only matched part of its name (e.g. 'Vasant' for
+        'Vasant Kunj') while another contains as much of what was typed. Then only name length would pick the winner.
+        """
+        matches = self.lookup(query, limit=5)
+        if not matches or matches[0].score < THEATRE_MATCH_MIN_SCORE: return None
+        best, rivals = matches[0], matches[1:]
+        if best.score < 1.0 and rivals and best.score - rivals[0].score < THEATRE_MATCH_MARGIN: return None
+        if best.score < 1.0 and best.partial and any(rival.coverage >= best.coverage for rival in rivals): return None
+        return best
+
+def click_showtime(driver: uc.Chrome, show: Showtime) -> bool:
+    """Scrolls to and clicks a showtime in one round trip. False if the listing changed under it."""
+    strategy = LOCATORS.winner("showtime_listing") # The one that read the listing
+    return bool(driver.execute_script(SHOWTIME_CLICK_JS, show.theatre_pos, show.show_pos, show.text, strategy))
+
+class BookingTarget(NamedTuple):
+    """One (theatre, time range, date) choice. Lists of targets are ranked: first = most preferred."""
+    theatre_name: str
+    start_time_str: str
+    end_time_str: str
+    date_input_str: str
+
+class BookingJob(NamedTuple):
+    """Everything one booking needs, from the interactive prompts or one job file entry."""
+    name: str
+    location_slug: str
+    movie_code: str
+    date_input_str: str
+    theatre_name: str
+    start_time_str: str
+    end_time_str: str
+    num_seats: int
+    phone_number: str
+    upi_username: str
+    upi_handle: str
+    expected_release: datetime | None = None
+    fallback_targets: tuple[BookingTarget, ...] = ()
+
+    def targets(self) -> list[BookingTarget]:
+        """The primary target followed by the fallbacks, in preference order."""
+        return [BookingTarget(self.theatre_name, self.start_time_str, self.end_time_str, self.date_input_str), *self.fallback_targets]
+
+def validate_booking_inputs(location_slug: str, movie_code: str, date_input_str: str, theatre_name: str, start_time_str: str,
+                            end_time_str: str, num_seats_str: str, phone_number: str, upi_username: str, upi_handle: str) -> list[str]:
+    """Checks the raw booking details. Returns a list of error messages (empty if everything is valid)."""
+    if not all([location_slug, movie_code, date_input_str, theatre_name, start_time_str, end_time_str, num_seats_str, phone_number, upi_username, upi_handle]):
+        return ["All inputs are required."]
+    errors = []
+    try: # Validate date
+        parts = date_input_str.split(); month_map = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
+        if len(parts) != 2 or parts[0] not in month_map or not 1 <= int(parts[1]) <= 31: raise ValueError("Invalid Date")
+    except Exception as e: errors.append(f"Invalid date format: '{date_input_str}'. Use 'MMM DD'. ({e})")
+    for label, time_str in (("earliest showtime", start_time_str), ("latest showtime", end_time_str)): # Validate times
+        parsed = parse_time(time_str)
+        if parsed.error: errors.append(f"Invalid {label}: {parsed.error}")
+    try: # Validate num_seats
+        num_seats = int(num_seats_str)
+        if not 1 <= num_seats <= 10: raise ValueError("Seats must be between 1 and 10")
+    except ValueError as e: errors.append(f"Invalid number of seats: '{num_seats_str}'. {e}.")
+    if not re.fullmatch(r"\d{10}", phone_number):
+        errors.append(f"Invalid phone number format: '{phone_number}'. Please enter exactly 10 digits.")
+    if '@' in upi_username or '@' in upi_handle:
+        errors.append("Please enter username and handle separately, without the '@'.")
+    else:
+        if not re.fullmatch(r"[a-zA-Z0-9.\-_]+", upi_username):
+            errors.append(f"Invalid UPI username format: '{upi_username}'. Contains invalid characters.")
+        if not re.fullmatch(r"[a-zA-Z0-9.\-_]+", upi_handle):
+            errors.append(f"Invalid UPI handle format: '{upi_handle}'. Contains invalid characters.")
+    return errors
+
+def parse_booking_target(theatre_name: str, start_time_str: str, end_time_str: str, date_input_str: str) -> BookingTarget:
+    """Validates one fallback target. Raises ValueError with a readable reason."""
+    if not theatre_name: raise ValueError("theatre name is required")
+    try: resolve_date_id(date_input_str.upper())
+    except (ValueError, KeyError, IndexError): raise ValueError(f"invalid date '{date_input_str}', use 'MMM DD'")
+    if parse_time_string(start_time_str) is None or parse_time_string(end_time_str) is None: raise ValueError("invalid time")
+    return BookingTarget(theatre_name, start_time_str, end_time_str, date_input_str.upper())
+
+def parse_expected_release(expected_release_str: str) -> datetime | None:
+    """'YYYY-MM-DD HH:MM' -> datetime, '' -> None. Raises ValueError on a bad format."""
+    if not expected_release_str: return None
+    try: return datetime.strptime(expected_release_str, "%Y-%m-%d %H:%M")
+    except ValueError: raise ValueError(f"Invalid opening time: '{expected_release_str}'. Use 'YYYY-MM-DD HH:MM'.")
+
+def load_job_file(path: str) -> list[dict]:
+    """
+    Reads a job file (.json, .toml, .yaml/.yml). The file holds either a list of jobs or
+    {"defaults": {...}, "jobs": [...]}, where defaults fill in keys a job leaves out.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f: data = json.load(f)
+    elif extension == ".toml":
+        with open(path, "rb") as f: data = tomllib.load(f)
+    elif extension in (".yaml", ".yml"):
+        if yaml is None: raise ValueError("YAML job files need PyYAML (pip install pyyaml).")
+        with open(path, encoding="utf-8") as f: data = yaml.safe_load(f)
+    else:
+        raise ValueError(f"Unsupported job file type '{extension}'. Use .json, .toml or .yaml.")
+    if isinstance(data, list): data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ValueError("Job file must contain a list of jobs (top-level list or a 'jobs' list).")
+    defaults = data.get("defaults") or {}
+    return [{**defaults, **job} for job in data["jobs"]]
+
+def build_booking_job(raw: dict, index: int) -> tuple[BookingJob | None, list[str]]:
+    """Turns one job file entry into a BookingJob, using the same checks as the interactive prompts."""
+    if not isinstance(raw, dict): return None, [f"Job {index + 1}: must be a table/object of booking details."]
+    text = lambda key: str(raw.get(key, "")).strip()
+    name = text("name") or f"job{index + 1}"
+    errors = validate_booking_inputs(text("location").lower(), text("movie_code"), text("date").upper(), text("theatre"), text("earliest"),
+                                     text("latest"), text("seats"), text("phone"), text("upi_username"), text("upi_handle"))
+    expected_release, fallbacks = None, []
+    try: expected_release = parse_expected_release(text("expected_release"))
+    except ValueError as e: errors.append(str(e))
+    for fallback in raw.get("fallbacks") or []:
+        try:
+            fallbacks.append(parse_booking_target(str(fallback.get("theatre", "")).strip(), str(fallback.get("earliest", "")).strip(),
+                                                  str(fallback.get("latest", "")).strip(), str(fallback.get("date", "")).strip()))
+        except (ValueError, AttributeError) as e:
+            errors.append(f"Invalid fallback target {fallback!r}: {e}.")
+    if errors: return None, [f"Job '{name}': {error}" for error in errors]
+    return BookingJob(name, text("location").lower(), text("movie_code"), text("date").upper(), text("theatre"), text("earliest"), text("latest"),
+                      int(text("seats")), text("phone"), text("upi_username"), text("upi_handle"), expected_release, tuple(fallbacks)), []
+
+def clone_profile(profile_dir_name: str, suffix: str) -> str:
+    """
+    Copies the persistent profile into a per-worker folder so several browsers can share its cookies.
+    Lock files and caches are skipped. Returns the clone's folder name (next to the script, like the original).
+    With SESSION_SNAPSHOT_ENABLED every browser already gets its own throwaway profile, so nothing is copied.
+    """
+    if SESSION_SNAPSHOT_ENABLED: return profile_dir_name
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    source = os.path.join(script_dir, profile_dir_name)
+    clone_name = f"{profile_dir_name}_{suffix}"
+    clone_path = os.path.join(script_dir, clone_name)
+    shutil.rmtree(clone_path, ignore_errors=True)
+    if os.path.isdir(source):
+        shutil.copytree(source, clone_path, symlinks=True,
+                        ignore=shutil.ignore_patterns("Singleton*", "*.lock", "Cache", "Code Cache", "GPUCache", "ShaderCache"))
+    return clone_name
+
+def max_browser_workers(requested: int) -> int:
+    """Caps the number of concurrent browsers by MAX_BROWSER_WORKERS, CPU count and available RAM."""
+    cap = min(requested, MAX_BROWSER_WORKERS, max(1, (os.cpu_count() or 1) // BROWSER_WORKER_CPUS))
+    try:
+        available_mb = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+        cap = min(cap, max(1, available_mb // BROWSER_WORKER_RAM_MB))
+    except (ValueError, OSError, AttributeError):
+        pass # Not available on this platform; rely on the CPU cap
+    return cap
 
 # --- Core Functions ---
 
-def setup_driver(profile_dir_name: str, binary_path: str | None = None) -> uc.Chrome | None:
-    """Initializes undetected-chromedriver with a persistent profile."""
-    driver = None
+def lean_browser_arguments() -> list[str]:
+    """Chromium flags for lean mode: no images, no autoplay, small window and cache, fewer background services."""
+    width, height = LEAN_WINDOW_SIZE
+    return [
+        "--blink-settings=imagesEnabled=false",
+        f"--window-size={width},{height}",
+        f"--disk-cache-size={LEAN_DISK_CACHE_MB * 1024 * 1024}",
+        "--autoplay-policy=user-gesture-required",
+        "--mute-audio",
+        "--disable-extensions",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--renderer-process-limit=2",
+    ]
+
+def apply_lean_network_rules(driver: uc.Chrome) -> bool:
+    """Blocks LEAN_BLOCKED_URL_PATTERNS for every request this tab makes (CDP). False if CDP isn't available."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URL_PATTERNS})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+        return True
+    except Exception as e:
+        print(f"Warning: Could not set up lean mode request blocking: {e}")
+        return False
+
+# --- Display Modes ---
+DISPLAY_MODES = ("headed", "headless", "xvfb")
+
+class VirtualDisplay:
+    """An Xvfb server on a display number it picks itself, for one headed browser on a machine without a desktop."""
+
+    def __init__(self, size: tuple[int, int] = HEADLESS_WINDOW_SIZE):
+        binary = shutil.which("Xvfb")
+        if binary is None: raise RuntimeError("Xvfb isn't installed (e.g. 'apt install xvfb'); use the 'headless' display mode instead.")
+        read_fd, write_fd = os.pipe()
+        try:
+            # -displayfd: Xvfb takes the first free display and writes its number to the pipe once it accepts connections
+            self.process = subprocess.Popen([binary, "-displayfd", str(write_fd), "-screen", "0", f"{size[0]}x{size[1]}x24", "-nolisten", "tcp"],
+                                            pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        finally:
+            os.close(write_fd)
+        try:
+            number = b""
+            deadline = time.monotonic() + XVFB_START_TIMEOUT
+            while not number.endswith(b"\n") and time.monotonic() < deadline:
+                if not select.select([read_fd], [], [], max(0.0, deadline - time.monotonic()))[0]: break
+                chunk = os.read(read_fd, 16)
+                if not chunk: break # Xvfb exited
+                number += chunk
+        finally:
+            os.close(read_fd)
+        if not number.strip().isdigit():
+            self.stop()
+            raise RuntimeError(f"Xvfb didn't start within {XVFB_START_TIMEOUT}s.")
+        self.display = f":{number.decode().strip()}"
+
+    def stop(self):
+        if self.process.poll() is not None: return
+        self.process.terminate()
+        try: self.process.wait(5)
+        except subprocess.TimeoutExpired: self.process.kill()
+
+def display_arguments(display_mode: str, display: VirtualDisplay | None = None) -> list[str]:
+    """Chromium flags for a display mode. 'headless' itself is left to undetected-chromedriver (see setup_driver)."""
+    if display_mode == "headed": return []
+    width, height = HEADLESS_WINDOW_SIZE
+    arguments = [f"--window-size={width},{height}", "--window-position=0,0"] # No desktop to size the window: avoid the 800x600 default
+    if display is not None: arguments.append(f"--display={display.display}")
+    return arguments
+
+def mask_headless_user_agent(driver: uc.Chrome):
+    """Drops 'Headless' from the user agent (CDP), in case undetected-chromedriver's own headless patching didn't."""
+    try:
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        if "Headless" in user_agent:
+            driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": user_agent.replace("HeadlessChrome", "Chrome").replace("Headless", "")})
+    except Exception as e:
+        print(f"Warning: Could not check the headless user agent: {e}")
+
+# --- Session Snapshots ---
+# The site's localStorage entries whose keys match the pattern in arguments[0]
+SESSION_STORAGE_EXPORT_JS = """
+var pattern = new RegExp(arguments[0], "i"), items = {};
+for (var i = 0; i < localStorage.length; i++) {
+    var key = localStorage.key(i);
+    if (pattern.test(key)) items[key] = localStorage.getItem(key);
+}
+return items;
+"""
+# Runs before the site's own scripts on every page: fills in saved storage entries the page doesn't have yet
+SESSION_STORAGE_RESTORE_JS = """
+(function (origin, items) {
+    if (location.origin !== origin) return;
+    for (var key in items) if (localStorage.getItem(key) === null) localStorage.setItem(key, items[key]);
+})(%s, %s);
+"""
+SESSION_SNAPSHOT_VERSION = 1 # Bump when the snapshot layout changes; older snapshots are then re-exported
+
+_session_lock = threading.Lock()
+_session_snapshot = None # Snapshot in use by this process (loaded or exported once, then shared by every browser)
+_session_export_failed = False # Don't launch the persistent profile again for every browser if exporting failed
+
+def site_origin() -> str:
+    return "{0.scheme}://{0.netloc}".format(urlsplit(BASE_URL))
+
+def session_snapshot_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), SESSION_SNAPSHOT_FILE)
+
+def _site_cookie(cookie: dict, host: str) -> bool:
+    domain = cookie.get("domain", "").lstrip(".")
+    return bool(domain) and (host == domain or host.endswith("." + domain)) and not SESSION_SKIPPED_COOKIES.match(cookie.get("name", ""))
+
+def export_session(driver: uc.Chrome) -> dict:
+    """
+    The browser's session for the site as a small JSON-serialisable snapshot: its cookies (including HttpOnly ones
+    such as the Cloudflare clearance), the localStorage entries matching SESSION_STORAGE_KEYS, and the user agent.
+    The driver should be on a page of the site, so its storage can be read.
+    """
+    host = urlsplit(BASE_URL).hostname or ""
+    try: cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+    except Exception: cookies = driver.get_cookies() # Without CDP: HttpOnly cookies are still included, expiry is named differently
+    kept = []
+    for cookie in cookies:
+        if not _site_cookie(cookie, host): continue
+        param = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+        expires = cookie.get("expires", cookie.get("expiry", -1))
+        if expires and expires > 0: param["expires"] = expires # Session cookies (-1) stay session cookies
+        kept.append(param)
+    storage = {}
+    if driver.current_url.startswith(site_origin()):
+        storage = driver.execute_script(SESSION_STORAGE_EXPORT_JS, SESSION_STORAGE_KEYS.pattern) or {}
+    return {"version": SESSION_SNAPSHOT_VERSION, "saved_at": datetime.now().isoformat(timespec="seconds"), "origin": site_origin(),
+            "user_agent": driver.execute_script("return navigator.userAgent;"), "cookies": kept, "local_storage": storage}
+
+def restore_session(driver: uc.Chrome, snapshot: dict) -> bool:
+    """
+    Restores a snapshot into a browser through CDP: cookies straight into its cookie store, storage entries by a script
+    that runs before the site's own on every page. Call it before the first navigation. False if CDP isn't available.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        if snapshot["cookies"]: driver.execute_cdp_cmd("Network.setCookies", {"cookies": snapshot["cookies"]})
+        if snapshot["local_storage"]:
+            source = SESSION_STORAGE_RESTORE_JS % (json.dumps(snapshot["origin"]), json.dumps(snapshot["local_storage"]))
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+        return True
+    except Exception as e:
+        print(f"Warning: Could not restore the saved session: {e}")
+        return False
+
+def load_session_snapshot() -> dict | None:
+    try:
+        with open(session_snapshot_path(), encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_session_snapshot(snapshot: dict):
+    """Writes the snapshot readable by the current user only (it holds login cookies)."""
+    try:
+        fd = os.open(session_snapshot_path(), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "w", encoding="utf-8") as f: json.dump(snapshot, f, indent=2)
+    except OSError as e:
+        print(f"Could not save the session snapshot: {e}")
+
+def session_stale_reason(snapshot: dict | None) -> str | None:
+    """Why a snapshot can't be used as it is (so the session must be exported again), or None if it is fine."""
+    if not snapshot: return "no saved session"
+    if snapshot.get("version") != SESSION_SNAPSHOT_VERSION: return "saved by another version of the script"
+    if snapshot.get("origin") != site_origin(): return f"saved for {snapshot.get('origin')}"
+    try: age_hours = (datetime.now() - datetime.fromisoformat(snapshot["saved_at"])).total_seconds() / 3600
+    except (KeyError, TypeError, ValueError): return "no save time"
+    if age_hours > SESSION_MAX_AGE_HOURS: return f"{age_hours:.0f}h old"
+    expired = [cookie["name"] for cookie in snapshot.get("cookies", [])
+               if cookie["name"] in SESSION_REQUIRED_COOKIES and 0 < cookie.get("expires", -1) < time.time() + 60]
+    if expired: return f"{', '.join(expired)} expired"
+    return None
+
+def export_profile_session(profile_dir_name: str, binary_path: str | None, reason: str, display_mode: str | None = None) -> dict | None:
+    """
+    Opens the site once with the persistent profile, waits (up to SESSION_LOGIN_TIMEOUT) for any challenge or
+    login to be completed in that window, then saves and returns its session. None if it stayed blocked.
+    Without a window to solve it in (display_mode 'headless' or 'xvfb'; default DISPLAY_MODE) a challenge fails the export at once.
+    """
+    display_mode = DISPLAY_MODE if display_mode is None else display_mode
+    print(f"\n--- Saving a new session from the persistent profile ({reason}) ---")
+    driver = setup_driver(profile_dir_name, binary_path, session=False, display_mode=display_mode)
+    if driver is None: return None
+    try:
+        driver.get(site_origin() + "/")
+        block = detect_block_page(driver)
+        if block and display_mode != "headed":
+            print(f"{block} There is no window to complete it in '{display_mode}' mode, so no session was saved. "
+                  "Run once with --display-mode headed on a desktop to save one.")
+            return None
+        if block: print(f"{block} Complete it (or log in) in the browser window; waiting up to {SESSION_LOGIN_TIMEOUT}s...")
+        deadline = time.monotonic() + SESSION_LOGIN_TIMEOUT
+        while block and time.monotonic() < deadline:
+            time.sleep(2)
+            block = detect_block_page(driver)
+        if block:
+            print("The site is still blocking the persistent profile; no session saved.")
+            return None
+        snapshot = export_session(driver)
+        save_session_snapshot(snapshot)
+        print(f"Saved {len(snapshot['cookies'])} cookies and {len(snapshot['local_storage'])} storage entries to {SESSION_SNAPSHOT_FILE}.")
+        return snapshot
+    except Exception as e:
+        print(f"Could not export the session: {e}")
+        return None
+    finally:
+        close_driver(driver)
+
+def current_session_snapshot(profile_dir_name: str = PROFILE_FOLDER_NAME, binary_path: str | None = None,
+                             stale: dict | None = None, display_mode: str | None = None) -> dict | None:
+    """
+    The session snapshot for new browsers: the saved one while session_stale_reason finds nothing wrong with it,
+    otherwise a new export from the persistent profile. One export serves every browser of this process.
+
+    Args:
+        profile_dir_name: Persistent profile to export from when needed.
+        binary_path: Chromium binary for that export.
+        stale: A snapshot the site has just rejected (challenge page). It is re-exported unless another
+            browser already replaced it.
+        display_mode: Display mode for that export (default DISPLAY_MODE).
+
+    Returns:
+        The snapshot, or None if there is none and exporting failed.
+    """
+    global _session_snapshot, _session_export_failed
+    with _session_lock:
+        snapshot = _session_snapshot or load_session_snapshot()
+        if stale is not None and (snapshot is None or snapshot.get("saved_at") == stale.get("saved_at")):
+            reason = "the site challenged the restored session"
+        elif snapshot is None and _session_export_failed:
+            return None
+        else:
+            reason = session_stale_reason(snapshot)
+        if reason is not None:
+            snapshot = export_profile_session(profile_dir_name, binary_path, reason, display_mode)
+            _session_export_failed = snapshot is None
+        _session_snapshot = snapshot
+        return snapshot
+
+def update_session_snapshot(driver: uc.Chrome):
+    """Saves a session browser's current cookies/storage (e.g. a renewed clearance) as the snapshot for the next browsers."""
+    global _session_snapshot
+    try: snapshot = export_session(driver)
+    except Exception as e:
+        print(f"Could not export the session: {e}")
+        return
+    with _session_lock:
+        _session_snapshot = driver.bms_session = snapshot
+        save_session_snapshot(snapshot)
+
+def renew_session(driver: uc.Chrome) -> bool:
+    """
+    After the site challenged a session browser: restores a fresh snapshot (exported from the persistent profile,
+    unless another browser already did) into it. False for browsers on the persistent profile, or if none could be made.
+    """
+    if not hasattr(driver, "bms_session"): return False
+    launch = getattr(driver, "bms_launch", (PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH, None, None, None, None))
+    snapshot = current_session_snapshot(launch[0], launch[1], stale=driver.bms_session or {}, display_mode=launch[5])
+    if snapshot is None or snapshot is driver.bms_session: return False
+    driver.bms_session = snapshot
+    return restore_session(driver, snapshot)
+
+def setup_driver(profile_dir_name: str, binary_path: str | None = None, extra_arguments: list[str] | None = None,
+                 lean: bool | None = None, session: bool | None = None, display_mode: str | None = None) -> uc.Chrome | None:
+    """
+    Initializes undetected-chromedriver with a persistent profile. extra_arguments are added to the Chromium command line.
+    lean (default LEAN_BROWSER_MODE) adds lean_browser_arguments() and blocks LEAN_BLOCKED_URL_PATTERNS.
+    session (default SESSION_SNAPSHOT_ENABLED) starts a fresh throwaway profile instead (removed when the browser quits)
+    and restores the session snapshot into it; profile_dir_name is then only opened to export a new snapshot.
+    display_mode (default DISPLAY_MODE): 'headed', 'headless' (undetected-chromedriver's headless mode, which keeps its
+    fingerprint patches) or 'xvfb' (headed, on a VirtualDisplay of its own that close_driver stops).
+    """
+    lean = LEAN_BROWSER_MODE if lean is None else lean
+    session = SESSION_SNAPSHOT_ENABLED if session is None else session
+    display_mode = DISPLAY_MODE if display_mode is None else display_mode
+    if display_mode not in DISPLAY_MODES:
+        print(f"\n--- Error setting up WebDriver: unknown display mode '{display_mode}' (use one of {', '.join(DISPLAY_MODES)}). ---")
+        return None
+    if display_mode == "headed" and sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        print("Warning: No desktop session (DISPLAY isn't set). For servers, use the 'headless' or 'xvfb' display mode.")
+    snapshot = current_session_snapshot(profile_dir_name, binary_path, display_mode=display_mode) if session else None
+    driver = display = None
     try:
-        print("Setting up undetected-chromedriver with persistent profile...")
         options = uc.ChromeOptions()
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        profile_path = os.path.join(script_dir, profile_dir_name)
-        print(f"Using profile directory: {profile_path}")
-        options.add_argument(f'--user-data-dir={profile_path}')
+        if session:
+            # No --user-data-dir: undetected-chromedriver makes a temporary profile and deletes it on quit
+            print("Setting up undetected-chromedriver with a throwaway profile" + (" and the saved session..." if snapshot else " (no saved session)..."))
+        else:
+            print("Setting up undetected-chromedriver with persistent profile...")
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            profile_path = os.path.join(script_dir, profile_dir_name)
+            print(f"Using profile directory: {profile_path}")
+            options.add_argument(f'--user-data-dir={profile_path}')
         if binary_path:
             print(f"Setting binary location: {binary_path}")
             options.binary_location = binary_path
         options.add_argument('--no-first-run --no-service-autorun --password-store=basic')
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-dev-shm-usage')
-        driver = uc.Chrome(options=options, use_subprocess=True)
+        if display_mode == "xvfb":
+            display = VirtualDisplay()
+            print(f"Virtual display {display.display} started for this browser.")
+        elif display_mode == "headless":
+            print("Headless mode: no browser window.")
+        for argument in display_arguments(display_mode, display): options.add_argument(argument)
+        if lean:
+            print("Lean mode: images, fonts, video and trackers are blocked.")
+            for argument in lean_browser_arguments(): options.add_argument(argument)
+        for argument in extra_arguments or []: options.add_argument(argument)
+        driver = uc.Chrome(options=options, use_subprocess=True, headless=display_mode == "headless")
+        driver.bms_display = display # Stopped by close_driver
+        if display_mode == "headless": mask_headless_user_agent(driver)
+        if session:
+            driver.bms_session = snapshot or {} # The snapshot restored into this browser ({} = none), see renew_session
+            if snapshot: restore_session(driver, snapshot)
+        if lean: apply_lean_network_rules(driver)
+        driver.bms_launch = (profile_dir_name, binary_path, extra_arguments, lean, session, display_mode) # Lets BrowserSupervisor relaunch it the same way
         print("WebDriver initialized successfully.")
         return driver
     except Exception as e:
         print(f"\n--- Error setting up WebDriver: {e} ---")
         if "cannot find chrome binary" in str(e).lower() and not binary_path: print("Hint: Auto-detection failed. Try setting CHROMIUM_BINARY_PATH.")
         elif "session not created" in str(e).lower() and "version" in str(e).lower(): print("Hint: Version mismatch? Ensure uc is updated.")
+        if driver is None and display is not None: display.stop()
         return None
 
+def driver_health_check(driver: uc.Chrome) -> bool:
+    """True if the driver's session still responds and it isn't sitting on a challenge/block page."""
+    try:
+        driver.execute_script("return document.readyState;")
+        block = detect_block_page(driver)
+    except Exception as e:
+        print(f"Driver health check failed: {e}")
+        return False
+    if block:
+        print(f"Driver health check failed: {block}")
+        return False
+    return True
+
+def discard_launch(future: Future | None):
+    """Gives up on a background driver launch: cancels it if it hasn't started, else closes its driver once it is up."""
+    if future is None or future.cancel(): return
+    future.add_done_callback(lambda done: close_driver(done.result()) if done.exception() is None else None)
+
+class WarmDriverPool:
+    """
+    Keeps one ready driver: launched (and pre-navigated) in the background, health-checked
+    before it is handed out, and kept alive between bookings when returned healthy.
+    """
+
+    def __init__(self, profile_dir_name: str, binary_path: str | None = None, preload_url: str | None = None, extra_arguments: list[str] | None = None,
+                 display_mode: str | None = None):
+        self.profile_dir_name = profile_dir_name
+        self.binary_path = binary_path
+        self.preload_url = preload_url # Opened right after launch so DNS/TLS/cookies are warm
+        self.extra_arguments = extra_arguments
+        self.display_mode = display_mode # None = DISPLAY_MODE
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bms-warm")
+        self._future: Future | None = None
+        self.launch_seconds: float | None = None # How long the last background launch took
+
+    def _launch(self) -> uc.Chrome | None:
+        start = time.perf_counter()
+        driver = setup_driver(self.profile_dir_name, self.binary_path, self.extra_arguments, display_mode=self.display_mode)
+        if driver and self.preload_url:
+            try: driver.get(self.preload_url)
+            except Exception as e: print(f"Warm-up pre-navigation failed: {e}")
+        self.launch_seconds = time.perf_counter() - start
+        return driver
+
+    def prewarm(self):
+        """Starts launching a driver in the background (no-op if one is already launching or ready)."""
+        if self._future is None:
+            self._future = self._executor.submit(self._launch)
+
+    def acquire(self, timeout: float = WARM_DRIVER_ACQUIRE_TIMEOUT) -> uc.Chrome | None:
+        """
+        Returns a healthy driver, waiting for the background launch. Falls back to a cold start. A launch that
+        is still running after `timeout` is left to finish and then closed; it still holds the profile, so the
+        cold start uses a copy of it.
+        """
+        self.prewarm()
+        future, self._future = self._future, None
+        try:
+            driver = future.result(timeout=timeout)
+        except TimeoutError:
+            print(f"Warm driver still starting after {timeout}s. Starting cold on a copy of the profile...")
+            discard_launch(future)
+            return setup_driver(clone_profile(self.profile_dir_name, "cold"), self.binary_path, self.extra_arguments, display_mode=self.display_mode)
+        except Exception as e:
+            print(f"Warm driver not available ({e or 'timed out'}). Starting cold...")
+            driver = None
+        if driver and driver_health_check(driver):
+            return driver
+        close_driver(driver)
+        return setup_driver(self.profile_dir_name, self.binary_path, self.extra_arguments, display_mode=self.display_mode)
+
+    def release(self, driver: uc.Chrome | None):
+        """Keeps a healthy driver ready for the next booking; otherwise closes it and launches a fresh one."""
+        if driver is None: return
+        if self._future is None and driver_health_check(driver):
+            done = Future()
+            done.set_result(driver)
+            self._future = done
+            return
+        close_driver(driver)
+        self.prewarm()
+
+    def shutdown(self):
+        """Closes the ready driver, or the launching one as soon as it is up."""
+        future, self._future = self._future, None
+        discard_launch(future)
+        self._executor.shutdown(wait=False)
+
+# --- Browser Memory Supervision ---
+
+def process_tree_rss_mb(root_pid: int) -> float | None:
+    """Resident memory (MB) of a process and all its descendants. None where /proc isn't available."""
+    children, rss_kb = {}, {}
+    try: entries = os.listdir("/proc")
+    except OSError: return None
+    for entry in entries:
+        if not entry.isdigit(): continue
+        try:
+            with open(f"/proc/{entry}/stat") as f: parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/status") as f:
+                rss_kb[int(entry)] = next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+        except (OSError, ValueError, IndexError):
+            continue # Exited while we were reading, or a kernel thread
+        children.setdefault(parent, []).append(int(entry))
+    if root_pid not in rss_kb: return None
+    total, stack = rss_kb[root_pid], [root_pid]
+    while stack:
+        for child_pid in children.get(stack.pop(), []):
+            total += rss_kb.get(child_pid, 0)
+            stack.append(child_pid)
+    return total / 1024
+
+class BrowserSupervisor:
+    """
+    Keeps a browser that polls for hours within bounds. Each check samples the browser process tree's RSS;
+    past BROWSER_RECYCLE_RSS_MB or BROWSER_RECYCLE_PAGE_LOADS the browser is closed and relaunched with the
+    same settings and profile (cookies survive), inside the idle gap before the next check.
+    Samples are appended to metrics_file (default MEMORY_METRICS_FILE; off when that is None).
+    """
+
+    def __init__(self, driver: uc.Chrome, metrics_file: str | None = None):
+        metrics_file = MEMORY_METRICS_FILE if metrics_file is None else metrics_file
+        self.driver = driver
+        self.page_loads = 0 # Since the current browser was launched
+        self.recycles = 0
+        self.rss_mb: float | None = None # Last sample
+        self.peak_rss_mb = 0.0
+        self.relaunch_seconds = BROWSER_RECYCLE_LAUNCH_ESTIMATE # Last measured restart time
+        self.metrics_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), metrics_file) if metrics_file else None
+
+    def page_loaded(self):
+        self.page_loads += 1
+
+    def sample(self) -> float | None:
+        """Measures the browser's memory and records it (with the page-load and restart counts)."""
+        pid = getattr(self.driver, "browser_pid", None)
+        self.rss_mb = process_tree_rss_mb(pid) if pid else None
+        if self.rss_mb is not None: self.peak_rss_mb = max(self.peak_rss_mb, self.rss_mb)
+        if self.metrics_path:
+            sample = {"time": datetime.now().isoformat(timespec="seconds"), "pid": pid, "rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+                      "page_loads": self.page_loads, "recycles": self.recycles}
+            try:
+                if os.path.exists(self.metrics_path) and os.path.getsize(self.metrics_path) > MEMORY_METRICS_MAX_MB * 1024 * 1024:
+                    os.replace(self.metrics_path, self.metrics_path + ".1")
+                with open(self.metrics_path, "a", encoding="utf-8") as f: f.write(json.dumps(sample) + "\n")
+            except OSError as e:
+                print(f"Could not write memory sample ({e}). Memory samples are off.")
+                self.metrics_path = None
+        return self.rss_mb
+
+    def recycle_reason(self) -> str | None:
+        """Why the browser should be restarted now, or None."""
+        if self.rss_mb is not None and self.rss_mb >= BROWSER_RECYCLE_RSS_MB:
+            return f"using {self.rss_mb:.0f}MB, limit {BROWSER_RECYCLE_RSS_MB}MB"
+        if self.page_loads >= BROWSER_RECYCLE_PAGE_LOADS:
+            return f"{self.page_loads} page loads"
+        return None
+
+    def maintain(self, url: str, idle_seconds: float) -> bool:
+        """
+        Samples the browser and restarts it on url if it is due and the restart fits into idle_seconds
+        (the wait before the next check), so the polling schedule doesn't move. Otherwise it waits for a longer gap.
+
+        Returns:
+            False if a restart was needed but no working browser came back, else True.
+        """
+        self.sample()
+        reason = self.recycle_reason()
+        if reason is None: return True
+        if idle_seconds < self.relaunch_seconds:
+            print(f"Browser restart due ({reason}); waiting for a gap longer than {self.relaunch_seconds:.0f}s.")
+            return True
+        print(f"--- Restarting the browser ({reason}). The profile and its cookies are kept. ---")
+        start = time.perf_counter()
+        launch = getattr(self.driver, "bms_launch", (PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH, None, None))
+        if getattr(self.driver, "bms_session", None) is not None: update_session_snapshot(self.driver) # Carry renewed cookies over
+        close_driver(self.driver)
+        self.driver = setup_driver(*launch)
+        if self.driver is None: return False
+        try:
+            self.driver.get(url)
+        except Exception as e:
+            print(f"Restarted browser could not open {url}: {e}")
+            return False
+        self.relaunch_seconds = time.perf_counter() - start
+        self.recycles += 1
+        self.page_loads = 1
+        print(f"Browser restarted in {self.relaunch_seconds:.1f}s (restart {self.recycles}).")
+        self.sample()
+        return True
+
+def detect_block_page(driver: uc.Chrome) -> str | None:
+    """Returns a description if the current page is a Cloudflare challenge or 403 block page, else None."""
+    page_title_lower = driver.title.lower()
+    current_url_lower = driver.current_url.lower()
+    if "challenge" in current_url_lower or "cloudflare" in page_title_lower or "just a moment" in page_title_lower:
+        return "Cloudflare challenge or block page detected!"
+    if "403 forbidden" in page_title_lower:
+        return "Received a 403 Forbidden error - likely blocked."
+    return None
+
+@traced_stage
 def navigate_to_movie(driver: uc.Chrome, location_slug: str, movie_code: str) -> bool:
     """Navigates to the movie page and checks for blocks."""
     try:
@@ -86,16 +1954,17 @@ def navigate_to_movie(driver: uc.Chrome, location_slug: str, movie_code: str) ->
         print(f"\nNavigating to: {target_url}")
         driver.get(target_url)
         print(f"Page navigation initiated.")
-        time.sleep(3)
+        _settle(3) # driver.get() already blocks until the load event
         page_title = driver.title
         print(f"Page Title after pause: {page_title}")
         page_title_lower = page_title.lower()
-        current_url_lower = driver.current_url.lower()
-        if "challenge" in current_url_lower or "cloudflare" in page_title_lower or "just a moment" in page_title_lower :
-             print("\n*** WARNING: Cloudflare challenge or block page detected! ***")
-             return False
-        elif "403 forbidden" in page_title_lower:
-             print("\n*** WARNING: Received a 403 Forbidden error - likely blocked. ***")
+        block = detect_block_page(driver)
+        if block and block.startswith("Cloudflare") and renew_session(driver):
+            print("Challenge page with the restored session; retrying with a renewed one...")
+            driver.get(target_url)
+            block = detect_block_page(driver)
+        if block:
+             print(f"\n*** WARNING: {block} ***")
              return False
         elif "page not found" in page_title_lower or "oops" in page_title_lower:
              print("\n*** WARNING: Page not found or error page detected. Check location/movie code. ***")
@@ -107,6 +1976,7 @@ def navigate_to_movie(driver: uc.Chrome, location_slug: str, movie_code: str) ->
         print(f"\n--- Error during navigation: {e} ---")
         return False
 
+@traced_stage
 def click_book_tickets(driver: uc.Chrome, timeout: int = BOOK_BUTTON_CHECK_TIMEOUT) -> bool | None:
     """
     Finds and clicks the 'Book tickets' button.
@@ -124,19 +1994,19 @@ def click_book_tickets(driver: uc.Chrome, timeout: int = BOOK_BUTTON_CHECK_TIMEO
         False if another error occurred during the check/click attempt.
     """
     print("\nLooking for the 'Book tickets' button...")
-    book_button_locator = (By.XPATH, "//button[.//span[contains(text(), 'Book tickets')]]")
 
     try:
-        wait = WebDriverWait(driver, timeout)
-        # Wait for the button to be present first
-        wait.until(EC.presence_of_element_located(book_button_locator))
-        # Now wait for it to be clickable
-        book_button = wait.until(EC.element_to_be_clickable(book_button_locator))
+        # One wait for either the clickable button or the "I'm interested" button of an upcoming page
+        match = wait_for_element(driver, ("book_button", "interested_button"), "clickable", timeout, loaded=True)
+        if match.index == 1:
+            print("Page shows 'I'm interested': booking is not open yet.")
+            return None
+        book_button = match.element
 
         print("Button found and clickable. Clicking...")
         # Scroll and click using JavaScript for robustness
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", book_button)
-        time.sleep(0.5)
+        _settle(0.5)
         driver.execute_script("arguments[0].click();", book_button)
         print("Clicked 'Book tickets'.")
         return True # Signal successful click
@@ -151,37 +2021,26 @@ def click_book_tickets(driver: uc.Chrome, timeout: int = BOOK_BUTTON_CHECK_TIMEO
         print(f"\n--- Error interacting with 'Book tickets' button: {e} ---")
         return False # Signal an actual error occurred
 
+@traced_stage
 def select_show_date(driver: uc.Chrome, date_input_str: str, timeout: int = DATE_SELECTION_TIMEOUT) -> bool:
     """Finds and clicks the date element corresponding to the provided input."""
     print("\n--- Date Selection ---")
     try:
         # Basic parsing (already validated in main)
-        parts = date_input_str.split()
-        month_abbr, day_str = parts[0], parts[1]
-        month_map = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
-        month_num = month_map[month_abbr]
-        day_num = int(day_str)
-        day_num_padded = f"{day_num:02d}"
-        current_year = datetime.now().year
-        current_month = datetime.now().month
-        if int(month_num) < current_month: current_year += 1
-        print(f"Assuming year: {current_year}")
-        target_date_id = f"{current_year}{month_num}{day_num_padded}"
+        target_date_id = resolve_date_id(date_input_str)
+        print(f"Assuming year: {target_date_id[:4]}")
         print(f"Looking for date element with ID: {target_date_id}")
 
         # Find and click
-        date_locator = (By.ID, target_date_id)
-        wait = WebDriverWait(driver, timeout)
-        wait.until(EC.presence_of_element_located(date_locator))
-        date_element = wait.until(EC.element_to_be_clickable(date_locator))
+        date_element = wait_for_element(driver, "show_date", "clickable", timeout, date_id=target_date_id).element
         print(f"Found date '{date_input_str}'. Clicking...")
         driver.execute_script("arguments[0].scrollIntoView(true);", date_element)
-        time.sleep(0.5)
+        _settle(0.5)
         driver.execute_script("arguments[0].click();", date_element)
         print("Clicked the date.")
-        time.sleep(2) # Wait for theatre list refresh
+        _settle(2) # Wait for theatre list refresh (event-driven path waits for the list in main)
         return True
-    except (ValueError, KeyError) as parse_error:
+    except (ValueError, KeyError, IndexError) as parse_error:
         print(f"Error processing date input '{date_input_str}': {parse_error}")
         return False
     except TimeoutException:
@@ -191,82 +2050,71 @@ def select_show_date(driver: uc.Chrome, date_input_str: str, timeout: int = DATE
         print(f"\n--- Error during date selection: {e} ---")
         return False
 
-def select_theatre_and_time(driver: uc.Chrome, theatre_name: str, start_time_str: str, end_time_str: str, timeout: int = THEATRE_TIMEOUT) -> bool:
-    """Finds the specified theatre and clicks the first showtime within the given time range."""
+@traced_stage
+def select_theatre_and_time(driver: uc.Chrome, theatre_name: str, start_time_str: str, end_time_str: str, timeout: int = THEATRE_TIMEOUT,
+                            date_input_str: str | None = None, alternatives: list[tuple[str, str, str]] = ()) -> bool:
+    """
+    Finds the specified theatre and clicks the first showtime within the given time range.
+    The whole theatre list is read in one script call (cached per date when date_input_str is given), and
+    names are matched through a TheatreIndex, so small differences from the listed name still match.
+    If the theatre has no show in range, the (theatre, earliest, latest) alternatives are tried in order.
+    """
     print("\n--- Theatre and Time Selection ---")
     print(f"Looking for Theatre: '{theatre_name}'")
     print(f"Desired Time Range: {start_time_str} - {end_time_str}")
-    start_time = parse_time_string(start_time_str)
-    end_time = parse_time_string(end_time_str)
-    if start_time is None or end_time is None: return False
-    if start_time > end_time: print("Warning: Start time > End time.")
-
-    try:
-        # Locate Theatre Block
-        theatre_name_locator = (By.XPATH, f"//div[contains(@class, 'hvoTNx')]")
-        wait = WebDriverWait(driver, timeout)
-        driver.execute_script("window.scrollBy(0, 500);") # Scroll to load theatres
-        time.sleep(1)
-        wait.until(EC.presence_of_element_located(theatre_name_locator))
-        time.sleep(1)
-
-        # Find specific theatre name element
-        safe_theatre_name = theatre_name.replace("'", "\\'").replace('"', '\\"')
-        theatre_name_element_xpath = f"//div[contains(@class, 'hvoTNx') and normalize-space(text())='{safe_theatre_name}']"
-        print(f"Using XPath for name: {theatre_name_element_xpath}")
-        theatre_name_element = driver.find_element(By.XPATH, theatre_name_element_xpath)
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", theatre_name_element)
-        time.sleep(0.5)
-
-        # Find ancestor block containing showtimes
-        theatre_block_xpath = "./ancestor::div[contains(@class, 'sc-e8nk8f-3')][1]"
-        print(f"Looking for theatre block using XPath: {theatre_block_xpath} relative to name")
-        theatre_block = theatre_name_element.find_element(By.XPATH, theatre_block_xpath)
-        print(f"Found theatre block for '{theatre_name}'. Searching showtimes...")
-
-        # Find Showtimes within block
-        showtime_locator = (By.XPATH, ".//div[contains(@class, 'sc-1vhizuf-2')]")
-        WebDriverWait(theatre_block, 5).until(EC.presence_of_element_located(showtime_locator))
-        showtime_elements = theatre_block.find_elements(*showtime_locator)
-        if not showtime_elements:
-            print(f"No showtime elements found for '{theatre_name}'.")
+    choices = []
+    for name, earliest_str, latest_str in [(theatre_name, start_time_str, end_time_str), *alternatives]:
+        start, end = parse_time(earliest_str), parse_time(latest_str)
+        if start.error or end.error:
+            print(f"Error: {start.error or end.error}")
             return False
+        start_time, end_time = start.time, end.time
+        if start_time > end_time: print(f"Warning: Start time > End time for '{name}'.")
+        choices.append((name, start_time, end_time))
+    if alternatives: print(f"Fallback theatres: {', '.join(repr(name) for name, _, _ in alternatives)}")
 
-        # Iterate and Click Matching Showtime
-        showtime_clicked = False
-        for i, showtime_element in enumerate(showtime_elements):
-            try:
-                showtime_text = showtime_element.text.strip()
-                if not showtime_text: continue
-                print(f"  Checking showtime: {showtime_text}")
-                current_show_time = parse_time_string(showtime_text)
-
-                if current_show_time and (start_time <= current_show_time <= end_time):
-                    print(f"  Found matching showtime: {showtime_text}. Clicking...")
-                    clickable_showtime = wait.until(EC.element_to_be_clickable(showtime_element))
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", clickable_showtime)
-                    time.sleep(0.5)
-                    # Use JS click as it might be more reliable for these elements
-                    driver.execute_script("arguments[0].click();", clickable_showtime)
-                    print(f"  Successfully clicked showtime: {showtime_text}")
-                    showtime_clicked = True
-                    break
-                elif not current_show_time: print(f"    -> Could not parse time: {showtime_text}")
-
-            except StaleElementReferenceException:
-                 print(f"  Warning: Showtime element {i} became stale. Skipping.")
-                 continue
-            except Exception as loop_error:
-                 print(f"  Error processing showtime '{showtime_text}': {loop_error}")
-                 continue
-
-        if not showtime_clicked:
-            print(f"\n--- No showtimes found for '{theatre_name}' in range {start_time_str}-{end_time_str}. ---")
-            return False
-        return True
+    try:
+        date_id = resolve_date_id(date_input_str) if date_input_str else None
+        # Wait for the theatre list, then read all of it at once
+        wait_for_element(driver, "theatre_list", "present", timeout)
+        _settle(1)
+        for attempt in range(2):
+            showtimes = cached_showtimes(driver, date_id, refresh=attempt > 0)
+            index = TheatreIndex([show.theatre_name for show in showtimes], THEATRE_ALIASES)
+            print(f"Read {len(showtimes)} showtimes across {len(index.names)} theatres.")
+            wanted = []
+            for name, start_time, end_time in choices:
+                match = index.resolve(name)
+                if match is None:
+                    near = ", ".join(f"'{m.name}' ({m.score:.2f})" for m in index.lookup(name))
+                    print(f"  Could not match theatre '{name}' to the listing." + (f" Closest: {near}" if near else ""))
+                    continue
+                if match.name != name: print(f"  Matched '{name}' to listed theatre '{match.name}' (score {match.score:.2f}).")
+                wanted.append((match.name, start_time, end_time))
+            if not wanted:
+                if attempt == 0 and date_id: continue # The cached snapshot may predate the current list
+                print(f"\n--- ERROR: Could not find theatre named '{theatre_name}'. Check spelling or add an entry to THEATRE_ALIASES. ---")
+                return False
+            for show in showtimes:
+                if show.time is None and any(show.theatre_name == name for name, _, _ in wanted): print(f"    -> Could not parse time: {show.text}")
+            matches = rank_showtimes(showtimes, wanted)
+            if not matches:
+                print(f"\n--- No showtimes found for '{theatre_name}' in range {start_time_str}-{end_time_str}"
+                      + (" (or for any fallback theatre)" if alternatives else "") + ". ---")
+                return False
+            for show in matches:
+                print(f"  Found matching showtime: {show.theatre_name} {show.text} ({show.availability.replace('_', ' ')}). Clicking...")
+                if click_showtime(driver, show):
+                    print(f"  Successfully clicked showtime: {show.text}")
+                    return True
+                record_retry()
+                print(f"  Warning: Showtime '{show.text}' is no longer on the page. Re-reading the theatre list.")
+                break
+        print(f"\n--- ERROR: The theatre list kept changing; could not click a showtime for '{theatre_name}'. ---")
+        return False
 
-    except NoSuchElementException:
-        print(f"\n--- ERROR: Could not find theatre named '{theatre_name}'. Check spelling/capitalization. ---")
+    except (ValueError, KeyError, IndexError) as parse_error:
+        print(f"Error processing date input '{date_input_str}': {parse_error}")
         return False
     except TimeoutException:
          print(f"\n--- ERROR: Timed out waiting for theatre/showtime elements for '{theatre_name}'. ---")
@@ -276,6 +2124,7 @@ def select_theatre_and_time(driver: uc.Chrome, theatre_name: str, start_time_str
         import traceback; traceback.print_exc()
         return False
 
+@traced_stage
 def select_seat_quantity(driver: uc.Chrome, num_seats: int, timeout: int = SEAT_QTY_TIMEOUT) -> bool:
     """
     Selects the desired number of seats from the quantity selection pop-up.
@@ -293,16 +2142,13 @@ def select_seat_quantity(driver: uc.Chrome, num_seats: int, timeout: int = SEAT_
     print(f"Selecting quantity: {num_seats}")
 
     try:
-        wait = WebDriverWait(driver, timeout)
         qty_item_id = f"pop_{num_seats}"
-        qty_item_locator = (By.ID, qty_item_id)
-        select_seats_button_locator = (By.ID, "proceed-Qty") # Changed to div ID
 
         # --- Wait for the specific quantity list item to be present and clickable ---
         # It implicitly waits for the container list as well
         print(f"Waiting for quantity item '{qty_item_id}' to be clickable...")
         try:
-            qty_element = wait.until(EC.element_to_be_clickable(qty_item_locator))
+            qty_element = wait_for_element(driver, "seat_quantity", "clickable", timeout, qty=num_seats).element
             print(f"Found clickable quantity '{num_seats}' (ID: {qty_item_id}).")
         except TimeoutException:
              print(f"\n--- ERROR: Timed out waiting for the seat quantity number '{num_seats}' (ID: {qty_item_id}) to be clickable within {timeout}s. ---")
@@ -316,7 +2162,7 @@ def select_seat_quantity(driver: uc.Chrome, num_seats: int, timeout: int = SEAT_
             print(f"Attempting standard click on quantity '{num_seats}'...")
             # Scroll into view just in case, although wait should handle it
             driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", qty_element)
-            time.sleep(0.5) # Brief pause before click
+            _settle(0.5) # Brief pause before click
             qty_element.click()
             print(f"Clicked quantity '{num_seats}' using standard click.")
         except ElementClickInterceptedException:
@@ -331,12 +2177,12 @@ def select_seat_quantity(driver: uc.Chrome, num_seats: int, timeout: int = SEAT_
              print(f"\n--- ERROR: Failed to click quantity '{num_seats}': {e} ---")
              return False
 
-        time.sleep(1) # Pause after clicking quantity for any UI updates
+        _settle(1) # Pause after clicking quantity for any UI updates
 
         # --- Locate and Click the "Select Seats" button ---
         print("Looking for 'Select Seats' button (ID: proceed-Qty)...")
         try:
-            select_button = wait.until(EC.element_to_be_clickable(select_seats_button_locator))
+            select_button = wait_for_element(driver, "select_seats_button", "clickable", timeout).element
             print("Found 'Select Seats' button. Clicking...")
             driver.execute_script("arguments[0].click();", select_button) # JS click often better for divs acting as buttons
             print("Clicked 'Select Seats' button.")
@@ -360,116 +2206,125 @@ def select_seat_quantity(driver: uc.Chrome, num_seats: int, timeout: int = SEAT_
 # --- Core Functions ---
 # ... (select_seat_quantity function) ...
 
+@traced_stage
 def select_seats_and_pay(driver: uc.Chrome, num_seats_to_select: int, timeout: int = SEAT_SELECTION_TIMEOUT) -> bool:
     """
-    Selects seats by clicking one available seat and checking if the 'Pay'
-    button activates (indicating auto-selection worked). Retries with different
-    seats if needed.
+    Selects seats by clicking the anchor seat of the best contiguous block of
+    available seats and checking if the 'Pay' button activates (indicating
+    auto-selection worked). Retries with the next-best block if needed.
 
     Args:
         driver: The initialized WebDriver instance.
-        num_seats_to_select: The number of seats required (used for logging).
+        num_seats_to_select: The number of seats required (size of the block to look for).
         timeout: Max time for the overall process including finding seats initially.
 
     Returns:
         True if seats were selected and pay button clicked, False otherwise.
     """
-    print("\n--- Seat Selection (Auto-Select Strategy) ---")
-    print(f"Trying to select {num_seats_to_select} seats by clicking one and checking...")
+    print("\n--- Seat Selection (Best Block Strategy) ---")
+    print(f"Trying to select {num_seats_to_select} seats together by clicking the best block's first seat...")
 
-    pay_button_locator = (By.ID, "btmcntbook")
-    available_seat_locator = (By.XPATH, "//div[contains(@class, 'seatI')]/a[contains(@class, '_available')]")
-    main_wait = WebDriverWait(driver, timeout)
-    # Short wait specifically for checking the pay button after each click
-    check_wait = WebDriverWait(driver, PAY_BUTTON_CHECK_TIMEOUT)
+    pay_button_locator = PAY_BUTTON_LOCATOR
+    stream_timeout = contextlib.ExitStack() # Puts the script timeout back once the change stream is done with
 
     try:
-        # --- Wait for the seat layout and find initial available seats ---
+        # --- Wait for the seat layout and snapshot the whole seat map in one call ---
         print("Waiting for available seats to appear...")
         try:
-            main_wait.until(EC.presence_of_element_located(available_seat_locator))
-            print("Seat layout detected. Finding available seats...")
-            time.sleep(2) # Allow dynamic elements to settle
-            available_seat_elements = driver.find_elements(*available_seat_locator)
+            wait_for_element(driver, "available_seat", "present", timeout)
+            print("Seat layout detected. Reading seat map...")
+            _settle(2) # Allow dynamic elements to settle
+            # Start the change stream first, so nothing that changes after the snapshot is missed
+            stream = SEAT_CHANGE_STREAM_ENABLED and watch_seat_changes(driver) is not None
+            if stream: stream_timeout.enter_context(script_timeout(driver, PAY_BUTTON_CHECK_TIMEOUT + 5)) # Longest in-page wait, plus slack
+            seat_map = snapshot_seat_map(driver)
         except TimeoutException:
              print(f"\n--- ERROR: Timed out waiting for any available seats to appear within {timeout}s. ---")
              return False
 
-
-        if not available_seat_elements:
+        grid = SeatGrid(seat_map, SEAT_PREFERRED_ROWS)
+        if grid.available_count() == 0:
             print("\n--- ERROR: No available seat elements found on the page. ---")
             return False
 
-        print(f"Found {len(available_seat_elements)} initially available seat elements.")
+        print(f"Seat map has {len(seat_map)} seats, {grid.available_count()} available, "
+              f"{len(grid.best_blocks(num_seats_to_select))} blocks of {num_seats_to_select}+ together.")
 
-        # --- Loop through available seats, click one, check pay button ---
+        # --- Click the anchor of the best-scoring block, check pay button, re-read the map on a miss ---
         pay_button_found_and_clickable = False
-        tried_seat_ids = set() # Keep track of seats we already tried
-
-        for attempt in range(min(MAX_SEAT_CLICK_ATTEMPTS, len(available_seat_elements))):
-            # --- Select a seat to try ---
-            # Simple strategy: iterate through the list found initially.
-            # More complex: Re-find elements, parse IDs, prioritize middle rows etc.
-            # Let's stick to the initial list for now.
-            seat_link = available_seat_elements[attempt] # This might go stale, better to re-find based on ID if possible
+        tried_seat_ids = set() # Keep track of anchors we already tried
+        single_seat_attempts = 0 # Fallback clicks once no contiguous block is left
+        attempt = 0
+
+        for attempt in range(MAX_SEAT_CLICK_ATTEMPTS):
+            if attempt > 0:
+                record_retry()
+                cleared = clear_seat_selection(driver) # Seats clicked for the block that failed would pile up with the next one's
+                if cleared:
+                    print(f"  Cleared {cleared} seat(s) left selected by the last attempt.")
+                    if not stream: grid.apply_snapshot(snapshot_seat_map(driver))
+            if stream and attempt > 0:
+                # Apply what changed since the last check, so a block someone just took isn't clicked
+                for kind, changed_id, status in wait_for_seat_changes(driver, 0) or []:
+                    if kind == "seat": grid.update(changed_id, status)
+            block = next((b for b in grid.best_blocks(num_seats_to_select) if b.seat_ids[0] not in tried_seat_ids), None)
+            if block is None:
+                # No contiguous block left; fall back to a few single seats and let the site's auto-select decide
+                if single_seat_attempts >= MAX_SINGLE_SEAT_ATTEMPTS:
+                    print(f"  No contiguous block left and {MAX_SINGLE_SEAT_ATTEMPTS} single seats tried. Giving up.")
+                    break
+                block = next((b for b in grid.best_blocks(1) if b.seat_ids[0] not in tried_seat_ids), None)
+                single_seat_attempts += 1
+            if block is None:
+                print("  No untried available seats left.")
+                break
+            seat_id = block.seat_ids[0]
+            tried_seat_ids.add(seat_id)
+            print(f"\nAttempt {attempt+1}/{MAX_SEAT_CLICK_ATTEMPTS}: Trying seat ID: {seat_id} (row {block.row}, block {'-'.join(block.seat_ids)}, score {block.score:.2f})")
 
             try:
-                # --- Get Seat ID --- Find parent div and get ID
-                parent_div = seat_link.find_element(By.XPATH, "./parent::div")
-                seat_id = parent_div.get_attribute("id")
-
-                if not seat_id or '_' not in seat_id:
-                    print(f"  Attempt {attempt+1}: Skipping seat - invalid or missing ID.")
+                # --- Scroll to and select the seat in a single script call ---
+                if not click_seat(driver, seat_id):
+                    print(f"  Seat {seat_id} is no longer on the page. Skipping.")
+                    grid.update(seat_id, "sold")
                     continue
-
-                if seat_id in tried_seat_ids:
-                     print(f"  Attempt {attempt+1}: Skipping seat {seat_id} - already tried.")
-                     continue
-
-                print(f"\nAttempt {attempt+1}/{MAX_SEAT_CLICK_ATTEMPTS}: Trying seat ID: {seat_id}")
-                tried_seat_ids.add(seat_id)
-
-                # --- Click the seat using JavaScript ---
-                # Re-locate element just before clicking for freshness
-                current_seat_link = driver.find_element(By.XPATH, f"//div[@id='{seat_id}']/a")
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", current_seat_link)
-                time.sleep(0.3)
-                driver.execute_script(f"fnSelectSeat('{seat_id}');")
                 print(f"  Clicked seat {seat_id}. Waiting {PAY_BUTTON_CHECK_TIMEOUT}s for Pay button...")
-                time.sleep(0.5) # Small pause for JS execution
+                if stream:
+                    # --- Follow the in-page change stream: react as soon as the button shows or the block is taken ---
+                    outcome = wait_for_pay_button(driver, grid, block)
+                    if outcome is None:
+                        print("  Seat change stream stopped; falling back to polling.")
+                        stream = False
+                    elif outcome == "taken":
+                        print(f"  Block {'-'.join(block.seat_ids)} was just taken by someone else. Moving on...")
+                        continue
+                    elif outcome == "timeout":
+                        print(f"  Pay button not clickable after clicking {seat_id}. {grid.available_count()} seats still available.")
+                        continue
+                _settle(0.5) # Small pause for JS execution
 
                 # --- Check if Pay button is now clickable ---
                 try:
-                    pay_button = check_wait.until(EC.element_to_be_clickable(pay_button_locator))
+                    pay_button = wait_for_element(driver, "pay_button", "clickable", PAY_BUTTON_CHECK_TIMEOUT).element
                     print(f"  SUCCESS: Pay button (ID: {pay_button_locator[1]}) is now clickable after clicking {seat_id}.")
                     pay_button_found_and_clickable = True
                     # Click the pay button now that we know it's ready
                     print("  Clicking the 'Pay' button...")
                     driver.execute_script("arguments[0].scrollIntoView(true);", pay_button)
-                    time.sleep(0.5)
+                    _settle(0.5)
                     driver.execute_script("arguments[0].click();", pay_button)
                     print("  Clicked 'Pay' button.")
                     break # Exit the attempt loop
 
                 except TimeoutException:
-                    print(f"  Pay button not clickable after clicking {seat_id}. Trying next seat...")
-                    # Optional: Add code here to explicitly clear selection if necessary
-                    # clear_button = driver.find_elements(By.XPATH, "//a[contains(@onclick, 'fnClearSel')]")
-                    # if clear_button and clear_button[0].is_displayed():
-                    #    print("  Clearing selection...")
-                    #    clear_button[0].click()
-                    #    time.sleep(0.5)
+                    print(f"  Pay button not clickable after clicking {seat_id}. Re-reading seat map...")
+                    changed = grid.apply_snapshot(snapshot_seat_map(driver)) # Pick up seats others just took
+                    if changed: print(f"  Seat map changed in {changed} row(s).")
                     continue # Continue to the next attempt
 
             except StaleElementReferenceException:
                 print(f"  Attempt {attempt+1}: StaleElementReferenceException for seat {seat_id}. Skipping.")
-                # Remove ID if it was added, as the element ref was bad
-                if seat_id and seat_id in tried_seat_ids: tried_seat_ids.remove(seat_id)
                 continue
-            except NoSuchElementException:
-                 print(f"  Attempt {attempt+1}: NoSuchElementException trying to process seat {seat_id}. Maybe it changed?")
-                 if seat_id and seat_id in tried_seat_ids: tried_seat_ids.remove(seat_id)
-                 continue
             except Exception as click_error:
                 print(f"  Attempt {attempt+1}: Error clicking or checking seat {seat_id}: {click_error}")
                 continue # Try next seat
@@ -479,6 +2334,7 @@ def select_seats_and_pay(driver: uc.Chrome, num_seats_to_select: int, timeout: i
             print("\nSeat selection successful and 'Pay' button clicked.")
             return True
         else:
+            with contextlib.suppress(Exception): clear_seat_selection(driver) # Leave no stray seats held for a retry
             print(f"\n--- ERROR: Failed to select {num_seats_to_select} seats and activate Pay button after {attempt+1} attempts. ---")
             return False
 
@@ -486,8 +2342,11 @@ def select_seats_and_pay(driver: uc.Chrome, num_seats_to_select: int, timeout: i
         print(f"\n--- Unexpected Error during seat selection/pay: {e} ---")
         import traceback; traceback.print_exc()
         return False
+    finally:
+        stream_timeout.close()
 
-def accept_terms_and_conditions(driver: uc.Chrome, timeout: int = ACCEPT_TC_TIMEOUT) -> bool:
+@traced_stage
+def accept_terms_and_conditions(driver: uc.Chrome, timeout: float = ACCEPT_TC_TIMEOUT) -> bool:
     """
     Finds and clicks the 'Accept' button on the Terms & Conditions pop-up/page.
 
@@ -499,16 +2358,15 @@ def accept_terms_and_conditions(driver: uc.Chrome, timeout: int = ACCEPT_TC_TIME
         True if the button was clicked, False otherwise.
     """
     print("\n--- Terms & Conditions Acceptance ---")
-    accept_button_locator = (By.ID, "btnPopupAccept")
+    accept_button_locator = ACCEPT_TC_LOCATOR
 
     try:
-        wait = WebDriverWait(driver, timeout)
         print(f"Waiting for T&C 'Accept' button (ID: {accept_button_locator[1]}) to be clickable...")
-        accept_button = wait.until(EC.element_to_be_clickable(accept_button_locator))
+        accept_button = wait_for_element(driver, "accept_terms", "clickable", timeout).element
 
         print("Found 'Accept' button. Clicking...")
         driver.execute_script("arguments[0].scrollIntoView(true);", accept_button) # Scroll just in case
-        time.sleep(0.5)
+        _settle(0.5)
         driver.execute_script("arguments[0].click();", accept_button) # JS click is reliable for divs
         print("Clicked T&C 'Accept' button.")
         return True
@@ -525,7 +2383,8 @@ def accept_terms_and_conditions(driver: uc.Chrome, timeout: int = ACCEPT_TC_TIME
         import traceback; traceback.print_exc()
         return False
 
-def proceed_on_summary(driver: uc.Chrome, timeout: int = SUMMARY_PROCEED_TIMEOUT) -> bool:
+@traced_stage
+def proceed_on_summary(driver: uc.Chrome, timeout: float = SUMMARY_PROCEED_TIMEOUT) -> bool:
     """
     Finds and clicks the 'Proceed' button on the booking summary page.
 
@@ -537,18 +2396,16 @@ def proceed_on_summary(driver: uc.Chrome, timeout: int = SUMMARY_PROCEED_TIMEOUT
         True if the button was clicked, False otherwise.
     """
     print("\n--- Booking Summary ---")
-    proceed_button_locator = (By.ID, "prePay") # The div with onclick='fnPrePay()'
+    proceed_button_locator = SUMMARY_PROCEED_LOCATOR
 
     try:
-        wait = WebDriverWait(driver, timeout)
         print(f"Waiting for Summary 'Proceed' button (ID: {proceed_button_locator[1]}) to be clickable...")
-        # Ensure it's visible first, then clickable, as it might change state
-        wait.until(EC.visibility_of_element_located(proceed_button_locator))
-        proceed_button = wait.until(EC.element_to_be_clickable(proceed_button_locator))
+        # Visible, enabled and not covered, in one check: it replaces the 'Please wait...' button when ready
+        proceed_button = wait_for_element(driver, "summary_proceed", "clickable", timeout).element
 
         print("Found 'Proceed' button. Clicking...")
         driver.execute_script("arguments[0].scrollIntoView({block: 'nearest'});", proceed_button) # Scroll
-        time.sleep(0.5)
+        _settle(0.5)
         driver.execute_script("arguments[0].click();", proceed_button) # JS click for the div
         print("Clicked Summary 'Proceed' button.")
         return True
@@ -572,7 +2429,8 @@ def proceed_on_summary(driver: uc.Chrome, timeout: int = SUMMARY_PROCEED_TIMEOUT
         import traceback; traceback.print_exc()
         return False
 
-def enter_contact_details(driver: uc.Chrome, phone_number: str, timeout: int = CONTACT_DETAILS_TIMEOUT) -> bool:
+@traced_stage
+def enter_contact_details(driver: uc.Chrome, phone_number: str, timeout: float = CONTACT_DETAILS_TIMEOUT) -> bool:
     """
     Enters the mobile number on the payment page and clicks Continue.
 
@@ -585,26 +2443,22 @@ def enter_contact_details(driver: uc.Chrome, phone_number: str, timeout: int = C
         True if details entered and continue clicked, False otherwise.
     """
     print("\n--- Entering Contact Details ---")
-    mobile_input_locator = (By.ID, "txtMobile")
-    # This XPath targets the 'Continue' link within the specific div
-    continue_button_locator = (By.XPATH, "//div[@id='dContinueContactSec']/a[contains(@onclick, 'pay.fnValUserDetails')]")
+    mobile_input_locator = MOBILE_INPUT_LOCATOR
 
     try:
-        wait = WebDriverWait(driver, timeout)
-
         # --- Enter Mobile Number ---
         print(f"Waiting for mobile number input (ID: {mobile_input_locator[1]})...")
-        mobile_input = wait.until(EC.visibility_of_element_located(mobile_input_locator))
+        mobile_input = wait_for_element(driver, "mobile_input", "visible", timeout).element
         print("Found mobile input. Clearing and entering number...")
         mobile_input.clear() # Clear any default value like +91
-        time.sleep(0.3)
+        _settle(0.3)
         mobile_input.send_keys(phone_number)
         print(f"Entered phone number: {phone_number}")
-        time.sleep(0.5) # Pause after sending keys
+        _settle(0.5) # Pause after sending keys
 
         # --- Click Continue Button ---
         print(f"Waiting for contact details 'Continue' button to be clickable...")
-        continue_button = wait.until(EC.element_to_be_clickable(continue_button_locator))
+        continue_button = wait_for_element(driver, "contact_continue", "clickable", timeout).element
         print("Found 'Continue' button. Clicking...")
         # Use JS click as it's an <a> tag with complex onclick
         driver.execute_script("arguments[0].click();", continue_button)
@@ -625,7 +2479,8 @@ def enter_contact_details(driver: uc.Chrome, phone_number: str, timeout: int = C
         import traceback; traceback.print_exc()
         return False
 
-def select_phonepe_upi(driver: uc.Chrome, timeout: int = PAYMENT_OPTION_TIMEOUT) -> bool:
+@traced_stage
+def select_phonepe_upi(driver: uc.Chrome, timeout: float = PAYMENT_OPTION_TIMEOUT) -> bool:
     """
     Selects PhonePe UPI as the payment method.
 
@@ -637,19 +2492,14 @@ def select_phonepe_upi(driver: uc.Chrome, timeout: int = PAYMENT_OPTION_TIMEOUT)
         True if PhonePe was selected, False otherwise.
     """
     print("\n--- Selecting Payment Method ---")
-    # This XPath targets the label based on the specific onclick JS call for PhonePe UPI
-    phonepe_label_locator = (By.XPATH, "//label[contains(@onclick, \"pay.fnSetUPI\") and contains(@onclick, \"'PHONEPE'\")]")
 
     try:
-        wait = WebDriverWait(driver, timeout)
         print("Waiting for UPI options to load and PhonePe label to be clickable...")
-        # Wait for the general UPI section maybe? Or directly for the label.
-        # Let's wait directly for the label to be clickable.
-        phonepe_label = wait.until(EC.element_to_be_clickable(phonepe_label_locator))
+        phonepe_label = wait_for_element(driver, "phonepe_option", "clickable", timeout).element
 
         print("Found PhonePe UPI label. Clicking...")
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", phonepe_label) # Scroll to it
-        time.sleep(0.5)
+        _settle(0.5)
         # Standard click should work on labels, but JS is also safe
         phonepe_label.click()
         # driver.execute_script("arguments[0].click();", phonepe_label)
@@ -669,7 +2519,8 @@ def select_phonepe_upi(driver: uc.Chrome, timeout: int = PAYMENT_OPTION_TIMEOUT)
         import traceback; traceback.print_exc()
         return False
 
-def enter_upi_details_and_pay(driver: uc.Chrome, upi_username: str, upi_handle: str, timeout: int = UPI_PAYMENT_TIMEOUT) -> bool:
+@traced_stage
+def enter_upi_details_and_pay(driver: uc.Chrome, upi_username: str, upi_handle: str, timeout: float = UPI_PAYMENT_TIMEOUT) -> bool:
     """
     Enters the UPI username and handle into their respective fields and
     clicks the 'MAKE PAYMENT' button.
@@ -684,48 +2535,34 @@ def enter_upi_details_and_pay(driver: uc.Chrome, upi_username: str, upi_handle:
         True if details entered and payment button clicked, False otherwise.
     """
     print("\n--- Entering UPI Details and Making Payment ---")
-    upi_username_locator = (By.ID, "txtUPIId")
+    upi_username_locator = UPI_USERNAME_LOCATOR
     upi_handle_locator = (By.ID, "dUPIVPADrop")
-    # More specific locator for the payment button
-    make_payment_button_locator = (By.XPATH, "//button[contains(@onclick, \"pay.fnPayUPI('UPI')\") and contains(normalize-space(), 'MAKE PAYMENT')]")
-    # Fallback locator if the above fails (less specific)
-    # make_payment_button_locator_fallback = (By.XPATH, "//button[@data-role='PayNowButton']")
 
     try:
-        wait = WebDriverWait(driver, timeout)
-
         # --- Enter UPI Username ---
         print(f"Waiting for UPI username input (ID: {upi_username_locator[1]})...")
-        username_input = wait.until(EC.visibility_of_element_located(upi_username_locator))
+        username_input = wait_for_element(driver, "upi_username", "visible", timeout).element
         print("Found UPI username input. Clearing and entering...")
         username_input.clear()
-        time.sleep(0.2)
+        _settle(0.2)
         username_input.send_keys(upi_username)
         print(f"Entered UPI username: {upi_username}")
-        time.sleep(0.3)
+        _settle(0.3)
 
         # --- Enter UPI Handle ---
         print(f"Waiting for UPI handle input (ID: {upi_handle_locator[1]})...")
-        handle_input = wait.until(EC.visibility_of_element_located(upi_handle_locator))
+        handle_input = wait_for_element(driver, "upi_handle", "visible", timeout).element
         print("Found UPI handle input. Clearing and entering...")
         handle_input.clear()
-        time.sleep(0.2)
+        _settle(0.2)
         handle_input.send_keys(upi_handle)
         print(f"Entered UPI handle: {upi_handle}")
-        time.sleep(0.5) # Pause after filling fields
+        _settle(0.5) # Pause after filling fields
 
         # --- Click Make Payment Button ---
         print("Waiting for 'MAKE PAYMENT' button to be clickable...")
-        try:
-            pay_button = wait.until(EC.element_to_be_clickable(make_payment_button_locator))
-        except TimeoutException:
-            print("Primary locator timed out. Trying fallback locator for 'MAKE PAYMENT' button...")
-            # Uncomment fallback if needed, but primary is preferred
-            # pay_button = wait.until(EC.element_to_be_clickable(make_payment_button_locator_fallback))
-            # If fallback is also used and fails, the outer try/except will catch it.
-            # For now, let's assume the primary locator is correct and let it fail if not found.
-            raise # Re-raise the TimeoutException if primary locator fails
-
+        # The specific onclick locator first, then the PayNowButton role and the button text (LOCATOR_STRATEGIES), all in one wait
+        pay_button = wait_for_element(driver, "make_payment", "clickable", timeout).element
 
         print("Found 'MAKE PAYMENT' button. Clicking...")
         # Standard click should be fine for a <button>
@@ -746,6 +2583,427 @@ def enter_upi_details_and_pay(driver: uc.Chrome, upi_username: str, upi_handle:
         import traceback; traceback.print_exc()
         return False
 
+# --- Fast Checkout ---
+# Async: drives the payment page through its steps in one script call. arguments[0] is a list of steps
+# {stage, fields: [[locators, text], ...], click: locators, error: locators or null, timeout: ms}, arguments[1] the poll
+# interval (ms). Each step waits for its fields and button, sets the values through the native value setter (so
+# framework-bound inputs notice) with input/change events, then clicks. Returns ['submitted', null] right before
+# the last click (the page may navigate away), or [stage, reason] where it stopped: 'missing' (the step never showed)
+# or 'rejected' (a value didn't stick, or the previous step's validation error showed).
+FAST_CHECKOUT_JS = """
+var steps = arguments[0], poll = arguments[1], done = arguments[arguments.length - 1];
+function find(kind, value) {
+    if (kind === "id") { var el = document.getElementById(value); return el ? [el] : []; }
+    if (kind === "css") return Array.prototype.slice.call(document.querySelectorAll(value));
+    var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null), found = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) found.push(snapshot.snapshotItem(i));
+    return found;
+}
+function visible(el) {
+    var style = getComputedStyle(el), rect = el.getBoundingClientRect();
+    return style.visibility !== "hidden" && style.display !== "none" && parseFloat(style.opacity) > 0 && rect.width > 0 && rect.height > 0;
+}
+function first(locators) {
+    for (var i = 0; locators && i < locators.length; i++) {
+        var found = find(locators[i][0], locators[i][1]);
+        for (var j = 0; j < found.length; j++) if (visible(found[j])) return found[j];
+    }
+    return null;
+}
+function fill(el, text) {
+    var setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), "value").set;
+    el.focus();
+    setter.call(el, text);
+    el.dispatchEvent(new Event("input", {bubbles: true}));
+    el.dispatchEvent(new Event("change", {bubbles: true}));
+    el.blur();
+    return el.value === text;
+}
+function run(index) {
+    var step = steps[index], previous = steps[index - 1], end = Date.now() + step.timeout;
+    (function check() {
+        if (previous && first(previous.error)) { done([previous.stage, "rejected"]); return; }
+        var ready = first(step.click) && step.fields.every(function (field) { return first(field[0]); });
+        if (!ready) {
+            if (Date.now() >= end) done([step.stage, "missing"]); else setTimeout(check, poll);
+            return;
+        }
+        for (var i = 0; i < step.fields.length; i++) {
+            if (!fill(first(step.fields[i][0]), step.fields[i][1])) { done([step.stage, "rejected"]); return; }
+        }
+        var button = first(step.click);
+        button.scrollIntoView({block: "center"});
+        if (index === steps.length - 1) { done(["submitted", null]); button.click(); return; }
+        button.click();
+        run(index + 1);
+    })();
+}
+run(0);
+"""
+
+class CheckoutOutcome(NamedTuple):
+    stage: str | None # Stage to continue from with typed entry; None once payment was submitted
+    reason: str | None # 'missing' (the stage's elements never showed), 'rejected' (validation refused the values) or 'error' (script failed)
+    submitted_at: float | None # perf_counter() of the 'MAKE PAYMENT' click
+
+def _checkout_locators(name: str) -> list[list[str]]:
+    return [_js_locator(locator) for locator in LOCATORS.locators(name)]
+
+@traced_stage
+def fast_checkout(driver: uc.Chrome, phone_number: str, upi_username: str, upi_handle: str,
+                  timeouts: dict[str, float] | None = None) -> CheckoutOutcome:
+    """
+    Fills the mobile number, picks PhonePe UPI, fills the UPI ID and clicks 'MAKE PAYMENT', all in one script call.
+    After the click, watches FAST_CHECKOUT_CONFIRM_TIMEOUT seconds for the UPI validation error.
+
+    Args:
+        driver: The initialized WebDriver instance, on the payment page.
+        phone_number: The 10-digit phone number string.
+        upi_username: The part of the UPI ID before the '@'.
+        upi_handle: The part of the UPI ID after the '@'.
+        timeouts: Seconds each stage ('contact_details', 'payment_option', 'upi_payment') may wait for its elements
+            (defaults: the stages' own timeouts).
+
+    Returns:
+        CheckoutOutcome: stage None if payment was submitted, else the stage where typed entry should take over.
+    """
+    print("\n--- Fast Checkout: filling the payment page in one step ---")
+    timeouts = {"contact_details": CONTACT_DETAILS_TIMEOUT, "payment_option": PAYMENT_OPTION_TIMEOUT,
+                "upi_payment": UPI_PAYMENT_TIMEOUT, **(timeouts or {})}
+    steps = [
+        {"stage": "contact_details", "fields": [[_checkout_locators("mobile_input"), phone_number]],
+         "click": _checkout_locators("contact_continue"), "error": _checkout_locators("contact_error")},
+        {"stage": "payment_option", "fields": [], "click": _checkout_locators("phonepe_option"), "error": None},
+        {"stage": "upi_payment", "fields": [[_checkout_locators("upi_username"), upi_username], [_checkout_locators("upi_handle"), upi_handle]],
+         "click": _checkout_locators("make_payment"), "error": _checkout_locators("upi_error")},
+    ]
+    for step in steps: step["timeout"] = int(timeouts[step["stage"]] * 1000)
+    payment_url = driver.current_url
+    try:
+        with script_timeout(driver, sum(timeouts.values()) + 5):
+            stage, reason = driver.execute_async_script(FAST_CHECKOUT_JS, steps, int(FAST_WAIT_POLL_INTERVAL * 1000))
+    except Exception as e:
+        print(f"  Fast checkout script failed ({e}); entering the details by typing instead.")
+        return CheckoutOutcome("contact_details", "error", None)
+    if stage != "submitted":
+        print(f"  Fast checkout stopped at '{stage}': {'the page rejected the values' if reason == 'rejected' else 'its elements never showed'}.")
+        return CheckoutOutcome(stage, reason, None)
+    submitted_at = time.perf_counter()
+
+    # --- The page either leaves for the payment request or shows the UPI validation error ---
+    error_specs = _checkout_locators("upi_error")
+    def _outcome(d):
+        if d.current_url != payment_url: return "left"
+        return "rejected" if d.execute_script(FAST_WAIT_JS, error_specs, "visible", False) else False
+    try:
+        outcome = TracedWait(driver, FAST_CHECKOUT_CONFIRM_TIMEOUT, poll_frequency=FAST_WAIT_POLL_INTERVAL).until(_outcome)
+    except TimeoutException:
+        outcome = "quiet" # No error shown: the payment request is in flight
+    if outcome == "rejected":
+        print("  The UPI ID was rejected after 'MAKE PAYMENT'.")
+        return CheckoutOutcome("upi_payment", "rejected", None)
+    print("Clicked 'MAKE PAYMENT' (fast checkout).")
+    return CheckoutOutcome(None, None, submitted_at)
+
+class RaceBrowsers:
+    """
+    Browsers for a coming target race, launched while the release is still being watched: each on its own copy
+    of the profile (clone_profile skips the lock files, so the watching browser can keep running) and already on
+    the movie page. The watching browser itself races the first target, so these are workers 1..count.
+    """
+
+    def __init__(self, count: int, movie_url: str, profile_dir_name: str, display_mode: str | None = None):
+        self.movie_url = movie_url
+        self.profile_dir_name = profile_dir_name
+        self.display_mode = display_mode # None = DISPLAY_MODE
+        self._executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="bms-race-launch")
+        self._futures = {index: self._executor.submit(self._launch, index) for index in range(1, count + 1)}
+        print(f"(Starting {count} race browser(s) in the background...)")
+
+    def _launch(self, index: int) -> uc.Chrome | None:
+        driver = setup_driver(clone_profile(self.profile_dir_name, f"race{index}"), CHROMIUM_BINARY_PATH, display_mode=self.display_mode)
+        if driver:
+            try: driver.get(self.movie_url)
+            except Exception as e: print(f"Race browser {index} pre-navigation failed: {e}")
+        return driver
+
+    def take(self, index: int, timeout: float = WARM_DRIVER_ACQUIRE_TIMEOUT) -> uc.Chrome | None:
+        """Worker `index`'s browser, once it is up and healthy. None if it has none (the worker starts one cold)."""
+        future = self._futures.pop(index, None)
+        if future is None: return None
+        try:
+            driver = future.result(timeout=timeout)
+        except Exception as e:
+            print(f"Race browser {index} not available ({e or 'timed out'}).")
+            discard_launch(future)
+            return None
+        if driver and driver_health_check(driver): return driver
+        close_driver(driver)
+        return None
+
+    def close(self):
+        """Closes every browser no worker took (launching ones as soon as they are up)."""
+        futures, self._futures = list(self._futures.values()), {}
+        for future in futures: discard_launch(future)
+        self._executor.shutdown(wait=False)
+
+def _race_worker(worker_index: int, target: BookingTarget, location_slug: str, movie_code: str, num_seats: int,
+                 winner_event: threading.Event, drivers: dict, lock: threading.Lock, open_browser: Callable[[int], uc.Chrome | None],
+                 tracer: PipelineTracer | None = None, at_show_date: bool = False) -> dict:
+    """
+    Runs one target up to the seat layout in its own browser (open_browser(worker_index)). Stops between stages
+    once another worker has won. at_show_date: that browser has already clicked 'Book tickets' for the target's date.
+    Returns a result dict: worker, target, stage reached, time to seat layout and, for a winner, the driver.
+    """
+    if tracer is not None: # Worker spans go into the caller's trace, one row per worker thread
+        with tracer.activate():
+            return _race_worker(worker_index, target, location_slug, movie_code, num_seats, winner_event, drivers, lock, open_browser, at_show_date=at_show_date)
+    prefix = f"[worker {worker_index}]"
+    result = {"worker": worker_index, "target": target, "stage": "start", "time_to_seat_layout": None, "won": False, "driver": None}
+    start = time.perf_counter()
+    try:
+        driver = open_browser(worker_index)
+        if not driver: result["stage"] = "setup_failed"; return result
+        with lock: drivers[worker_index] = driver
+
+        def stop(stage: str) -> dict:
+            result["stage"] = "cancelled" if winner_event.is_set() else f"{stage}_failed"
+            return result
+
+        if not at_show_date:
+            if winner_event.is_set() or not navigate_to_movie(driver, location_slug, movie_code): return stop("navigate")
+            if winner_event.is_set() or click_book_tickets(driver) is not True: return stop("book_tickets")
+            wait_for_stage_ready(driver, "book_tickets", LOCATORS.locators("show_date", date_id=resolve_date_id(target.date_input_str)))
+        if winner_event.is_set() or not select_show_date(driver, target.date_input_str): return stop("show_date")
+        wait_for_stage_ready(driver, "show_date", LOCATORS.locators("theatre_list"))
+        if winner_event.is_set() or not select_theatre_and_time(driver, target.theatre_name, target.start_time_str, target.end_time_str, date_input_str=target.date_input_str): return stop("theatre_and_time")
+        wait_for_stage_ready(driver, "theatre_and_time", LOCATORS.locators("seat_quantity", qty=num_seats))
+        if winner_event.is_set() or not select_seat_quantity(driver, num_seats): return stop("seat_quantity")
+
+        # --- Seat layout reached: does it have enough seats together? ---
+        wait_for_element(driver, "available_seat", "present", SEAT_SELECTION_TIMEOUT)
+        result["time_to_seat_layout"] = time.perf_counter() - start
+        result["stage"] = "seat_layout"
+        grid = SeatGrid(snapshot_seat_map(driver), SEAT_PREFERRED_ROWS)
+        if not grid.best_blocks(num_seats) and grid.available_count() < num_seats:
+            print(f"{prefix} Seat layout for '{target.theatre_name}' has too few seats ({grid.available_count()}).")
+            result["stage"] = "not_enough_seats"
+            return result
+        with lock:
+            if winner_event.is_set(): result["stage"] = "lost_race"; return result
+            winner_event.set()
+            drivers.pop(worker_index, None) # The winner's driver is handed over, not closed
+        print(f"{prefix} Won the race: '{target.theatre_name}' at the seat layout after {result['time_to_seat_layout']:.2f}s.")
+        result["won"] = True
+        result["driver"] = driver
+        return result
+    except Exception as e:
+        if winner_event.is_set(): result["stage"] = "cancelled" # Our browser was closed under us
+        else:
+            print(f"{prefix} Error: {e}")
+            result["stage"] = f"{result['stage']}_error"
+        return result
+
+def race_targets(targets: list[BookingTarget], location_slug: str, movie_code: str, num_seats: int,
+                 profile_dir_name: str = PROFILE_FOLDER_NAME, display_mode: str | None = None, first_driver: uc.Chrome | None = None,
+                 browsers: RaceBrowsers | None = None) -> tuple[uc.Chrome, BookingTarget] | None:
+    """
+    Races a ranked list of targets in a bounded pool of browsers (in display_mode, default DISPLAY_MODE).
+    first_driver, the browser that saw booking open and has clicked 'Book tickets', races the first target from the
+    date selector. The next targets get the browsers launched ahead in `browsers`; any others start cold on a cloned profile.
+    The first worker to reach a seat layout with enough seats wins; the rest are closed via close_driver.
+
+    Returns:
+        (winning driver, its target), or None if no target reached a usable seat layout.
+    """
+    workers = max_browser_workers(len(targets))
+    print(f"\n--- Racing {len(targets)} targets with {workers} browser worker(s) ---")
+    winner_event = threading.Event()
+    drivers, lock = {}, threading.Lock()
+
+    def open_browser(index: int) -> uc.Chrome | None:
+        if index == 0 and first_driver is not None: return first_driver
+        driver = browsers.take(index) if browsers is not None else None
+        return driver or setup_driver(clone_profile(profile_dir_name, f"worker{index}"), CHROMIUM_BINARY_PATH, display_mode=display_mode)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bms-worker") as pool:
+        futures = [pool.submit(_race_worker, i, target, location_slug, movie_code, num_seats, winner_event, drivers, lock, open_browser,
+                               current_tracer(), i == 0 and first_driver is not None)
+                   for i, target in enumerate(targets)]
+        for future in as_completed(futures):
+            if future.result()["won"]:
+                # Cancel queued targets and close the losers' browsers so their waits abort
+                for pending in futures: pending.cancel()
+                with lock: losers = list(drivers.values()); drivers.clear()
+                for loser in losers: close_driver(loser)
+                break
+        results = [future.result() for future in futures if not future.cancelled()]
+    with lock: leftover = list(drivers.values()); drivers.clear()
+    for loser in leftover: close_driver(loser)
+
+    print("\n--- Worker Report ---")
+    print(f"{'Worker':<8}{'Theatre':<40}{'Date':<8}{'Stage':<28}{'Seat layout':>12}")
+    for r in results:
+        reached = f"{r['time_to_seat_layout']:.2f}s" if r["time_to_seat_layout"] is not None else "-"
+        print(f"{r['worker']:<8}{r['target'].theatre_name[:38]:<40}{r['target'].date_input_str:<8}{r['stage']:<28}{reached:>12}")
+    winner = next((r for r in results if r["won"]), None)
+    if not winner: return None
+    return winner["driver"], winner["target"]
+
+def create_precheck_session(driver: uc.Chrome) -> requests.Session:
+    """A pooled HTTP session that carries the browser's cookies and user agent, for cheap availability checks."""
+    session = new_precheck_session(driver.execute_script("return navigator.userAgent;"))
+    sync_precheck_cookies(session, driver)
+    return session
+
+def precheck_session_from_snapshot(snapshot: dict) -> requests.Session:
+    """Like create_precheck_session, from a saved session snapshot instead of a running browser."""
+    session = new_precheck_session(snapshot["user_agent"])
+    for cookie in snapshot["cookies"]:
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+def new_precheck_session(user_agent: str) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+    })
+    return session
+
+def sync_precheck_cookies(session: requests.Session, driver: uc.Chrome):
+    """Copies the browser's current cookies (e.g. a refreshed Cloudflare clearance) into the session."""
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+
+def booking_open_from_html(html: str) -> bool | None:
+    """
+    Decides from raw movie page HTML whether booking is open.
+
+    Returns:
+        True if an open signal is present, False if the page is clearly still upcoming,
+        None if it can't tell (block page, unknown layout) and the browser should check.
+    """
+    if BLOCK_PAGE_PATTERN.search(html): return None
+    if any(pattern.search(html) for pattern in BOOKING_OPEN_PATTERNS): return True
+    if any(pattern.search(html) for pattern in BOOKING_CLOSED_PATTERNS): return False
+    return None
+
+def precheck_booking_open(session: requests.Session, movie_url: str) -> bool | None:
+    """Fetches the movie page over HTTP (no rendering). Same return values as booking_open_from_html."""
+    try:
+        response = session.get(movie_url, timeout=HTTP_PRECHECK_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"  HTTP pre-check failed: {e}")
+        return None
+    if response.status_code != 200:
+        print(f"  HTTP pre-check got status {response.status_code}.")
+        return None
+    return booking_open_from_html(response.text)
+
+def next_poll_delay(now: datetime, expected_release: datetime | None, consecutive_blocks: int = 0) -> float:
+    """
+    Seconds to wait before the next availability check.
+
+    Far from the expected release the interval is long; it steps down through RELEASE_POLL_WINDOWS
+    to a few seconds near it, stays fast for RELEASE_OVERDUE_WINDOW_SECONDS after it, then relaxes.
+    After block pages the wait backs off exponentially instead. Every interval gets +/- jitter.
+    """
+    if consecutive_blocks > 0:
+        base = min(BLOCK_BACKOFF_BASE_SECONDS * 2 ** (consecutive_blocks - 1), BLOCK_BACKOFF_MAX_SECONDS)
+    elif expected_release is None:
+        base = REFRESH_INTERVAL_SECONDS
+    else:
+        seconds_until = (expected_release - now).total_seconds()
+        if seconds_until < 0:
+            base = RELEASE_OVERDUE_POLL_SECONDS if -seconds_until <= RELEASE_OVERDUE_WINDOW_SECONDS else REFRESH_INTERVAL_SECONDS
+        else:
+            base = next(interval for threshold, interval in RELEASE_POLL_WINDOWS if seconds_until >= threshold)
+            base = min(base, max(seconds_until, RELEASE_POLL_WINDOWS[-1][1])) # Don't sleep past the release moment
+    return max(0.5, base * (1 + random.uniform(-POLL_JITTER_RATIO, POLL_JITTER_RATIO)))
+
+def watch_for_release(driver: uc.Chrome, expected_release: datetime | None = None, supervisor: BrowserSupervisor | None = None) -> float | None:
+    """
+    Refreshes the movie page on an adaptive schedule until 'Book tickets' can be clicked.
+
+    Args:
+        driver: The initialized WebDriver instance, already on the movie page.
+        expected_release: When booking is expected to open (local time), or None if unknown.
+        supervisor: Watches driver's memory and may replace it between checks (use supervisor.driver afterwards).
+
+    Returns:
+        time.perf_counter() at the start of the check that clicked the button, or None if monitoring stopped.
+    """
+    consecutive_blocks = 0
+    last_negative_check = None # Wall-clock time of the last check that did not find the button
+    session = create_precheck_session(driver) if HTTP_PRECHECK_ENABLED else None
+    movie_url = driver.current_url
+    browser_check_due = True # False while the HTTP pre-check says the page hasn't changed
+    while True:
+        if browser_check_due:
+            fast = expected_release is not None and abs((expected_release - datetime.now()).total_seconds()) <= RELEASE_POLL_WINDOWS[-2][0]
+            check_start = time.perf_counter()
+            button_status = click_book_tickets(driver, timeout=FAST_POLL_BUTTON_TIMEOUT if fast else BOOK_BUTTON_CHECK_TIMEOUT)
+
+            if button_status is True:
+                detected_at = datetime.now()
+                print("Booking is open! Proceeding...")
+                if last_negative_check:
+                    print(f"Detection latency: opened at most {(detected_at - last_negative_check).total_seconds():.1f}s before it was detected.")
+                if expected_release:
+                    print(f"Detected {(detected_at - expected_release).total_seconds():+.1f}s relative to the expected release time.")
+                return check_start
+            if button_status is False:
+                # An unexpected error occurred (not Timeout) while checking/clicking
+                print("An unexpected error occurred while trying to find/click the 'Book tickets' button. Exiting.")
+                return None
+
+        # Button not found (likely upcoming)
+        last_negative_check = datetime.now()
+        delay = next_poll_delay(last_negative_check, expected_release, consecutive_blocks)
+        print(f"Booking not yet open. Checking again in {delay:.1f}s...")
+        next_check = time.perf_counter() + delay
+        if supervisor is not None:
+            if not supervisor.maintain(movie_url, delay):
+                print("Could not restart the browser. Stopping monitoring.")
+                return None
+            driver = supervisor.driver
+        time.sleep(max(0.0, next_check - time.perf_counter())) # A restart uses up part of the wait, not extra time
+
+        if session is not None:
+            http_status = precheck_booking_open(session, movie_url)
+            if http_status is False:
+                print("HTTP pre-check: still upcoming. Browser left idle.")
+                browser_check_due = False
+                continue
+            print("HTTP pre-check: booking looks open." if http_status else "HTTP pre-check inconclusive.")
+        browser_check_due = True
+
+        print("Refreshing page now...")
+        try:
+            driver.refresh()
+            if supervisor is not None: supervisor.page_loaded()
+            print("Page refreshed. Re-checking for 'Book tickets' button...")
+            _settle(5) # Wait for page to reload after refresh
+            # Check if refresh resulted in a block page
+            block = detect_block_page(driver)
+            if block:
+                consecutive_blocks += 1
+                print(f"\n*** WARNING: {block} ({consecutive_blocks}/{MAX_CONSECUTIVE_BLOCKS} in a row) ***")
+                if consecutive_blocks >= MAX_CONSECUTIVE_BLOCKS:
+                    print("Too many block pages in a row. Cannot continue monitoring.")
+                    return None
+            else:
+                consecutive_blocks = 0
+                if session is not None: sync_precheck_cookies(session, driver)
+        except Exception as refresh_err:
+            print(f"\n--- Error during page refresh: {refresh_err}. Stopping monitoring. ---")
+            return None # Exit if refresh fails
+
 def close_driver(driver: uc.Chrome | None):
     """Safely quits the WebDriver instance."""
     if driver:
@@ -753,15 +3011,826 @@ def close_driver(driver: uc.Chrome | None):
         try: driver.quit()
         except Exception as e: print(f"Error closing driver: {e}")
         finally: print("Browser closed.") # Print even if quit fails
+        display = getattr(driver, "bms_display", None)
+        if display is not None: display.stop()
+
+# --- Checkpoints ---
+
+_checkpoint_lock = threading.Lock()
+
+def checkpoint_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CHECKPOINT_FILE)
+
+def checkpoint_fingerprint(job: BookingJob) -> list:
+    """What a checkpoint was made for: city, movie, seat count and every (date, theatre, time range) target, as JSON."""
+    return [job.location_slug, job.movie_code, job.num_seats,
+            [[t.date_input_str, t.theatre_name, t.start_time_str, t.end_time_str] for t in job.targets()]]
+
+def load_checkpoint(job: BookingJob) -> dict | None:
+    """
+    The saved checkpoint for a job, if there is one younger than CHECKPOINT_MAX_AGE_SECONDS that was made for the
+    same booking. Job names repeat across runs ('interactive', 'job1', ...), so a checkpoint left by a different
+    booking under the same name is deleted instead of resumed.
+    """
+    with _checkpoint_lock:
+        try:
+            with open(checkpoint_path(), encoding="utf-8") as f: checkpoint = json.load(f).get(job.name)
+        except (OSError, ValueError):
+            return None
+    if not checkpoint: return None
+    if checkpoint.get("job") != checkpoint_fingerprint(job):
+        print(f"--- Ignoring the checkpoint for '{job.name}': it was saved for a different booking. ---")
+        save_checkpoint(job.name, None)
+        return None
+    age = (datetime.now() - datetime.fromisoformat(checkpoint["updated_at"])).total_seconds()
+    return checkpoint if age <= CHECKPOINT_MAX_AGE_SECONDS else None
+
+def save_checkpoint(job_name: str, checkpoint: dict | None):
+    """Writes (or with None, clears) a job's checkpoint. Other jobs' entries are kept."""
+    with _checkpoint_lock:
+        try:
+            with open(checkpoint_path(), encoding="utf-8") as f: checkpoints = json.load(f)
+        except (OSError, ValueError):
+            checkpoints = {}
+        if checkpoint is None: checkpoints.pop(job_name, None)
+        else: checkpoints[job_name] = checkpoint
+        try:
+            with open(checkpoint_path(), "w", encoding="utf-8") as f: json.dump(checkpoints, f, indent=2)
+        except OSError as e:
+            print(f"Could not save checkpoint: {e}")
+
+def detect_booking_stage(driver: uc.Chrome, num_seats: int, date_id: str) -> str | None:
+    """The stage whose controls are on screen (the stage to run next), or None if the page isn't recognised."""
+    try:
+        return driver.execute_script(STAGE_DETECT_JS, num_seats, date_id, [_js_locator(locator) for locator in LOCATORS.locators("theatre_list")])
+    except Exception:
+        return None
+
+def recover_stage(driver: uc.Chrome, checkpoint: dict, num_seats: int, date_id: str, check_screen: bool = True) -> str | None:
+    """
+    Finds where to resume: the stage on screen, else the furthest checkpoint URL that reloads into a known stage.
+
+    Returns:
+        The stage to run next, or None if nothing recoverable was found.
+    """
+    stage = detect_booking_stage(driver, num_seats, date_id) if check_screen else None
+    if stage: return stage
+    tried = set()
+    for recorded in reversed(BOOKING_STAGES):
+        url = checkpoint["stages"].get(recorded, {}).get("url")
+        if not url or url in tried: continue
+        tried.add(url)
+        print(f"  Reloading the page reached after '{recorded}': {url}")
+        try:
+            driver.get(url)
+            stage = TracedWait(driver, RESUME_DETECT_TIMEOUT, poll_frequency=STAGE_READY_POLL_INTERVAL).until(
+                lambda d: detect_booking_stage(d, num_seats, date_id))
+        except TimeoutException:
+            continue
+        except Exception as e:
+            print(f"  Could not reload {url}: {e}")
+            return None
+        if stage: return stage
+    return None
+
+# --- Seat Hold Deadline ---
+# Text of the first visible hold countdown (arguments as FAST_WAIT_JS), or null
+HOLD_TIMER_JS = "var match = (function () {" + FAST_WAIT_JS + "}).apply(null, arguments); return match && match[1].textContent;"
+HOLD_TIMER_PATTERN = re.compile(r"(\d{1,2})\s*:\s*(\d{2})(?!\d)")
+
+def hold_stage_timeouts() -> dict[str, float]:
+    """The configured timeouts of the stages that run while the seats are held, in stage order."""
+    return {"terms_and_conditions": ACCEPT_TC_TIMEOUT, "summary": SUMMARY_PROCEED_TIMEOUT, "contact_details": CONTACT_DETAILS_TIMEOUT,
+            "payment_option": PAYMENT_OPTION_TIMEOUT, "upi_payment": UPI_PAYMENT_TIMEOUT}
+
+def read_hold_seconds(driver: uc.Chrome) -> float | None:
+    """Seconds left on the page's seat hold countdown, or None if the page doesn't show one."""
+    try:
+        text = driver.execute_script(HOLD_TIMER_JS, [_js_locator(locator) for locator in LOCATORS.locators("hold_timer")], "visible", False)
+    except Exception:
+        return None
+    match = HOLD_TIMER_PATTERN.search(text or "")
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else None
+
+class HoldDeadline:
+    """
+    The end of the seat hold as a perf_counter() deadline, and the stage timeouts that fit before it.
+
+    The hold is assumed to be SEAT_HOLD_ASSUMED_SECONDS long from `held_at` until a page shows its countdown
+    (refresh). Each stage gets its configured timeout scaled down to its share of the time left, so the
+    stages after it still get theirs; SEAT_HOLD_MIN_STAGE_SECONDS is the floor.
+    """
+
+    def __init__(self, held_at: float):
+        self.held_at = held_at
+        self.expires_at = held_at + SEAT_HOLD_ASSUMED_SECONDS
+        self.from_page = False # True once a countdown has been read
+
+    def refresh(self, driver: uc.Chrome):
+        """Moves the deadline to the page's countdown, if it shows one."""
+        seconds = read_hold_seconds(driver)
+        if seconds is None: return
+        if not self.from_page: print(f"  Seat hold: {seconds // 60}:{seconds % 60:02d} left on the page's countdown.")
+        self.expires_at, self.from_page = time.perf_counter() + seconds, True
+
+    def remaining(self) -> float:
+        """Usable seconds left (the safety margin already taken off)."""
+        return self.expires_at - SEAT_HOLD_SAFETY_SECONDS - time.perf_counter()
+
+    def can_finish(self, stage: str) -> bool:
+        """Whether the time left covers the least time of `stage` and every held stage after it."""
+        stages = list(hold_stage_timeouts())
+        return self.remaining() >= sum(SEAT_HOLD_MIN_STAGE_SECONDS.get(later, 0) for later in stages[stages.index(stage):])
+
+    def timeout(self, stage: str) -> float:
+        """`stage`'s share of the time left (weighted by the configured timeouts), capped at its configured timeout."""
+        timeouts = hold_stage_timeouts()
+        stages = list(timeouts)
+        share = self.remaining() * timeouts[stage] / sum(timeouts[later] for later in stages[stages.index(stage):])
+        return round(min(timeouts[stage], max(SEAT_HOLD_MIN_STAGE_SECONDS.get(stage, 1), share)), 1)
+
+    def ready_budget(self, stage: str) -> float | None:
+        """Readiness budget after `stage`: its STAGE_LATENCY_BUDGETS entry, capped at the next stage's timeout."""
+        following = BOOKING_STAGES[BOOKING_STAGES.index(stage) + 1] if stage != BOOKING_STAGES[-1] else None
+        if following not in hold_stage_timeouts(): return None
+        return min(STAGE_LATENCY_BUDGETS.get(stage, DEFAULT_TIMEOUT), self.timeout(following))
+
+# --- Booking Pipeline ---
+
+def run_booking_job(job: BookingJob, driver: uc.Chrome, stage_timings: list, profile_dir_name: str = PROFILE_FOLDER_NAME) -> tuple[dict, uc.Chrome | None]:
+    """
+    Runs one booking from the movie page to the final 'MAKE PAYMENT' click.
+    With TRACING_ENABLED, the run is traced; a summary is printed and the trace exported (result['trace_files']).
+
+    Args:
+        job: The booking details.
+        driver: A ready WebDriver instance (it may be replaced when fallback targets are raced).
+        stage_timings: List that receives (stage, action seconds, readiness wait seconds) entries.
+        profile_dir_name: Profile the race workers clone when the job has fallback targets.
+
+    Returns:
+        (result, driver now in use). result is JSON-serialisable: job, status ('success' or 'failed'),
+        stage reached, failure_reason, started_at, duration_s, per-stage timings, wait_overhead (element wait totals)
+        and, once payment is submitted, hold_to_submit_s (seconds from holding the seats to 'MAKE PAYMENT').
+    """
+    tracer = PipelineTracer(job.name) if TRACING_ENABLED and current_tracer() is None else None # None: the caller traces (or tracing is off)
+    wait_stats = None # None: the caller collects them
+    with contextlib.ExitStack() as stack:
+        if tracer is not None: stack.enter_context(tracer.activate())
+        if getattr(_trace_state, "wait_stats", None) is None: wait_stats = stack.enter_context(collect_wait_stats())
+        result, driver = _run_booking_stages(job, driver, stage_timings, profile_dir_name)
+
+    if wait_stats is not None:
+        result["wait_overhead"] = wait_stats.summary()
+        print(f"Element waits: {wait_stats.waits} ({wait_stats.polled} had to poll), {wait_stats.wait_s:.2f}s waiting; "
+              f"{SELENIUM_DEFAULT_POLL_INTERVAL}s polling would add an estimated ~{wait_stats.estimated_saving():.2f}s (half a poll per polled wait, not measured).")
+        if wait_stats.fallbacks:
+            print("Fallback locators used: " + ", ".join(f"{name} (strategy {index})" for name, index in wait_stats.fallbacks.items()))
+    LOCATORS.save()
+    if tracer is not None:
+        tracer.print_summary()
+        try: result["trace_files"] = tracer.export()
+        except OSError as e: print(f"Could not export trace: {e}")
+    return result, driver
+
+def _run_booking_stages(job: BookingJob, driver: uc.Chrome, stage_timings: list, profile_dir_name: str) -> tuple[dict, uc.Chrome | None]:
+    """The stage loop of run_booking_job (same arguments and return value), inside its tracer and wait statistics."""
+    result = {"job": job.name, "status": "failed", "stage": "start", "failure_reason": None,
+              "started_at": datetime.now().isoformat(timespec="seconds"), "duration_s": None, "stages": [], "recoveries": 0, "reselects": 0}
+    job_start = time.perf_counter()
+    target = job.targets()[0] # The target being booked; replaced by the winner if targets are raced
+    # Same-date fallbacks can be tried in this browser from the same theatre list; racing only pays with 2+ browsers
+    same_date_fallbacks = [(t.theatre_name, t.start_time_str, t.end_time_str) for t in job.fallback_targets
+                           if resolve_date_id(t.date_input_str) == resolve_date_id(job.date_input_str)]
+    race_pending = bool(job.fallback_targets) and max_browser_workers(len(job.targets())) > 1
+    race_browsers = None # RaceBrowsers launched while the release is watched, if targets will be raced
+    fast_checkout_pending = FAST_CHECKOUT_ENABLED # Tried once, on reaching the payment page
+    hold = None # HoldDeadline once seats are held ('Pay' clicked on the seat layout)
+    checkpoint = {"job": checkpoint_fingerprint(job), "stage": None, "stages": {}, "seats": [], "target": target._asdict(), "updated_at": None}
+
+    def fail(reason: str) -> tuple[dict, uc.Chrome | None]:
+        result["failure_reason"] = reason
+        return result, driver
+
+    def run_parallel_race() -> bool:
+        nonlocal driver, target, race_pending, race_browsers
+        race_pending = False
+        first, driver = driver, None # Races the first target; closed by the race unless it wins
+        stage_start = time.perf_counter()
+        race = race_targets(job.targets(), job.location_slug, job.movie_code, job.num_seats, profile_dir_name,
+                            getattr(first, "bms_launch", (None,) * 6)[5], first_driver=first, browsers=race_browsers)
+        if race_browsers is not None: race_browsers.close() # Any the race didn't need
+        race_browsers = None
+        if not race: return False
+        driver, target = race
+        result["target"] = target._asdict()
+        print(f"Continuing with '{target.theatre_name}' on {target.date_input_str}.")
+        stage_timings.append(("parallel_race", time.perf_counter() - stage_start, 0.0))
+        return True
+
+    def payment_submitted(submitted_at: float):
+        """Reports the time the seats were held before 'MAKE PAYMENT' was clicked (unknown after a restart)."""
+        if hold is None: return
+        result["hold_to_submit_s"] = round(submitted_at - hold.held_at, 3)
+        left = f" ({hold.expires_at - submitted_at:.0f}s of the hold left)" if hold.from_page else ""
+        print(f"Seat hold to payment submit: {result['hold_to_submit_s']:.2f}s{left}.")
+
+    def stage_timeout(stage: str) -> float:
+        """A held stage's timeout: its share of the hold time left, or the configured one."""
+        return hold.timeout(stage) if hold and SEAT_HOLD_DEADLINE_ENABLED else hold_stage_timeouts()[stage]
+
+    def reselect_seats() -> str | None:
+        """Gives up the held seats by reloading the seat layout. Returns the stage to run next, or None."""
+        nonlocal hold, fast_checkout_pending
+        hold, fast_checkout_pending = None, FAST_CHECKOUT_ENABLED
+        result["reselects"] += 1
+        print(f"--- Selecting seats again (reselect {result['reselects']}/{MAX_SEAT_RESELECTS})... ---")
+        layout = checkpoint["stages"].get("seat_quantity")
+        if not layout: return None
+        resume = recover_stage(driver, {"stages": {"seat_quantity": layout}}, job.num_seats, resolve_date_id(target.date_input_str), check_screen=False)
+        return resume if resume in ("seat_quantity", "seats_and_pay") else None
+
+    def run_fast_checkout() -> CheckoutOutcome:
+        """Fast checkout from the payment page; checkpoints every stage it got through."""
+        stage_start = time.perf_counter()
+        outcome = fast_checkout(driver, job.phone_number, job.upi_username, job.upi_handle,
+                                {stage: stage_timeout(stage) for stage in ("contact_details", "payment_option", "upi_payment")})
+        stage_timings.append(("fast_checkout", time.perf_counter() - stage_start, 0.0))
+        reached = BOOKING_STAGES.index(outcome.stage) if outcome.stage else len(BOOKING_STAGES)
+        for stage in BOOKING_STAGES[BOOKING_STAGES.index("contact_details"):reached]: record_checkpoint(stage)
+        if outcome.submitted_at is not None: payment_submitted(outcome.submitted_at)
+        return outcome
+
+    def run_stage(stage: str) -> bool:
+        """Runs one stage and waits for the next one's page. False if the stage failed."""
+        nonlocal driver, hold, race_browsers
+        stage_start = time.perf_counter()
+        if stage == "navigate":
+            if not navigate_to_movie(driver, job.location_slug, job.movie_code): return False
+            stage_timings.append(("navigate", time.perf_counter() - stage_start, 0.0))
+            return True
+        if stage == "book_tickets":
+            print("\n--- Checking for Booking Availability ---")
+            if race_pending and race_browsers is None: # Ready before the release, so the race starts without launching browsers
+                race_browsers = RaceBrowsers(max_browser_workers(len(job.targets())) - 1, f"{BASE_URL}{job.location_slug}/{job.movie_code}",
+                                             profile_dir_name, getattr(driver, "bms_launch", (None,) * 6)[5])
+            supervisor = BrowserSupervisor(driver) if BROWSER_RECYCLE_ENABLED else None
+            stage_start = watch_for_release(driver, job.expected_release, supervisor)
+            if supervisor is not None:
+                driver = supervisor.driver # A restarted browser replaces the original
+                if supervisor.recycles or supervisor.peak_rss_mb:
+                    print(f"Browser memory while waiting: peak {supervisor.peak_rss_mb:.0f}MB, {supervisor.recycles} restart(s).")
+            if stage_start is None: return False
+            print("Waiting for the date selector after clicking 'Book Tickets'...")
+            finish_stage(driver, "book_tickets", stage_start, stage_timings, LOCATORS.locators("show_date", date_id=resolve_date_id(target.date_input_str)))
+            return True
+        if stage == "upi_payment":
+            if not enter_upi_details_and_pay(driver, job.upi_username, job.upi_handle, timeout=stage_timeout("upi_payment")): return False
+            payment_submitted(time.perf_counter())
+            stage_timings.append(("upi_payment", time.perf_counter() - stage_start, 0.0))
+            return True
+        action, waiting_for, ready_locator = {
+            "show_date": (lambda: select_show_date(driver, target.date_input_str), "the theatre list after date selection", LOCATORS.locators("theatre_list")),
+            "theatre_and_time": (lambda: select_theatre_and_time(driver, target.theatre_name, target.start_time_str, target.end_time_str,
+                                                                 date_input_str=target.date_input_str, alternatives=same_date_fallbacks),
+                                 "the seat quantity pop-up after selecting showtime", LOCATORS.locators("seat_quantity", qty=job.num_seats)),
+            "seat_quantity": (lambda: select_seat_quantity(driver, job.num_seats), "the seat layout after selecting quantity", LOCATORS.locators("available_seat")),
+            "seats_and_pay": (lambda: select_seats_and_pay(driver, job.num_seats), "the T&C pop-up after clicking initial 'Pay' button", LOCATORS.locators("accept_terms")),
+            "terms_and_conditions": (lambda: accept_terms_and_conditions(driver, timeout=stage_timeout("terms_and_conditions")),
+                                     "the booking summary after accepting T&C", LOCATORS.locators("summary_proceed")),
+            "summary": (lambda: proceed_on_summary(driver, timeout=stage_timeout("summary")), "the payment page after clicking 'Proceed' on summary", LOCATORS.locators("mobile_input")),
+            "contact_details": (lambda: enter_contact_details(driver, job.phone_number, timeout=stage_timeout("contact_details")),
+                                "payment options after entering contact details", LOCATORS.locators("phonepe_option")),
+            "payment_option": (lambda: select_phonepe_upi(driver, timeout=stage_timeout("payment_option")), "UPI fields after selecting PhonePe UPI", LOCATORS.locators("upi_username")),
+        }[stage]
+        if not action(): return False
+        if stage == "seats_and_pay": hold = HoldDeadline(time.perf_counter())
+        print(f"Waiting for {waiting_for}...")
+        finish_stage(driver, stage, stage_start, stage_timings, ready_locator, budget=hold.ready_budget(stage) if hold and SEAT_HOLD_DEADLINE_ENABLED else None)
+        return True
+
+    def record_checkpoint(stage: str):
+        """Remembers the stage reached and the page it led to (and the held seats) for recovery."""
+        checkpoint["stage"] = stage
+        checkpoint["target"] = target._asdict()
+        checkpoint["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        try:
+            checkpoint["stages"][stage] = {"url": driver.current_url}
+            if stage == "seats_and_pay": checkpoint["seats"] = [seat.id for seat in snapshot_seat_map(driver) if seat.status == "selected"]
+        except Exception:
+            pass # A checkpoint is best effort; never fail a stage over it
+        if stage not in ("navigate", "book_tickets"): save_checkpoint(job.name, checkpoint)
+
+    failure_reasons = {
+        "navigate": "Navigation/initial page load failure (blocked page or wrong location/movie code).",
+        "book_tickets": "Stopped monitoring for the 'Book tickets' button.",
+        "parallel_race": "No target reached a seat layout with enough seats.",
+        "show_date": f"Date '{job.date_input_str}' could not be selected.",
+        "theatre_and_time": f"No showtime for '{job.theatre_name}' in {job.start_time_str}-{job.end_time_str}.",
+        "seat_quantity": f"Seat quantity {job.num_seats} could not be selected.",
+        "seats_and_pay": f"Could not select {job.num_seats} seats and activate 'Pay'.",
+        "terms_and_conditions": "T&C 'Accept' button not clickable.",
+        "summary": "Summary 'Proceed' button not clickable.",
+        "contact_details": "Contact details could not be entered.",
+        "payment_option": "PhonePe UPI option not clickable.",
+        "upi_payment": "UPI details could not be entered or 'MAKE PAYMENT' not clickable.",
+        "seat_hold": "The seat hold would run out before payment could be submitted.",
+    }
+
+    try:
+        index = 0
+        saved = load_checkpoint(job) if CHECKPOINT_RESUME_ENABLED else None
+        if saved and not race_pending:
+            # --- A previous run got past the booking opening: try to pick up where it stopped ---
+            print(f"\n--- Found a checkpoint from {saved['updated_at']} (reached '{saved['stage']}'). Trying to resume... ---")
+            checkpoint.update(saved)
+            target = BookingTarget(**saved["target"])
+            # A fresh browser shows nothing of that run, so go straight to the saved pages
+            resume = recover_stage(driver, checkpoint, job.num_seats, resolve_date_id(target.date_input_str), check_screen=False)
+            if resume:
+                print(f"--- Resuming at '{resume}'. ---")
+                index = BOOKING_STAGES.index(resume)
+            else:
+                print("--- Checkpoint pages are no longer usable. Starting from the movie page. ---")
+
+        while index < len(BOOKING_STAGES):
+            stage = BOOKING_STAGES[index]
+            if stage == "show_date" and race_pending:
+                # --- Race all targets in parallel browsers; the winner continues from its seat layout ---
+                result["stage"] = "parallel_race"
+                if not run_parallel_race(): return fail(failure_reasons["parallel_race"])
+                record_checkpoint("seat_quantity")
+                index = BOOKING_STAGES.index("seats_and_pay")
+                continue
+            result["stage"] = stage
+            if stage == "show_date" and len(same_date_fallbacks) < len(job.fallback_targets):
+                print("Only one browser fits on this machine: fallback targets on other dates are skipped.")
+            if hold and SEAT_HOLD_DEADLINE_ENABLED and stage in hold_stage_timeouts():
+                # --- Seats are held: stop (or hold new seats) once the time left can't cover the remaining stages ---
+                hold.refresh(driver)
+                if not hold.can_finish(stage):
+                    print(f"\n--- Only {max(0.0, hold.remaining()):.0f}s of the seat hold left to use: not enough for '{stage}' and the stages after it. ---")
+                    if result["reselects"] >= MAX_SEAT_RESELECTS: return fail(failure_reasons["seat_hold"])
+                    resume = reselect_seats()
+                    if resume is None: return fail(failure_reasons["seat_hold"] + " The seat layout could not be reloaded.")
+                    index = BOOKING_STAGES.index(resume)
+                    continue
+            if stage == "contact_details" and fast_checkout_pending:
+                fast_checkout_pending = False
+                outcome = run_fast_checkout()
+                if outcome.stage is None:
+                    index = len(BOOKING_STAGES)
+                    continue
+                stage, index = outcome.stage, BOOKING_STAGES.index(outcome.stage)
+                result["stage"] = stage
+                if outcome.reason != "missing":
+                    print(f"--- Entering the details by typing from '{stage}'. ---")
+                    continue
+                # Nothing to type into: handled like a failed stage below
+            elif run_stage(stage):
+                record_checkpoint(stage)
+                index += 1
+                continue
+
+            # --- The stage failed: resume from the page on screen (or a checkpoint URL) with the same browser ---
+            if hold and SEAT_HOLD_DEADLINE_ENABLED and stage in hold_stage_timeouts() and not hold.can_finish(stage):
+                continue # No time left to recover in: the hold check above reselects or stops
+            recoverable = CHECKPOINT_RESUME_ENABLED and stage not in ("navigate", "book_tickets") and result["recoveries"] < MAX_STAGE_RECOVERIES
+            if not recoverable or not driver_health_check(driver): return fail(failure_reasons[stage])
+            result["recoveries"] += 1
+            print(f"\n--- Stage '{stage}' failed. Looking for a stage to resume from (recovery {result['recoveries']}/{MAX_STAGE_RECOVERIES})... ---")
+            resume = recover_stage(driver, checkpoint, job.num_seats, resolve_date_id(target.date_input_str))
+            if resume is None: return fail(failure_reasons[stage] + " No recoverable page found.")
+            print(f"--- Resuming at '{resume}'. ---")
+            index = BOOKING_STAGES.index(resume)
+
+        result["stage"] = "payment_initiated"
+        result["status"] = "success"
+        save_checkpoint(job.name, None) # Nothing left to resume
+        return result, driver
+    except Exception as e:
+        print(f"\n--- Unexpected error during stage '{result['stage']}': {e} ---")
+        return fail(f"Unexpected error: {e}")
+    finally:
+        if race_browsers is not None: race_browsers.close() # The job ended before its race
+        result["duration_s"] = round(time.perf_counter() - job_start, 3)
+        result["stages"] = [{"stage": stage, "action_s": round(action, 3), "ready_s": round(ready, 3)} for stage, action, ready in stage_timings]
+
+# --- Batch Job Runner ---
+
+def failed_result(job: BookingJob, stage: str, reason: str, started_at: datetime | None = None, duration_s: float = 0) -> dict:
+    """A result for a job that stopped before or outside run_booking_job (same keys as its results)."""
+    return {"job": job.name, "status": "failed", "stage": stage, "failure_reason": reason,
+            "started_at": (started_at or datetime.now()).isoformat(timespec="seconds"), "duration_s": round(duration_s, 3), "stages": []}
+
+def load_batch_jobs(path: str) -> list[BookingJob] | None:
+    """Reads and validates every job in a job file. Prints the problems and returns None if any job is invalid."""
+    try:
+        raw_jobs = load_job_file(path)
+    except (OSError, ValueError, tomllib.TOMLDecodeError) as e:
+        print(f"Could not read job file '{path}': {e}")
+        return None
+    except Exception as e: # e.g. yaml.YAMLError
+        print(f"Could not parse job file '{path}': {e}")
+        return None
+
+    jobs, all_errors = [], []
+    for index, raw in enumerate(raw_jobs):
+        job, errors = build_booking_job(raw, index)
+        if job: jobs.append(job)
+        all_errors.extend(errors)
+    names = [job.name for job in jobs]
+    all_errors.extend(f"Duplicate job name '{name}'." for name in sorted(set(names)) if names.count(name) > 1)
+    if all_errors or not jobs:
+        print("Job file is invalid. No jobs were started:" if all_errors else "Job file contains no jobs.")
+        for error in all_errors: print(f"  - {error}")
+        return None
+    return jobs
+
+def append_result(results_path: str, result: dict):
+    """Appends one job result to the JSON-lines results file."""
+    with open(results_path, "a", encoding="utf-8") as f: f.write(json.dumps(result) + "\n")
+
+def print_batch_summary(results: list[dict]) -> bool:
+    """Prints one line per job. Returns True if every job initiated payment."""
+    print("\n--- Batch Summary ---")
+    print(f"{'Job':<24}{'Status':<10}{'Stage':<22}{'Duration':>10}  Reason")
+    for result in results:
+        print(f"{result['job'][:22]:<24}{result['status']:<10}{result['stage']:<22}{result['duration_s']:>9.1f}s  {result['failure_reason'] or ''}")
+    return bool(results) and all(result["status"] == "success" for result in results)
+
+def run_job_file(path: str, concurrency: int = 1, results_path: str = DEFAULT_RESULTS_FILE, display_mode: str | None = None) -> bool:
+    """
+    Validates every job in a job file up front, then runs them without prompts.
+
+    Jobs are spread over up to `concurrency` lanes (capped by max_browser_workers). Each lane runs its
+    jobs one after another on a kept-warm browser with its own copy of the profile. One JSON result
+    per job is appended to `results_path` as soon as the job finishes. Browsers use display_mode (default DISPLAY_MODE).
+
+    Returns:
+        True if every job initiated payment, False otherwise (including invalid job files).
+    """
+    print(f"--- BookMyShow Bot: batch mode ({path}) ---")
+    jobs = load_batch_jobs(path)
+    if jobs is None: return False
+
+    lanes = max_browser_workers(max(1, min(concurrency, len(jobs))))
+    print(f"{len(jobs)} job(s) validated. Running with {lanes} lane(s); results go to {results_path}.")
+    results, lock = [], threading.Lock()
+
+    def run_lane(lane_index: int, lane_jobs: list[BookingJob]):
+        profile = PROFILE_FOLDER_NAME if lanes == 1 else clone_profile(PROFILE_FOLDER_NAME, f"lane{lane_index}")
+        pool = WarmDriverPool(profile, CHROMIUM_BINARY_PATH, display_mode=display_mode)
+        pool.prewarm()
+        try:
+            for job in lane_jobs:
+                print(f"\n=== [lane {lane_index}] Starting job '{job.name}' ===")
+                stage_timings = []
+                driver = pool.acquire()
+                if driver is None:
+                    result = failed_result(job, "setup_driver", "WebDriver could not be started.")
+                else:
+                    result, driver = run_booking_job(job, driver, stage_timings, profile)
+                    if result["status"] == "success":
+                        print(f"[lane {lane_index}] Payment initiated for '{job.name}'. Approve it in your UPI app.")
+                        time.sleep(BATCH_POST_PAYMENT_HOLD_SECONDS)
+                        close_driver(driver)
+                        pool.prewarm()
+                    else:
+                        pool.release(driver) # Health-checked and reused for the next job
+                with lock:
+                    results.append(result)
+                    append_result(results_path, result)
+        finally:
+            pool.shutdown()
+
+    with ThreadPoolExecutor(max_workers=lanes, thread_name_prefix="bms-lane") as executor:
+        for future in [executor.submit(run_lane, lane, jobs[lane::lanes]) for lane in range(lanes)]:
+            future.result()
+
+    return print_batch_summary(results)
+
+# --- Async Orchestrator ---
+
+def open_precheck_session(profile_dir_name: str, display_mode: str | None = None) -> requests.Session | None:
+    """
+    An HTTP session with the site's cookies and a browser user agent: from the saved session snapshot when there is
+    one, else from one visit to the site in a short-lived browser (in display_mode, default DISPLAY_MODE).
+    """
+    snapshot = current_session_snapshot(profile_dir_name, CHROMIUM_BINARY_PATH, display_mode=display_mode) if SESSION_SNAPSHOT_ENABLED else None
+    if snapshot: return precheck_session_from_snapshot(snapshot)
+    driver = setup_driver(profile_dir_name, CHROMIUM_BINARY_PATH, display_mode=display_mode)
+    if driver is None: return None
+    try:
+        driver.get("{0.scheme}://{0.netloc}/".format(urlsplit(BASE_URL)))
+        return create_precheck_session(driver)
+    except Exception as e:
+        print(f"Could not prepare the HTTP pre-check session: {e}")
+        return None
+    finally:
+        close_driver(driver)
+
+def _book_in_browser(job: BookingJob, profile_dir_name: str, handle: dict, display_mode: str | None = None) -> dict:
+    """
+    Runs one booking in its own browser (blocking; called in the browser executor).
+    handle['driver'] always holds the live driver so the event loop can close it to abort the booking.
+    """
+    driver = setup_driver(profile_dir_name, CHROMIUM_BINARY_PATH, display_mode=display_mode)
+    handle["driver"] = driver
+    if driver is None: return failed_result(job, "setup_driver", "WebDriver could not be started.")
+    if handle.get("cancelled"): # Timed out or cancelled while the browser was starting
+        close_driver(driver)
+        return failed_result(job, "setup_driver", "Cancelled.")
+    result, handle["driver"] = run_booking_job(job, driver, [], profile_dir_name)
+    return result
+
+async def watch_release_async(job: BookingJob, session: requests.Session, http_executor: ThreadPoolExecutor) -> bool | None:
+    """
+    Polls the job's movie page over HTTP, on the same schedule as watch_for_release, until it no longer looks upcoming.
+
+    Returns:
+        True if booking looks open, None if the page couldn't be classified (block page, unknown layout).
+        Either way a browser takes over from here.
+    """
+    loop = asyncio.get_running_loop()
+    movie_url = f"{BASE_URL}{job.location_slug}/{job.movie_code}"
+    while True:
+        status = await loop.run_in_executor(http_executor, precheck_booking_open, session, movie_url)
+        if status is not False: return status
+        await asyncio.sleep(next_poll_delay(datetime.now(), job.expected_release))
+
+async def run_job_async(job: BookingJob, session: requests.Session, http_executor: ThreadPoolExecutor,
+                        browser_executor: ThreadPoolExecutor, profiles: asyncio.Queue, display_mode: str | None = None) -> dict:
+    """
+    Watches one job over HTTP, then books it in a browser from the shared pool once booking opens.
+    Each phase has its own timeout. On timeout or cancellation the job's browser is closed, which also
+    stops the blocked booking thread. Never raises (except on cancellation), so one job can't take down the others.
+    """
+    loop = asyncio.get_running_loop()
+    started_at, start = datetime.now(), time.perf_counter()
+    stage = "watch"
+    try:
+        async with asyncio.timeout(ASYNC_WATCH_TIMEOUT_SECONDS):
+            status = await watch_release_async(job, session, http_executor)
+        print(f"[{job.name}] {'Booking looks open' if status else 'HTTP pre-check inconclusive'}. Waiting for a browser...")
+        stage = "booking"
+        profile = await profiles.get()
+        handle = {}
+        try:
+            async with asyncio.timeout(ASYNC_BOOKING_TIMEOUT_SECONDS):
+                result = await loop.run_in_executor(browser_executor, _book_in_browser, job, profile, handle, display_mode)
+            if result["status"] == "success":
+                print(f"[{job.name}] Payment initiated. Approve it in your UPI app.")
+                await asyncio.sleep(BATCH_POST_PAYMENT_HOLD_SECONDS)
+            return result
+        finally:
+            handle["cancelled"] = True
+            await asyncio.to_thread(close_driver, handle.get("driver"))
+            profiles.put_nowait(profile)
+    except TimeoutError:
+        limit = ASYNC_WATCH_TIMEOUT_SECONDS if stage == "watch" else ASYNC_BOOKING_TIMEOUT_SECONDS
+        return failed_result(job, stage, f"Timed out after {limit}s.", started_at, time.perf_counter() - start)
+    except Exception as e:
+        return failed_result(job, stage, f"Unexpected error: {e}", started_at, time.perf_counter() - start)
+
+async def orchestrate_jobs(jobs: list[BookingJob], browsers: int, results_path: str = DEFAULT_RESULTS_FILE,
+                           display_mode: str | None = None) -> list[dict]:
+    """
+    Runs every job from one event loop: all of them are watched over HTTP at once (ASYNC_HTTP_THREADS threads
+    in total), and at most `browsers` browsers are open at a time, only for jobs whose booking has opened.
+    Results are appended to results_path as jobs finish. Cancelling this cancels (and closes) every job.
+    """
+    loop = asyncio.get_running_loop()
+    http_executor = ThreadPoolExecutor(max_workers=ASYNC_HTTP_THREADS, thread_name_prefix="bms-http")
+    browser_executor = ThreadPoolExecutor(max_workers=browsers, thread_name_prefix="bms-browser")
+    results = []
+    try:
+        # Cookies and user agent for the HTTP watchers come from one short browser visit
+        session = await loop.run_in_executor(browser_executor, open_precheck_session, PROFILE_FOLDER_NAME, display_mode)
+        if session is None:
+            return [failed_result(job, "watch", "Could not prepare the HTTP pre-check session.") for job in jobs]
+        profiles = asyncio.Queue()
+        for slot in range(browsers):
+            profiles.put_nowait(PROFILE_FOLDER_NAME if browsers == 1 else clone_profile(PROFILE_FOLDER_NAME, f"slot{slot}"))
+
+        async def run_and_record(job: BookingJob):
+            result = await run_job_async(job, session, http_executor, browser_executor, profiles, display_mode)
+            results.append(result)
+            append_result(results_path, result)
+
+        async with asyncio.TaskGroup() as group:
+            for job in jobs: group.create_task(run_and_record(job), name=f"bms-job-{job.name}")
+        return results
+    finally:
+        http_executor.shutdown(wait=False, cancel_futures=True)
+        browser_executor.shutdown(wait=False, cancel_futures=True)
+
+def run_job_file_async(path: str, browsers: int = 1, results_path: str = DEFAULT_RESULTS_FILE, display_mode: str | None = None) -> bool:
+    """
+    Like run_job_file, but watches all jobs over HTTP from one asyncio event loop and opens a browser
+    (at most `browsers`, capped by max_browser_workers) only for jobs whose booking has opened.
+
+    Returns:
+        True if every job initiated payment, False otherwise (including invalid job files).
+    """
+    print(f"--- BookMyShow Bot: async batch mode ({path}) ---")
+    jobs = load_batch_jobs(path)
+    if jobs is None: return False
+    browsers = max_browser_workers(max(1, min(browsers, len(jobs))))
+    print(f"{len(jobs)} job(s) validated. Watching all of them; up to {browsers} browser(s) for bookings. Results go to {results_path}.")
+    return print_batch_summary(asyncio.run(orchestrate_jobs(jobs, browsers, results_path, display_mode)))
+
+# --- Release Monitor ---
+
+class WatchEntry(NamedTuple):
+    """One (city, movie) to watch; job is what to book once it opens (None = just report it)."""
+    location_slug: str
+    movie_code: str
+    expected_release: datetime | None = None
+    job: BookingJob | None = None
+
+class MonitorClock:
+    """Wall clock and sleep used by ReleaseMonitor. A simulated clock with the same methods makes hours of watching run instantly."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class RateBudget:
+    """Token bucket: `per_minute` checks per minute on average, at most `burst` back to back. Times are epoch seconds."""
+
+    def __init__(self, per_minute: float, burst: int, now: float):
+        self.interval = 60.0 / per_minute
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        self.updated = now
+
+    def available_at(self, now: float) -> float:
+        """Earliest time a check may go out."""
+        self._refill(now)
+        return now if self.tokens >= 1 else now + (1 - self.tokens) * self.interval
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+class ReleaseMonitor:
+    """
+    Watches many (city, movie) pages for booking to open, on one schedule and one global rate budget.
+
+    Entries for the same page are checked once, and all checks go through one `check` (one HTTP session,
+    so one cookie jar for the site). Each page is due again after next_poll_delay for its earliest expected
+    release. When the budget can't keep up, due pages are served earliest-deadline-first (due time plus
+    the page's own interval), so pages near their release keep their fast polling and far-off pages stretch.
+    Once a movie opens in one city, its pages in the other cities are checked next. An inconclusive check (block page, error) pauses the whole schedule with the block backoff.
+    """
+
+    def __init__(self, entries: list[WatchEntry], check: Callable[[str], bool | None], clock: MonitorClock | None = None,
+                 per_minute: float = MONITOR_REQUESTS_PER_MINUTE, burst: int = MONITOR_BURST):
+        self.check = check # Movie page URL -> True (open), False (upcoming) or None (couldn't tell)
+        self.clock = clock or MonitorClock()
+        self.pages: dict[str, list[WatchEntry]] = {}
+        for entry in entries: self.pages.setdefault(f"{BASE_URL}{entry.location_slug}/{entry.movie_code}", []).append(entry)
+        self.expected = {url: min((e.expected_release for e in page if e.expected_release), default=None) for url, page in self.pages.items()}
+        now = self.clock.now().timestamp()
+        self.budget = RateBudget(per_minute, burst, now)
+        self._waiting = [(now, url) for url in self.pages] # (due at, url): not yet due
+        heapq.heapify(self._waiting)
+        self._ready = [] # (deadline, url): due, waiting for budget
+        self.paused_until = now
+        self.consecutive_blocks = 0
+        self.checks = 0
+        self.opened: dict[str, datetime] = {} # url -> when the open page was seen
+
+    def _schedule(self, url: str, now: datetime):
+        interval = next_poll_delay(now, self.expected[url])
+        heapq.heappush(self._waiting, (now.timestamp() + interval, url))
+
+    def _check_siblings_next(self, url: str):
+        """A movie usually opens in every city at once: move its other pages to the front of the queue."""
+        movie_code = self.pages[url][0].movie_code
+        siblings = {other for other, entries in self.pages.items() if entries[0].movie_code == movie_code and other not in self.opened}
+        if not siblings: return
+        self._waiting = [item for item in self._waiting if item[1] not in siblings]
+        self._ready = [item for item in self._ready if item[1] not in siblings] + [(-math.inf, other) for other in siblings]
+        heapq.heapify(self._waiting)
+        heapq.heapify(self._ready)
+
+    def run(self, on_open: Callable[[str, list[WatchEntry]], None], until: datetime | None = None) -> dict[str, datetime]:
+        """
+        Checks pages until every page has opened, `until` passes, or too many block pages come in a row.
+        on_open(url, entries) is called once per page, right after it is first seen open.
+
+        Returns:
+            url -> detection time for every page that opened.
+        """
+        while self._waiting or self._ready:
+            now = self.clock.now().timestamp()
+            while self._waiting and self._waiting[0][0] <= now: # Due pages queue for the budget by deadline
+                due, url = heapq.heappop(self._waiting)
+                heapq.heappush(self._ready, (due + next_poll_delay(self.clock.now(), self.expected[url]), url))
+            next_due = self._waiting[0][0] if self._waiting else math.inf
+            start_at = max(self.budget.available_at(now), self.paused_until) if self._ready else next_due
+            if until is not None and start_at > until.timestamp(): break
+            if start_at > now:
+                self.clock.sleep(start_at - now)
+                continue
+
+            _, url = heapq.heappop(self._ready)
+            self.budget.take(now)
+            status = self.check(url)
+            self.checks += 1
+            checked_at = self.clock.now()
+            if status is True:
+                self.opened[url] = checked_at
+                on_open(url, self.pages[url])
+                self._check_siblings_next(url)
+                continue
+            if status is None:
+                self.consecutive_blocks += 1
+                if self.consecutive_blocks >= MAX_CONSECUTIVE_BLOCKS:
+                    print(f"Monitor: {self.consecutive_blocks} inconclusive checks in a row. Stopping.")
+                    break
+                self.paused_until = checked_at.timestamp() + next_poll_delay(checked_at, None, self.consecutive_blocks)
+                print(f"Monitor: could not read {url}. Pausing all checks for {self.paused_until - checked_at.timestamp():.0f}s.")
+            else:
+                self.consecutive_blocks = 0
+            self._schedule(url, checked_at)
+        return self.opened
+
+def run_monitor(path: str, browsers: int = 1, results_path: str = DEFAULT_RESULTS_FILE, display_mode: str | None = None) -> bool:
+    """
+    Watches every job's (city, movie) page from one ReleaseMonitor (HTTP only, no browser per entry) and
+    hands each job to a booking worker as soon as its page opens. At most `browsers` bookings run at once.
+
+    Returns:
+        True if every job initiated payment, False otherwise (including invalid job files).
+    """
+    print(f"--- BookMyShow Bot: release monitor ({path}) ---")
+    jobs = load_batch_jobs(path)
+    if jobs is None: return False
+    session = open_precheck_session(PROFILE_FOLDER_NAME, display_mode)
+    if session is None: return False
+    monitor = ReleaseMonitor([WatchEntry(job.location_slug, job.movie_code, job.expected_release, job) for job in jobs],
+                             lambda url: precheck_booking_open(session, url))
+    browsers = max_browser_workers(max(1, min(browsers, len(jobs))))
+    print(f"{len(jobs)} job(s) on {len(monitor.pages)} page(s), at most {MONITOR_REQUESTS_PER_MINUTE} checks/minute. "
+          f"Up to {browsers} browser(s) for bookings. Results go to {results_path}.")
+    profiles = queue.Queue()
+    for slot in range(browsers):
+        profiles.put(PROFILE_FOLDER_NAME if browsers == 1 else clone_profile(PROFILE_FOLDER_NAME, f"slot{slot}"))
+    results, lock = [], threading.Lock()
+
+    def book(job: BookingJob):
+        profile, handle = profiles.get(), {}
+        try:
+            result = _book_in_browser(job, profile, handle, display_mode)
+            if result["status"] == "success":
+                print(f"[{job.name}] Payment initiated. Approve it in your UPI app.")
+                time.sleep(BATCH_POST_PAYMENT_HOLD_SECONDS)
+        except Exception as e:
+            result = failed_result(job, "booking", f"Unexpected error: {e}")
+        finally:
+            close_driver(handle.get("driver"))
+            profiles.put(profile)
+        with lock:
+            results.append(result)
+            append_result(results_path, result)
+
+    def on_open(url: str, entries: list[WatchEntry]):
+        print(f"\n--- Booking opened: {url}. Handing {len(entries)} job(s) to the booking workers. ---")
+        for entry in entries: booking_workers.submit(book, entry.job)
+
+    with ThreadPoolExecutor(max_workers=browsers, thread_name_prefix="bms-book") as booking_workers:
+        opened = monitor.run(on_open)
+    for url, entries in monitor.pages.items():
+        if url not in opened:
+            for entry in entries: results.append(failed_result(entry.job, "watch", "Monitoring stopped before booking opened."))
+    return print_batch_summary(results)
 
 # --- Main Execution ---
 
-def main():
-    """Main function to orchestrate the script execution."""
+def main(display_mode: str | None = None):
+    """Main function to orchestrate the script execution. Browsers use display_mode (default DISPLAY_MODE)."""
     driver = None
+    warm_pool = None
+    stage_timings = [] # (stage, action seconds, readiness wait seconds) for the latency report
     try:
-        # --- Get Initial User Input ---
         print("--- BookMyShow Bot ---")
+        if WARM_START_ENABLED:
+            # --- Launch the browser while the details below are typed in ---
+            site_root = "{0.scheme}://{0.netloc}/".format(urlsplit(BASE_URL))
+            warm_pool = WarmDriverPool(PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH, preload_url=site_root, display_mode=display_mode)
+            warm_pool.prewarm()
+            print("(Starting the browser in the background...)")
+
+        # --- Get Initial User Input ---
         location_slug = input("Enter location slug: ").lower().strip()
         movie_code = input("Enter movie code: ").strip()
         date_input_str = input(f"Enter date (MMM DD, e.g., {datetime.now().strftime('%b %d').upper()}): ").strip().upper()
@@ -772,143 +3841,56 @@ def main():
         phone_number = input("Enter your 10-digit mobile number: ").strip()
         upi_username = input("Enter your UPI username (the part before '@'): ").strip()
         upi_handle = input("Enter your UPI handle (the part after '@', e.g., okhdfcbank, ybl, axl): ").strip()
-
-
+        expected_release_str = input("Expected booking opening time (YYYY-MM-DD HH:MM, blank if unknown): ").strip()
+        print("Optional fallback targets, most preferred first, as 'Theatre name | EARLIEST | LATEST | MMM DD' (blank line to finish):")
+        fallback_lines = []
+        while True:
+            line = input("Fallback target: ").strip()
+            if not line: break
+            fallback_lines.append(line)
 
         # --- Basic Input Validation ---
-        if not all([location_slug, movie_code, date_input_str, theatre_name, start_time_str, end_time_str, num_seats_str, phone_number, upi_username, upi_handle]): # Check new inputs
-            print("All inputs are required. Exiting.")
+        errors = validate_booking_inputs(location_slug, movie_code, date_input_str, theatre_name, start_time_str,
+                                         end_time_str, num_seats_str, phone_number, upi_username, upi_handle)
+        if errors:
+            print(f"{errors[0]} Exiting.")
             return
-        try: # Validate date
-            parts = date_input_str.split(); month_map = {'JAN': '01', 'FEB': '02', 'MAR': '03', 'APR': '04', 'MAY': '05', 'JUN': '06', 'JUL': '07', 'AUG': '08', 'SEP': '09', 'OCT': '10', 'NOV': '11', 'DEC': '12'}
-            if len(parts) != 2 or parts[0] not in month_map or not 1 <= int(parts[1]) <= 31: raise ValueError("Invalid Date")
-        except Exception as e: print(f"Invalid date format: '{date_input_str}'. Use 'MMM DD'. ({e})"); return
-        if parse_time_string(start_time_str) is None or parse_time_string(end_time_str) is None: print("Invalid time format."); return # Validate time
-        try: # Validate num_seats
-            num_seats = int(num_seats_str)
-            if not 1 <= num_seats <= 10: raise ValueError("Seats must be between 1 and 10")
-        except ValueError as e: print(f"Invalid number of seats: '{num_seats_str}'. {e}. Exiting."); return
-        if not re.fullmatch(r"\d{10}", phone_number):
-             print(f"Invalid phone number format: '{phone_number}'. Please enter exactly 10 digits. Exiting.")
-             return
-        if not re.fullmatch(r"[a-zA-Z0-9.\-_]+", upi_username):
-                          print(f"Invalid UPI username format: '{upi_username}'. Contains invalid characters. Exiting.")
-                          return
-        if not re.fullmatch(r"[a-zA-Z0-9.\-_]+", upi_handle):
-                          print(f"Invalid UPI handle format: '{upi_handle}'. Contains invalid characters. Exiting.")
-                          return
-        if '@' in upi_username or '@' in upi_handle:
-                          print("Please enter username and handle separately, without the '@'. Exiting.")
-                          return
+        try: expected_release = parse_expected_release(expected_release_str)
+        except ValueError as e: print(f"{e} Exiting."); return
+
+        fallback_targets = []
+        for line in fallback_lines:
+            parts = [part.strip() for part in line.split("|")]
+            try:
+                if len(parts) != 4: raise ValueError("expected 4 '|'-separated fields")
+                fallback_targets.append(parse_booking_target(*parts))
+            except ValueError as e:
+                print(f"Invalid fallback target '{line}': {e}. Exiting."); return
+
+        job = BookingJob("interactive", location_slug, movie_code, date_input_str, theatre_name, start_time_str, end_time_str,
+                         int(num_seats_str), phone_number, upi_username, upi_handle, expected_release, tuple(fallback_targets))
 
         # Construct full UPI ID for potential later use/logging if needed
         full_upi_id = f"{upi_username}@{upi_handle}"
         print(f"Using UPI ID: {full_upi_id}") # Optional: Confirm constructed ID
 
         # --- Setup Driver ---
-        driver = setup_driver(PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH)
+        config_ready = time.perf_counter()
+        driver = warm_pool.acquire() if warm_pool else setup_driver(PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH, display_mode=display_mode)
         if not driver: return
-
-        # --- Navigate & Check Initial Load ---
-        if not navigate_to_movie(driver, location_slug, movie_code):
-             # Handle navigation errors (like 403, 404, Cloudflare)
-             print("Exiting due to navigation/initial page load failure.")
-             return # Exit if navigation itself failed
-
-        # --- Wait for and Click Book Tickets (with Refresh Loop) ---
-        print("\n--- Checking for Booking Availability ---")
-        booking_started = False
-        while not booking_started:
-            # Check for the button and attempt click if found
-            button_status = click_book_tickets(driver) # Uses BOOK_BUTTON_CHECK_TIMEOUT
-
-            if button_status is True:
-                # Button found and clicked successfully
-                print("Booking is open! Proceeding...")
-                booking_started = True # Set flag to exit loop
-                print("Pausing after clicking 'Book Tickets'...")
-                time.sleep(4) # Pause after successful click before next step
-                # No 'break' needed, loop condition handles exit
-
-            elif button_status is None:
-                # Button not found within timeout (likely upcoming)
-                wait_minutes = REFRESH_INTERVAL_SECONDS / 60
-                print(f"Booking not yet open. Refreshing page in {wait_minutes:.1f} minutes...")
-                time.sleep(REFRESH_INTERVAL_SECONDS)
-                print("Refreshing page now...")
-                try:
-                    driver.refresh()
-                    print("Page refreshed. Re-checking for 'Book tickets' button...")
-                    time.sleep(5) # Wait for page to reload after refresh
-                    # Check if refresh resulted in a block page
-                    page_title = driver.title.lower()
-                    current_url_lower = driver.current_url.lower()
-                    if "challenge" in current_url_lower or "cloudflare" in page_title or "just a moment" in page_title or "403 forbidden" in page_title:
-                         print("\n*** WARNING: Block page detected after refresh! Cannot continue monitoring. ***")
-                         return # Exit if blocked after refresh
-                except Exception as refresh_err:
-                     print(f"\n--- Error during page refresh: {refresh_err}. Stopping monitoring. ---")
-                     return # Exit if refresh fails
-                # Loop continues to check button again
-
-            elif button_status is False:
-                # An unexpected error occurred (not Timeout) while checking/clicking
-                print("An unexpected error occurred while trying to find/click the 'Book tickets' button. Exiting.")
-                return # Exit the script
-
-            # End of while loop iteration
-
-        # --- Select Date --- (Executes only after booking_started is True)
-        if not select_show_date(driver, date_input_str): return
-        print("Pausing after date selection...")
-        time.sleep(3)
-
-        # --- Select Theatre and Time ---
-        if not select_theatre_and_time(driver, theatre_name, start_time_str, end_time_str): return
-        print("Pausing after selecting showtime...")
-        time.sleep(5)
-
-        # --- Select Seat Quantity ---
-        if not select_seat_quantity(driver, num_seats):
-             return # Exit if quantity selection failed
-        print("Pausing after selecting quantity...")
-        time.sleep(5)
-
-        # --- Select Seats and Initiate Payment ---
-        if not select_seats_and_pay(driver, num_seats):
-             return # Exit if seat selection or initial pay click failed
-        print("Pausing after clicking initial 'Pay' button...")
-        time.sleep(4)
-
-        # --- Accept Terms & Conditions ---
-        if not accept_terms_and_conditions(driver):
-            return # Exit if T&C accept fails
-        print("Pausing after accepting T&C...")
-        time.sleep(5)
-
-        # --- Proceed on Booking Summary ---
-        if not proceed_on_summary(driver):
-            return # Exit if summary proceed fails
-        print("Pausing after clicking 'Proceed' on summary...")
-        time.sleep(6)
-
-        # --- Enter Contact Details ---
-        if not enter_contact_details(driver, phone_number, timeout=CONTACT_DETAILS_TIMEOUT):
-            return # Exit if contact details fail
-        print("Pausing after entering contact details...")
-        time.sleep(4)
-
-        # --- Select PhonePe UPI ---
-        if not select_phonepe_upi(driver, timeout=PAYMENT_OPTION_TIMEOUT):
-            return # Exit if PhonePe selection fails
-        print("Pausing after selecting PhonePe UPI...")
-        time.sleep(4)
-
-        # --- Enter UPI Details and Pay ---
-        if not enter_upi_details_and_pay(driver, upi_username, upi_handle, timeout=UPI_PAYMENT_TIMEOUT):
-             return # Exit if UPI entry or final payment click fails
-        print("Pausing after clicking final 'MAKE PAYMENT' button...")
-        time.sleep(5)
+        driver_ready_seconds = time.perf_counter() - config_ready
+
+        # --- Run the booking stages ---
+        result, driver = run_booking_job(job, driver, stage_timings)
+        navigate_seconds = next((action for stage, action, _ in stage_timings if stage == "navigate"), None)
+        if navigate_seconds is not None:
+            print(f"Time to first navigation after input: {driver_ready_seconds + navigate_seconds:.2f}s ({'warm' if warm_pool else 'cold'} start).")
+        if result["status"] != "success":
+            print(f"\n--- Stopped at stage '{result['stage']}': {result['failure_reason']} Exiting. ---")
+            return
+        print_stage_latency_report(stage_timings)
+        stage_timings = [] # Already reported
+        if not EVENT_DRIVEN_TRANSITIONS: time.sleep(LEGACY_STAGE_PAUSES["upi_payment"])
 
         # --- Final Success Message ---
         print("\n--- Success! Payment initiated via UPI. ---")
@@ -925,9 +3907,32 @@ def main():
         traceback.print_exc()
     finally:
         # --- Cleanup ---
+        print_stage_latency_report(stage_timings) # Report how far a failed run got
         close_driver(driver) # Consider adding an option to keep browser open on error
+        if warm_pool: warm_pool.shutdown()
 
 
 # Make sure the script ends with this check
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="BookMyShow booking bot. Without --jobs it asks for the booking details interactively.")
+    parser.add_argument("--jobs", help="Job file (.json, .toml or .yaml) with one or more bookings to run without prompts")
+    parser.add_argument("--concurrency", type=int, default=1, help="Max jobs to run at the same time (default 1)")
+    parser.add_argument("--async-watch", action="store_true",
+                        help="Watch all jobs over HTTP from one event loop and open browsers (up to --concurrency) only once booking opens")
+    parser.add_argument("--monitor", action="store_true",
+                        help="Watch every job's city/movie page on one shared, rate-limited schedule and book each as soon as it opens")
+    parser.add_argument("--results", default=DEFAULT_RESULTS_FILE, help=f"JSON-lines file for per-job results (default {DEFAULT_RESULTS_FILE})")
+    parser.add_argument("--display-mode", choices=DISPLAY_MODES, default=DISPLAY_MODE,
+                        help=f"'headed' browser windows, 'headless', or 'xvfb' (a virtual display per browser) for servers (default {DISPLAY_MODE}; env BMS_DISPLAY_MODE)")
+    parser.add_argument("--export-session", action="store_true",
+                        help=f"Open the persistent profile in a window, wait (up to {SESSION_LOGIN_TIMEOUT}s) for any challenge or login to be completed, "
+                             f"save the session to {SESSION_SNAPSHOT_FILE} and exit (used when SESSION_SNAPSHOT_ENABLED is set)")
+    args = parser.parse_args()
+    if args.export_session and args.display_mode != "headed":
+        parser.error(f"--export-session needs a window to complete the challenge or login in; use it with --display-mode headed, not '{args.display_mode}'")
+    if args.export_session:
+        sys.exit(0 if export_profile_session(PROFILE_FOLDER_NAME, CHROMIUM_BINARY_PATH, "requested", args.display_mode) else 1)
+    if args.jobs:
+        run = run_monitor if args.monitor else run_job_file_async if args.async_watch else run_job_file
+        sys.exit(0 if run(args.jobs, args.concurrency, args.results, args.display_mode) else 1)
+    main(args.display_mode)
@@ -0,0 +1,5 @@
+"""Lets the tests import open_bms.py, bms_standin.py and bms_synthetic.py from the repository root (they aren't an installed package)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+"""Checkpoints: a saved checkpoint is only resumed by the booking it was made for (no browser)."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import open_bms
+
+
+def booking(name: str = "interactive", **changes) -> open_bms.BookingJob:
+    job = open_bms.BookingJob(name, "mumbai", "ET00500000", "JAN 15", "PVR: Phoenix Palladium, Lower Parel",
+                              "06:00 PM", "10:00 PM", 2, "9876543210", "user", "ybl")
+    return job._replace(**changes)
+
+
+def checkpoint_for(job: open_bms.BookingJob, updated_at: datetime | None = None) -> dict:
+    target = job.targets()[0]
+    return {"job": open_bms.checkpoint_fingerprint(job), "stage": "seats_and_pay",
+            "stages": {"seats_and_pay": {"url": "https://in.bookmyshow.com/buytickets/summary"}}, "seats": ["A1", "A2"],
+            "target": target._asdict(), "updated_at": (updated_at or datetime.now()).isoformat(timespec="seconds")}
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_file(tmp_path, monkeypatch):
+    path = tmp_path / "bms_checkpoint.json"
+    monkeypatch.setattr(open_bms, "CHECKPOINT_FILE", str(path))
+    return path
+
+
+def test_same_booking_resumes_its_checkpoint():
+    job = booking()
+    open_bms.save_checkpoint(job.name, checkpoint_for(job))
+    assert open_bms.load_checkpoint(job)["seats"] == ["A1", "A2"]
+
+
+@pytest.mark.parametrize("changes", [
+    {"movie_code": "ET00511111"}, {"location_slug": "delhi-ncr"}, {"date_input_str": "JAN 16"},
+    {"theatre_name": "INOX: R-City, Ghatkopar"}, {"start_time_str": "07:00 PM"}, {"end_time_str": "11:00 PM"}, {"num_seats": 3},
+    {"fallback_targets": (open_bms.BookingTarget("INOX: R-City, Ghatkopar", "06:00 PM", "10:00 PM", "JAN 15"),)},
+])
+def test_checkpoint_from_another_booking_is_ignored_and_deleted(checkpoint_file, changes):
+    first = booking()
+    open_bms.save_checkpoint(first.name, checkpoint_for(first))
+    assert open_bms.load_checkpoint(booking(**changes)) is None
+    assert first.name not in json.loads(checkpoint_file.read_text(encoding="utf-8"))
+
+
+def test_checkpoint_without_fingerprint_is_ignored(checkpoint_file):
+    job = booking()
+    legacy = checkpoint_for(job)
+    del legacy["job"] # Written before checkpoints recorded their booking
+    open_bms.save_checkpoint(job.name, legacy)
+    assert open_bms.load_checkpoint(job) is None
+
+
+def test_other_jobs_checkpoints_are_kept(checkpoint_file):
+    first, second = booking("job1"), booking("job2", movie_code="ET00511111")
+    open_bms.save_checkpoint(first.name, checkpoint_for(first))
+    open_bms.save_checkpoint(second.name, checkpoint_for(second))
+    assert open_bms.load_checkpoint(first._replace(num_seats=4)) is None
+    assert open_bms.load_checkpoint(second) is not None
+
+
+def test_old_checkpoint_is_not_resumed():
+    job = booking()
+    open_bms.save_checkpoint(job.name, checkpoint_for(job, datetime.now() - timedelta(seconds=open_bms.CHECKPOINT_MAX_AGE_SECONDS + 60)))
+    assert open_bms.load_checkpoint(job) is None
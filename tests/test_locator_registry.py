@@ -0,0 +1,70 @@
+"""LocatorRegistry: the primary strategy keeps its place; fallbacks are promoted and demoted around it (no browser)."""
+import json
+import re
+
+import pytest
+
+import open_bms
+
+STRATEGIES = {"mobile_input": [("id", "mobile"), ("css", "input[type='tel']"), ("css", "input[name*='phone']")]}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return open_bms.LocatorRegistry(STRATEGIES, str(tmp_path / "locators.json"))
+
+
+def order(registry: open_bms.LocatorRegistry) -> list[int]:
+    return [index for index, _ in registry.ranked("mobile_input")]
+
+
+def test_primary_first_by_default(registry):
+    assert order(registry) == [0, 1, 2]
+    assert registry.winner("mobile_input") == ("id", "mobile")
+
+
+def test_fallback_promoted_behind_the_primary(registry):
+    registry.record("mobile_input", 2)
+    assert order(registry) == [0, 2, 1]
+    assert registry.winner("mobile_input") == ("css", "input[name*='phone']")
+
+
+def test_primary_match_demotes_the_fallback(registry):
+    registry.record("mobile_input", 2)
+    registry.record("mobile_input", 0)
+    assert order(registry) == [0, 1, 2]
+    assert registry.winner("mobile_input") == ("id", "mobile")
+
+
+def test_timeout_demotes_the_fallback(registry):
+    registry.record("mobile_input", 1)
+    registry.miss("mobile_input")
+    assert order(registry) == [0, 1, 2]
+    registry.miss("mobile_input") # Nothing promoted: nothing changes
+    assert order(registry) == [0, 1, 2]
+
+
+def test_promotion_survives_a_restart(registry, tmp_path):
+    registry.record("mobile_input", 2)
+    restarted = open_bms.LocatorRegistry(STRATEGIES, str(tmp_path / "locators.json"))
+    assert [index for index, _ in restarted.ranked("mobile_input")] == [0, 2, 1]
+    registry.record("mobile_input", 0)
+    saved = json.loads((tmp_path / "locators.json").read_text(encoding="utf-8"))
+    assert "mobile_input" not in saved["preferred"]
+    assert open_bms.LocatorRegistry(STRATEGIES, str(tmp_path / "locators.json")).ranked("mobile_input")[1][0] == 1
+
+
+def xpath_translate(text: str, source: str, target: str) -> str:
+    """XPath 1.0 translate(): characters of `source` become the character at the same position in `target`."""
+    return "".join(target[source.index(c)] if c in source else c for c in text)
+
+
+@pytest.mark.parametrize("name, labels", [
+    ("make_payment", ["MAKE PAYMENT", "Make Payment", "make payment"]),
+    ("interested_button", ["I'm interested", "I'm Interested", "I'M INTERESTED"]),
+])
+def test_case_insensitive_fallbacks_match_every_case(name, labels):
+    xpath = open_bms.LOCATOR_STRATEGIES[name][-1][1]
+    source, target, wanted = re.search(r"contains\(translate\(normalize-space\(\), '([^']*)', '([^']*)'\), '([^']*)'\)", xpath).groups()
+    for label in labels:
+        assert wanted in xpath_translate(label, source, target), f"{name} fallback misses {label!r}"
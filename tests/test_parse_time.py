@@ -0,0 +1,45 @@
+"""parse_time: typed times must be whole, valid times; showtime labels from the page may carry screen formats."""
+from datetime import time
+
+import pytest
+
+import open_bms
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("07:45 PM", time(19, 45)), ("7:45 PM", time(19, 45)), ("7:45PM", time(19, 45)), ("7:45 pm", time(19, 45)),
+    ("07:45\u202fPM", time(19, 45)), ("  09:15 am ", time(9, 15)), ("12:00 AM", time(0, 0)), ("12:30 PM", time(12, 30)),
+    ("19:45", time(19, 45)), ("7:45", time(7, 45)), ("00:00", time(0, 0)), ("23:59", time(23, 59)),
+])
+def test_typed_times(text, expected):
+    assert open_bms.parse_time(text) == open_bms.ParsedTime(expected)
+
+
+@pytest.mark.parametrize("text", [
+    # Mistyped AM/PM must not fall back to a 24h reading of the digits
+    "7:45 pn", "7:45 P", "9:15pmx", "1:00 AMX", "7:45 PM IMAX",
+    # Not times, or out of range
+    "7.45", "7 PM", "745", "7:5", "", "Sold out", "25:00", "13:30 PM", "0:30 AM", "7:60",
+])
+def test_typed_times_rejected(text):
+    parsed = open_bms.parse_time(text)
+    assert parsed.time is None and parsed.error
+    assert open_bms.parse_time_string(text) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("07:45 PM", time(19, 45)), ("07:45 PM IMAX", time(19, 45)), ("10:00 AM 4DX", time(10, 0)), ("7.45 p.m.", time(19, 45)),
+    ("09:30 PM Dolby Atmos", time(21, 30)), ("11:00 AM 3D IMAX", time(11, 0)), ("18:00", time(18, 0)),
+])
+def test_showtime_labels(text, expected):
+    assert open_bms.parse_time_string(text, showtime_label=True) == expected
+
+
+@pytest.mark.parametrize("text", ["7:45 pn", "9:15pmx", "07:45 PM Recliner sold out", "Sold out", "13:30 PM"])
+def test_showtime_labels_rejected(text):
+    assert open_bms.parse_time_string(text, showtime_label=True) is None
+
+
+def test_validation_reports_a_mistyped_meridiem():
+    errors = open_bms.validate_booking_inputs("mumbai", "ET00500000", "JAN 15", "PVR", "7:45 pn", "11:00 PM", "2", "9876543210", "user", "ybl")
+    assert any("earliest showtime" in error for error in errors)
@@ -0,0 +1,57 @@
+"""HTTP pre-check: booking_open_from_html on the saved pages in fixtures/ and on the stand-in's pages (no browser)."""
+import glob
+import os
+
+import pytest
+
+import bms_standin
+import open_bms
+
+# Every saved page and what the pre-check must make of it: True = open, False = upcoming, None = let the browser check
+EXPECTED = {
+    "movie_page_open.html": True,
+    "movie_page_upcoming.html": False,
+    "blocked_403.html": None,
+    "buytickets.html": None,
+    "seat_layout.html": None,
+    "summary.html": None,
+    "payment.html": None,
+    "payment_done.html": None,
+}
+
+
+def test_every_fixture_has_an_expectation():
+    names = {os.path.basename(path) for path in glob.glob(os.path.join(bms_standin.FIXTURES_DIR, "*.html"))}
+    assert names == set(EXPECTED), "add new fixture pages to EXPECTED"
+
+
+@pytest.mark.parametrize("name, expected", sorted(EXPECTED.items()))
+def test_fixture_classification(name, expected):
+    assert open_bms.booking_open_from_html(bms_standin.load_fixture(name)) is expected
+
+
+@pytest.mark.parametrize("name, expected", [("movie_page_open.html", True), ("movie_page_upcoming.html", False)])
+def test_served_movie_pages_classify_like_the_fixtures(name, expected):
+    scenario = bms_standin.StandinScenario(media_assets=3)
+    page = bms_standin.inject_media(bms_standin.fill(bms_standin.load_fixture(name), location="mumbai", movie_code="ET00416952"), scenario)
+    assert open_bms.booking_open_from_html(page) is expected
+
+
+def test_challenge_page_is_never_classified():
+    page = bms_standin.fill(bms_standin.CHALLENGE_PAGE, delay_ms="1000")
+    assert open_bms.booking_open_from_html(page) is None
+
+
+def test_block_title_wins_over_open_signals():
+    page = bms_standin.load_fixture("movie_page_open.html").replace("<title>", "<title>Just a moment... ", 1)
+    assert open_bms.booking_open_from_html(page) is None
+
+
+@pytest.mark.parametrize("apostrophe", ["'", "&#x27;", "&#39;", "’"])
+def test_interested_button_means_upcoming(apostrophe):
+    page = f"<html><title>Movie</title><button><span>I{apostrophe}m interested</span></button></html>"
+    assert open_bms.booking_open_from_html(page) is False
+
+
+def test_unknown_layout_is_left_to_the_browser():
+    assert open_bms.booking_open_from_html("<html><title>Movie</title><body>Redesigned page</body></html>") is None
@@ -0,0 +1,105 @@
+"""ReleaseMonitor and RateBudget on a simulated clock: hours of watching in well under a second (no browser, no HTTP)."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import open_bms
+from bms_synthetic import SimulatedClock
+
+
+class FakeSite:
+    """Movie pages that open at fixed offsets into the day; records every check as (offset, url)."""
+
+    def __init__(self, clock: SimulatedClock, opens_at: dict[str, float], blocked: tuple[float, float] | None = None):
+        self.clock, self.opens_at, self.blocked = clock, opens_at, blocked
+        self.hits = []
+
+    def check(self, url: str) -> bool | None:
+        t = self.clock.offset
+        self.hits.append((t, url))
+        if self.blocked and self.blocked[0] <= t < self.blocked[1]: return None
+        return t >= self.opens_at[url.rstrip("/").rsplit("/", 1)[1]]
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock(datetime(2026, 1, 15, 8, 0))
+
+
+def watchlist(clock: SimulatedClock, opens_at: dict[str, float], cities: list[str]) -> list[open_bms.WatchEntry]:
+    entries = []
+    for m, movie in enumerate(opens_at):
+        # Half the releases have a known (slightly wrong) opening time, the rest are unknown
+        expected = clock.now() + timedelta(seconds=opens_at[movie] + random.Random(m).uniform(-120, 120)) if m % 2 == 0 else None
+        entries += [open_bms.WatchEntry(city, movie, expected) for city in cities]
+    return entries
+
+
+def busiest_minute(times: list[float]) -> int:
+    busiest, left = 0, 0
+    for right, t in enumerate(times):
+        while times[left] <= t - 60: left += 1
+        busiest = max(busiest, right - left + 1)
+    return busiest
+
+
+def test_watchlist_day_opens_every_page_within_the_budget(clock):
+    cities, movies = [f"city{i:02d}" for i in range(30)], [f"ET0050{i:04d}" for i in range(6)]
+    opens_at = {movie: 3600 + i * 1800 for i, movie in enumerate(movies)}
+    entries = watchlist(clock, opens_at, cities)
+    entries += random.Random(7).sample(entries, 20) # Second bookings for pages already watched
+    site = FakeSite(clock, opens_at)
+    handed = {}
+    monitor = open_bms.ReleaseMonitor(entries, site.check, clock)
+    opened = monitor.run(lambda url, page_entries: handed.setdefault(url, []).extend(page_entries), until=clock.now() + timedelta(hours=5))
+
+    assert len(opened) == len(monitor.pages) == len(cities) * len(movies)
+    for url, seen in opened.items():
+        assert (seen - clock.start).total_seconds() >= opens_at[url.rsplit("/", 1)[1]] # Never reported open early
+    assert sum(len(page_entries) for page_entries in handed.values()) == len(entries) # Each entry handed over once
+    assert len({url for _, url in site.hits}) == len(monitor.pages) # Duplicate entries never cause extra pages
+    assert busiest_minute([t for t, _ in site.hits]) <= open_bms.MONITOR_REQUESTS_PER_MINUTE + open_bms.MONITOR_BURST
+    assert monitor.checks == len(site.hits)
+
+
+def test_block_page_pauses_every_check(clock):
+    opens_at = {"ET00500000": 3 * 3600}
+    site = FakeSite(clock, opens_at, blocked=(1800, 1890))
+    monitor = open_bms.ReleaseMonitor(watchlist(clock, opens_at, [f"city{i}" for i in range(20)]), site.check, clock)
+    monitor.run(lambda url, entries: None, until=clock.now() + timedelta(hours=4))
+    times = [t for t, _ in site.hits]
+    first_block = next(t for t in times if 1800 <= t < 1890)
+    after = [t for t in times if t > first_block]
+    assert after and after[0] - first_block >= open_bms.BLOCK_BACKOFF_BASE_SECONDS * (1 - open_bms.POLL_JITTER_RATIO)
+
+
+def test_monitor_stops_after_too_many_blocks_in_a_row(clock):
+    site = FakeSite(clock, {"ET00500000": 10 ** 9}, blocked=(0, 10 ** 9))
+    monitor = open_bms.ReleaseMonitor([open_bms.WatchEntry("mumbai", "ET00500000")], site.check, clock)
+    assert monitor.run(lambda url, entries: None) == {}
+    assert monitor.checks == open_bms.MAX_CONSECUTIVE_BLOCKS
+
+
+def test_opening_in_one_city_checks_the_other_cities_next(clock):
+    opens_at = {"ET00500000": 600}
+    cities = [f"city{i:02d}" for i in range(10)]
+    site = FakeSite(clock, opens_at)
+    monitor = open_bms.ReleaseMonitor(watchlist(clock, opens_at, cities), site.check, clock)
+    monitor.run(lambda url, entries: None)
+    first_open = next(i for i, (t, _) in enumerate(site.hits) if t >= 600)
+    # After the first open page the remaining cities go out back to back, limited only by the budget
+    following = [t for t, _ in site.hits[first_open:]]
+    assert len(following) == len(cities)
+    assert following[-1] - following[0] <= len(cities) * 60 / open_bms.MONITOR_REQUESTS_PER_MINUTE
+
+
+def test_rate_budget_allows_a_burst_then_the_average_rate():
+    budget = open_bms.RateBudget(per_minute=30, burst=5, now=0.0)
+    for _ in range(5):
+        assert budget.available_at(0.0) == 0.0
+        budget.take(0.0)
+    assert budget.available_at(0.0) == pytest.approx(2.0) # One token every 2s
+    budget.take(2.0)
+    assert budget.available_at(2.0) == pytest.approx(4.0)
+    assert budget.available_at(100.0) == 100.0 # Refilled after idling, up to the burst
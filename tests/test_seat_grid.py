@@ -0,0 +1,60 @@
+"""SeatGrid: block search and the incremental run index (no browser)."""
+import random
+
+import pytest
+
+import open_bms
+from bms_synthetic import synthetic_seat_map
+
+
+@pytest.mark.parametrize("n_rows, n_cols", [(40, 30), (60, 50)])
+def test_incremental_updates_match_full_rebuild(n_rows, n_cols):
+    seat_map = synthetic_seat_map(n_rows, n_cols, sold_ratio=0.4)
+    grid = open_bms.SeatGrid(seat_map)
+    rnd = random.Random(2)
+    changes = {}
+    for seat in rnd.sample(seat_map, 300): # Other buyers taking seats, and a few released again
+        changes[seat.id] = rnd.choice(["sold", "blocked", "available"])
+        grid.update(seat.id, changes[seat.id])
+    rebuilt = open_bms.SeatGrid([seat._replace(status=changes.get(seat.id, seat.status)) for seat in seat_map])
+    assert grid.runs == rebuilt.runs
+    assert grid.available_count() == rebuilt.available_count()
+    assert grid.best_blocks(4) == rebuilt.best_blocks(4)
+
+
+def test_apply_snapshot_matches_full_rebuild():
+    seat_map = synthetic_seat_map(40, 30, sold_ratio=0.3)
+    grid = open_bms.SeatGrid(seat_map)
+    snapshot = [seat._replace(status="sold") if i % 7 == 0 else seat for i, seat in enumerate(seat_map)]
+    assert grid.apply_snapshot(snapshot) > 0
+    assert grid.apply_snapshot(snapshot) == 0 # Nothing changed the second time
+    rebuilt = open_bms.SeatGrid(snapshot)
+    assert grid.runs == rebuilt.runs and grid.best_blocks(3) == rebuilt.best_blocks(3)
+
+
+def test_blocks_are_contiguous_available_and_never_cross_an_aisle():
+    seat_map = synthetic_seat_map(40, 30, sold_ratio=0.4)
+    grid = open_bms.SeatGrid(seat_map)
+    by_id = {seat.id: seat for seat in seat_map}
+    blocks = grid.best_blocks(4)
+    assert blocks and blocks == sorted(blocks)
+    for block in blocks:
+        seats = [by_id[seat_id] for seat_id in block.seat_ids]
+        assert len(seats) == 4 and all(seat.status == "available" and seat.row == block.row for seat in seats)
+        positions = [seat.pos for seat in seats]
+        assert positions == list(range(positions[0], positions[0] + 4))
+
+
+def test_taken_seat_removes_its_block():
+    seats = [open_bms.Seat(f"A_{c}", "A", str(c), "available", "AREA", c) for c in range(1, 5)]
+    grid = open_bms.SeatGrid(seats)
+    assert [block.seat_ids for block in grid.best_blocks(4)] == [("A_1", "A_2", "A_3", "A_4")]
+    assert grid.update("A_3", "sold")
+    assert not grid.update("A_3", "sold") # Same status again: no change
+    assert grid.best_blocks(4) == [] and grid.available_count() == 3
+
+
+def test_preferred_rows_rank_first():
+    seat_map = synthetic_seat_map(20, 30, sold_ratio=0.0)
+    grid = open_bms.SeatGrid(seat_map, preferred_rows=["R15"])
+    assert grid.best_blocks(2)[0].row == "R15"
@@ -0,0 +1,58 @@
+"""TheatreIndex: resolving typed theatre names against a listing (no browser)."""
+import random
+
+import pytest
+
+import open_bms
+from bms_synthetic import MISTYPE_VARIANTS, mistype, theatre_corpus
+
+
+@pytest.fixture(scope="module", params=[500, 3000])
+def corpus(request):
+    names = theatre_corpus(request.param)
+    return names, open_bms.TheatreIndex(names)
+
+
+def test_listed_names_resolve_to_themselves(corpus):
+    names, index = corpus
+    assert all(index.resolve(name).name == name for name in names)
+
+
+def test_mistyped_names_never_resolve_to_another_theatre(corpus):
+    names, index = corpus
+    rnd = random.Random(4)
+    resolved = wrong = 0
+    for name in rnd.sample(names, 400):
+        for variant in range(MISTYPE_VARIANTS):
+            query = mistype(name, variant, rnd)
+            if open_bms.normalize_theatre_name(query) in index.exact and index.resolve(query).name != name:
+                continue # The variant is itself another listed name (e.g. a suffix-less sibling)
+            match = index.resolve(query)
+            if match is None: continue # Rejected as ambiguous: the user is asked to be more specific
+            resolved += 1
+            if match.name != name: wrong += 1
+    assert wrong == 0
+    assert resolved >= 0.8 * 400 * 5 # Forgiving enough to be useful
+
+
+def test_partial_match_with_an_equally_good_rival_is_rejected():
+    index = open_bms.TheatreIndex(["INOX: Oberoi Mall, Vasant Kunj", "INOX: Oberoi Mall, Vasant Kunj IMAX", "PVR: Select Citywalk, Saket"])
+    assert index.resolve("INOX: Oberoi Mall, Vasant") is None
+    assert index.resolve("INOX Oberoi Mall Vasant Kunj IMAX").name == "INOX: Oberoi Mall, Vasant Kunj IMAX"
+    assert index.resolve("INOX: Oberoi Mall, Vasant Kunj").name == "INOX: Oberoi Mall, Vasant Kunj"
+
+
+def test_typo_and_suffix_are_tolerated():
+    index = open_bms.TheatreIndex(["PVR: Phoenix Palladium, Lower Parel", "INOX: R-City Mall, Ghatkopar"])
+    assert index.resolve("PVR Phoenx Palladium Lower Parel").name == "PVR: Phoenix Palladium, Lower Parel"
+    assert index.resolve("inox r city mall ghatkopar, audi 2").name == "INOX: R-City Mall, Ghatkopar"
+
+
+def test_unknown_theatre_is_rejected():
+    index = open_bms.TheatreIndex(theatre_corpus(500))
+    assert index.resolve("Regal Cinema, Colaba") is None
+
+
+def test_aliases_map_to_the_listed_name():
+    index = open_bms.TheatreIndex(["PVR: Phoenix Palladium, Lower Parel"], aliases={"pvr lower parel": "PVR: Phoenix Palladium, Lower Parel"})
+    assert index.resolve("PVR Lower Parel").name == "PVR: Phoenix Palladium, Lower Parel"